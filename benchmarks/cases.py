@@ -0,0 +1,95 @@
+import json
+import random
+from typing import Callable, Dict, List
+
+from handlers.favorites import sort_favorites
+from keyboards.coin_buttons import get_top_coins_keyboard
+from loadtest.fake_coinlore import FakeCoinlore
+from services.tickers import Ticker, decode_tickers_page, parse_tickers
+from utils import fast_json
+from utils.formaters import render_coin_details
+from utils.search_index import SearchIndex
+
+
+# Fixed clock for the generated prices, so every run benchmarks the same data
+DATA_TIME = 1_700_000_000.0
+UNIVERSE_SIZE = 5000
+PAGE_SIZE = 100
+FAVORITES = 50
+
+Operation = Callable[[], object]
+CASES: Dict[str, Callable[["Dataset"], Operation]] = {}
+
+
+def case(name: str):
+    """Register a benchmark: a function taking the dataset and returning the operation to time."""
+    def register(setup: Callable[["Dataset"], Operation]) -> Callable[["Dataset"], Operation]:
+        CASES[name] = setup
+        return setup
+    return register
+
+
+class Dataset:
+    """Coin universe shared by every case, generated like the load-test CoinLore fake."""
+
+    def __init__(self, coins: int = UNIVERSE_SIZE, seed: int = 1):
+        fake = FakeCoinlore(coins=coins, latency=0, jitter=0, seed=seed)
+        self.raw = [fake.render_ticker(coin, DATA_TIME) for coin in fake.coins]
+        self.tickers: List[Ticker] = parse_tickers(self.raw)
+        self.page_body = json.dumps(
+            {"data": self.raw[:PAGE_SIZE], "info": {"coins_num": coins, "time": int(DATA_TIME)}}
+        ).encode()
+        self.index = SearchIndex()
+        self.index.update(self.tickers)
+        self.rng = random.Random(seed)
+
+
+def _search(query: str) -> Callable[[Dataset], Operation]:
+    return lambda data: lambda: data.index.search(query, limit=5)
+
+
+# process_search_query: exact symbol, name prefixes within and beyond the
+# trie depth, a typo answered by the trigram index, and no match at all
+case("search.symbol")(_search("btc"))
+case("search.prefix")(_search("ethe"))
+case("search.long_prefix")(_search("binance coin"))
+case("search.typo")(_search("etherium"))
+case("search.miss")(_search("qqqqqqqq"))
+
+
+@case("render.coin_details.cached")
+def _coin_details_cached(data: Dataset) -> Operation:
+    coin = data.tickers[1]
+    return lambda: render_coin_details(coin, 1, DATA_TIME)
+
+
+@case("render.coin_details.uncached")
+def _coin_details_uncached(data: Dataset) -> Operation:
+    coin = data.tickers[1]
+    return lambda: render_coin_details(coin, None, DATA_TIME)
+
+
+@case("keyboard.top_coins.cached")
+def _top_coins_cached(data: Dataset) -> Operation:
+    coins = data.tickers[:10]
+    total_pages = len(data.tickers) // 10
+    return lambda: get_top_coins_keyboard(coins, 0, total_pages, version=1)
+
+
+@case("keyboard.top_coins.build")
+def _top_coins_build(data: Dataset) -> Operation:
+    coins = data.tickers[:10]
+    total_pages = len(data.tickers) // 10
+    return lambda: get_top_coins_keyboard(coins, 0, total_pages)
+
+
+@case("favorites.sort")
+def _favorites_sort(data: Dataset) -> Operation:
+    favorites = data.rng.sample(data.tickers, FAVORITES)
+    return lambda: sort_favorites(favorites)
+
+
+@case("decode.tickers_page")
+def _decode_tickers_page(data: Dataset) -> Operation:
+    body = data.page_body
+    return lambda: decode_tickers_page(fast_json.loads(body))
@@ -0,0 +1,123 @@
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.cases import CASES, Dataset
+from utils import fast_json
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# Slowdown over the baseline reported as a regression; micro-benchmarks are
+# noisy, so small changes are not flagged
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(operation, repeat: int, min_time: float) -> Dict[str, Any]:
+    """Time an operation, in microseconds per call.
+
+    The loop count is grown until one repetition takes at least min_time;
+    the best of the repetitions is the figure compared across commits.
+    """
+    timer = timeit.Timer(operation)
+    loops = 1
+    while timer.timeit(loops) < min_time:
+        loops *= 2
+    times = [elapsed / loops * 1e6 for elapsed in timer.repeat(repeat, loops)]
+    return {"min_us": round(min(times), 3), "median_us": round(statistics.median(times), 3), "loops": loops}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_cases(names: List[str], repeat: int, min_time: float) -> Dict[str, Any]:
+    data = Dataset()
+    results = {}
+    for name in names:
+        operation = CASES[name](data)
+        operation()  # warm caches and lazy imports before timing
+        results[name] = measure(operation, repeat, min_time)
+        print(f"{name:<32}{results[name]['min_us']:>12.3f} us")
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "json_backend": fast_json.BACKEND,
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print the change of every case against the baseline.
+
+    Returns:
+        Names of the cases slower than the baseline by more than threshold
+    """
+    regressions = []
+    print(f"\nAgainst baseline {baseline['meta'].get('commit')} ({baseline['meta'].get('created')}):")
+    print(f"{'case':<32}{'baseline us':>14}{'current us':>14}{'change':>10}")
+    for name, result in report["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<32}{'-':>14}{result['min_us']:>14.3f}{'new':>10}")
+            continue
+        change = result["min_us"] / old["min_us"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<32}{old['min_us']:>14.3f}{result['min_us']:>14.3f}{change:>+10.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the code that runs on every update")
+    parser.add_argument("cases", nargs="*", help="case names or name prefixes to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds one repetition runs at least")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="write the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown flagged as a regression, e.g. 0.25 for 25%%")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if not args.cases or any(name.startswith(prefix) for prefix in args.cases)]
+    if not names:
+        parser.error(f"no case matches {args.cases}; cases: {', '.join(CASES)}")
+
+    report = run_cases(names, args.repeat, args.min_time)
+
+    regressions = []
+    if args.compare:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+    if args.save:
+        if args.cases and Path(args.baseline).exists():
+            # Only some cases ran: keep the baseline of the others
+            with open(args.baseline) as f:
+                report["results"] = {**json.load(f)["results"], **report["results"]}
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from database.models import MIGRATIONS, Alert
+
+
+T = TypeVar("T")
+
+
+class Database:
+    """Async access to a single SQLite database.
+
+    One connection is opened and reused for the lifetime of the bot. Every
+    statement runs on a dedicated single-thread executor, so the event loop
+    never blocks on disk I/O and the connection is only ever used from one
+    thread. SQL is kept in module-level constants so the connection's
+    statement cache reuses the prepared statements.
+    """
+
+    STATEMENT_CACHE_SIZE = 256
+
+    def __init__(self, path: str = "bot.db"):
+        """
+        Args:
+            path: Path of the SQLite database file
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._conn is not None
+
+    async def connect(self, path: Optional[str] = None) -> None:
+        """Open the database, enable WAL mode and apply pending migrations.
+
+        Args:
+            path: Override the database path given at construction
+        """
+        if self._conn is not None:
+            return
+        if path:
+            self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = await self._run(self._open)
+        logging.info(f"Database opened: {self.path}")
+
+    async def close(self) -> None:
+        """Close the connection and stop the worker thread."""
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        await asyncio.get_running_loop().run_in_executor(self._executor, conn.close)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        logging.info("Database closed")
+
+    def _open(self) -> sqlite3.Connection:
+        # isolation_level=None: transactions are started explicitly in transaction()
+        conn = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA foreign_keys=ON")
+        self._migrate(conn)
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Apply every migration newer than the schema's user_version."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version={number}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            logging.info(f"Applied database migration {number}")
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            raise RuntimeError("Database is not connected")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        """Run a single statement in autocommit mode.
+
+        Returns:
+            Number of rows changed
+        """
+        return await self._run(lambda: self._conn.execute(sql, params).rowcount)
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        """Run a query and return all rows."""
+        return await self._run(lambda: self._conn.execute(sql, params).fetchall())
+
+    async def fetchone(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        """Run a query and return the first row, or None."""
+        return await self._run(lambda: self._conn.execute(sql, params).fetchone())
+
+    async def transaction(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run ``fn(connection)`` inside one transaction on the worker thread.
+
+        The transaction is committed if ``fn`` returns and rolled back if it
+        raises.
+        """
+        def run() -> T:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+        return await self._run(run)
+
+
+_SELECT_FAVORITES = "SELECT coin_id FROM favorites WHERE user_id = ? ORDER BY added_at"
+_SELECT_FAVORITE = "SELECT 1 FROM favorites WHERE user_id = ? AND coin_id = ?"
+_INSERT_FAVORITE = "INSERT OR IGNORE INTO favorites (user_id, coin_id, added_at) VALUES (?, ?, ?)"
+_DELETE_FAVORITE = "DELETE FROM favorites WHERE user_id = ? AND coin_id = ?"
+_DELETE_FAVORITES = "DELETE FROM favorites WHERE user_id = ?"
+
+
+class _PendingFavorites:
+    """Unflushed favorites changes of one user."""
+
+    __slots__ = ("cleared", "changes")
+
+    def __init__(self):
+        self.cleared = False
+        # coin_id -> added_at for additions, None for removals; insertion ordered
+        self.changes: Dict[str, Optional[float]] = {}
+
+
+class FavoritesStore:
+    """Persistent per-user favorite coins with write-behind batching.
+
+    Mutations are applied to an in-memory buffer and return immediately.
+    Changes to the same user and coin are coalesced, and the buffer is
+    written in one transaction every ``flush_interval`` seconds or as soon as
+    ``flush_threshold`` changes are waiting. Reads merge the buffer, and the
+    batch being written until its transaction finishes, over the stored rows,
+    so users always see their own changes.
+    """
+
+    def __init__(self, database: Database, flush_interval: float = 2.0, flush_threshold: int = 500):
+        """
+        Args:
+            database: Database holding the favorites table
+            flush_interval: Seconds between background flushes
+            flush_threshold: Pending changes that trigger an early flush
+        """
+        self.db = database
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: Dict[int, _PendingFavorites] = {}
+        self._pending_count = 0
+        # Batch handed to the running flush, visible to reads until it is committed
+        self._flushing: Dict[int, _PendingFavorites] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending_count(self) -> int:
+        """Number of buffered changes not yet written to the database."""
+        return self._pending_count
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is None or self._task.done():
+            self._flush_requested = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flush loop and write every pending change."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f"Failed to flush favorites: {e}")
+
+    async def flush(self) -> int:
+        """Write all buffered changes in a single transaction.
+
+        Returns:
+            Number of changes written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            pending, count = self._pending, self._pending_count
+            self._pending, self._pending_count = {}, 0
+            self._flushing = pending
+
+            cleared = [(user_id,) for user_id, changes in pending.items() if changes.cleared]
+            inserts = []
+            deletes = []
+            for user_id, changes in pending.items():
+                for coin_id, added_at in changes.changes.items():
+                    if added_at is None:
+                        deletes.append((user_id, coin_id))
+                    else:
+                        inserts.append((user_id, coin_id, added_at))
+
+            def write(conn: sqlite3.Connection) -> None:
+                conn.executemany(_DELETE_FAVORITES, cleared)
+                conn.executemany(_DELETE_FAVORITE, deletes)
+                conn.executemany(_INSERT_FAVORITE, inserts)
+
+            try:
+                await self.db.transaction(write)
+            except Exception:
+                self._requeue(pending)
+                raise
+            finally:
+                # Statements run in order on the database thread, so a read
+                # queued before this transaction resumes before this does
+                # and still merges the batch over its pre-flush rows
+                self._flushing = {}
+            logging.debug(f"Flushed {count} favorites changes for {len(pending)} users")
+            return count
+
+    def _requeue(self, pending: Dict[int, _PendingFavorites]) -> None:
+        """Put changes from a failed flush back under any newer ones."""
+        for user_id, older in pending.items():
+            newer = self._pending.get(user_id)
+            if newer is None:
+                self._pending[user_id] = older
+                self._pending_count += len(older.changes) + older.cleared
+            elif not newer.cleared:
+                merged = dict(older.changes)
+                for coin_id, added_at in newer.changes.items():
+                    merged.pop(coin_id, None)
+                    merged[coin_id] = added_at
+                self._pending_count += len(merged) - len(newer.changes) + older.cleared
+                newer.changes = merged
+                newer.cleared = older.cleared
+
+    def _buffer(self, user_id: int) -> _PendingFavorites:
+        pending = self._pending.get(user_id)
+        if pending is None:
+            pending = self._pending[user_id] = _PendingFavorites()
+        return pending
+
+    def _record(self, user_id: int, coin_id: str, added_at: Optional[float]) -> None:
+        changes = self._buffer(user_id).changes
+        if coin_id in changes:
+            # Coalesce: keep only the latest change, moved to the end
+            del changes[coin_id]
+        else:
+            self._pending_count += 1
+        changes[coin_id] = added_at
+        if self._pending_count >= self.flush_threshold and self._flush_requested is not None:
+            self._flush_requested.set()
+
+    def _unwritten(self, user_id: int) -> List[_PendingFavorites]:
+        """Changes of a user not yet in the database, oldest first."""
+        return [
+            changes for changes in (self._flushing.get(user_id), self._pending.get(user_id))
+            if changes is not None
+        ]
+
+    def _buffered_contains(self, user_id: int, coin_id: str) -> Optional[bool]:
+        """Whether unwritten changes add or remove a coin; None if only the database knows."""
+        for changes in reversed(self._unwritten(user_id)):
+            if coin_id in changes.changes:
+                return changes.changes[coin_id] is not None
+            if changes.cleared:
+                return False
+        return None
+
+    async def get(self, user_id: int) -> List[str]:
+        """Return a user's favorite coin ids, oldest first."""
+        unwritten = self._unwritten(user_id)
+        if any(changes.cleared for changes in unwritten):
+            favorites = []
+        else:
+            rows = await self.db.fetchall(_SELECT_FAVORITES, (user_id,))
+            favorites = [coin_id for (coin_id,) in rows]
+            # The buffer may have changed, or been handed to a flush, while the query ran
+            unwritten = self._unwritten(user_id)
+
+        for changes in unwritten:
+            if changes.cleared:
+                favorites = []
+            for coin_id, added_at in changes.changes.items():
+                if added_at is None:
+                    if coin_id in favorites:
+                        favorites.remove(coin_id)
+                elif coin_id not in favorites:
+                    favorites.append(coin_id)
+        return favorites
+
+    async def contains(self, user_id: int, coin_id: str) -> bool:
+        """Check whether a coin is in a user's favorites."""
+        coin_id = str(coin_id)
+        buffered = self._buffered_contains(user_id, coin_id)
+        if buffered is not None:
+            return buffered
+        found = await self.db.fetchone(_SELECT_FAVORITE, (user_id, coin_id)) is not None
+        # Re-check the buffer in case it changed while the query ran
+        buffered = self._buffered_contains(user_id, coin_id)
+        return found if buffered is None else buffered
+
+    async def add(self, user_id: int, coin_id: str) -> bool:
+        """Add a coin to a user's favorites.
+
+        Returns:
+            True if it was added, False if it was already there
+        """
+        if await self.contains(user_id, coin_id):
+            return False
+        self._record(user_id, str(coin_id), time.time())
+        return True
+
+    async def remove(self, user_id: int, coin_id: str) -> bool:
+        """Remove a coin from a user's favorites.
+
+        Returns:
+            True if it was removed, False if it was not there
+        """
+        if not await self.contains(user_id, coin_id):
+            return False
+        self._record(user_id, str(coin_id), None)
+        return True
+
+    async def clear(self, user_id: int) -> None:
+        """Remove every favorite of a user."""
+        pending = self._buffer(user_id)
+        self._pending_count += (0 if pending.cleared else 1) - len(pending.changes)
+        pending.changes.clear()
+        pending.cleared = True
+        if self._pending_count >= self.flush_threshold and self._flush_requested is not None:
+            self._flush_requested.set()
+
+
+_SELECT_ALERTS = (
+    "SELECT id, user_id, chat_id, coin_id, kind, threshold, armed, created_at, last_triggered_at FROM alerts"
+)
+_COUNT_USER_ALERTS = "SELECT COUNT(*) FROM alerts WHERE user_id = ?"
+_INSERT_ALERT = (
+    "INSERT INTO alerts (user_id, chat_id, coin_id, kind, threshold, armed, created_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+_DELETE_ALERT = "DELETE FROM alerts WHERE id = ? AND user_id = ?"
+_UPDATE_ALERT_STATE = "UPDATE alerts SET armed = ?, last_triggered_at = ? WHERE id = ?"
+
+
+class AlertsStore:
+    """Persistent price alerts."""
+
+    def __init__(self, database: Database):
+        self.db = database
+
+    async def load_all(self) -> List[Alert]:
+        """Return every stored alert."""
+        rows = await self.db.fetchall(_SELECT_ALERTS)
+        return [
+            Alert(id, user_id, chat_id, coin_id, kind, threshold, bool(armed), created_at, last_triggered_at)
+            for (id, user_id, chat_id, coin_id, kind, threshold, armed, created_at, last_triggered_at) in rows
+        ]
+
+    async def count_for_user(self, user_id: int) -> int:
+        """Return how many alerts a user has."""
+        row = await self.db.fetchone(_COUNT_USER_ALERTS, (user_id,))
+        return row[0] if row else 0
+
+    async def create(self, user_id: int, chat_id: int, coin_id: str, kind: str,
+                     threshold: float, armed: bool = True) -> Alert:
+        """Store a new alert and return it with its id."""
+        created_at = time.time()
+
+        def insert(conn: sqlite3.Connection) -> int:
+            cursor = conn.execute(
+                _INSERT_ALERT, (user_id, chat_id, str(coin_id), kind, threshold, int(armed), created_at)
+            )
+            return cursor.lastrowid
+
+        alert_id = await self.db.transaction(insert)
+        return Alert(alert_id, user_id, chat_id, str(coin_id), kind, threshold, armed, created_at)
+
+    async def delete(self, alert_id: int, user_id: int) -> bool:
+        """Delete one of a user's alerts.
+
+        Returns:
+            True if the alert existed and belonged to the user
+        """
+        return await self.db.execute(_DELETE_ALERT, (alert_id, user_id)) > 0
+
+    async def save_states(self, alerts: List[Alert]) -> None:
+        """Persist the armed flag and last trigger time of several alerts at once."""
+        if not alerts:
+            return
+        params = [(int(alert.armed), alert.last_triggered_at, alert.id) for alert in alerts]
+        await self.db.transaction(lambda conn: conn.executemany(_UPDATE_ALERT_STATE, params))
+
+
+db = Database()
+favorites_store = FavoritesStore(db)
+alerts_store = AlertsStore(db)
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from database.db import Database, db
+from utils.metrics import Histogram
+
+
+_SELECT_MANY = "SELECT key, state, data FROM fsm_storage WHERE expires_at > ? AND key IN ({})"
+_UPSERT_STATE = (
+    "INSERT INTO fsm_storage (key, state, data, expires_at) VALUES (?, ?, '{}', ?) "
+    "ON CONFLICT(key) DO UPDATE SET state = excluded.state, expires_at = excluded.expires_at"
+)
+_UPSERT_DATA = (
+    "INSERT INTO fsm_storage (key, state, data, expires_at) VALUES (?, NULL, ?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at"
+)
+_DELETE_EMPTY = "DELETE FROM fsm_storage WHERE key = ? AND state IS NULL AND data = '{}'"
+_PURGE_EXPIRED = "DELETE FROM fsm_storage WHERE expires_at <= ?"
+
+_EMPTY_RECORD = (None, "{}")
+
+STORAGE_DURATION = Histogram(
+    "fsm_storage_duration_seconds", "SQLite FSM storage batched reads and writes", ["operation"]
+)
+
+
+class SQLiteStorage(BaseStorage):
+    """aiogram FSM storage kept in the bot's SQLite database.
+
+    State and data of a key live in one row that expires ``ttl`` seconds
+    after its last write; expired rows are ignored by reads and purged
+    periodically. Reads issued in the same event loop iteration (e.g. the
+    state filter of many concurrent updates) are answered by a single
+    ``SELECT ... IN`` query, so a burst of updates costs one round trip to
+    the database thread instead of one per update.
+    """
+
+    PURGE_INTERVAL = 600  # seconds
+    MAX_BATCH = 500  # keys per SELECT
+
+    def __init__(self, database: Database, ttl: float = 86400, key_builder: Optional[KeyBuilder] = None):
+        """
+        Args:
+            database: Connected database holding the fsm_storage table
+            ttl: Seconds a key is kept after its last write
+            key_builder: Builds row keys from storage keys
+        """
+        self.db = database
+        self.ttl = ttl
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_purge = time.monotonic()
+        self.reads = 0
+        self.batches = 0
+
+    async def _read(self, key: StorageKey) -> Tuple[Optional[str], str]:
+        row_key = self.key_builder.build(key)
+        future = self._pending.get(row_key)
+        if future is None:
+            future = self._pending[row_key] = asyncio.get_running_loop().create_future()
+            if self._flush_task is None:
+                # Runs on the next loop iteration, after every read issued in this one
+                self._flush_task = asyncio.create_task(self._flush_reads())
+        self.reads += 1
+        return await asyncio.shield(future)
+
+    async def _flush_reads(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._flush_task = None
+        keys = list(pending)
+        started = time.perf_counter()
+        try:
+            records: Dict[str, Tuple[Optional[str], str]] = {}
+            for i in range(0, len(keys), self.MAX_BATCH):
+                chunk = keys[i:i + self.MAX_BATCH]
+                rows = await self.db.fetchall(
+                    _SELECT_MANY.format(", ".join("?" * len(chunk))), (time.time(), *chunk)
+                )
+                records.update((row_key, (state, data)) for row_key, state, data in rows)
+                self.batches += 1
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            STORAGE_DURATION.observe(time.perf_counter() - started, "read")
+        for row_key, future in pending.items():
+            if not future.done():
+                future.set_result(records.get(row_key, _EMPTY_RECORD))
+
+    async def _write(self, sql: str, params: tuple, row_key: str, cleared: bool) -> None:
+        def write(conn: sqlite3.Connection) -> None:
+            conn.execute(sql, params)
+            if cleared:
+                # Nothing left for this key: drop the row instead of keeping an empty one
+                conn.execute(_DELETE_EMPTY, (row_key,))
+
+        started = time.perf_counter()
+        await self.db.transaction(write)
+        STORAGE_DURATION.observe(time.perf_counter() - started, "write")
+        if time.monotonic() - self._last_purge > self.PURGE_INTERVAL:
+            self._last_purge = time.monotonic()
+            await self.purge_expired()
+
+    async def purge_expired(self) -> int:
+        """Delete every expired row.
+
+        Returns:
+            Number of rows deleted
+        """
+        deleted = await self.db.execute(_PURGE_EXPIRED, (time.time(),))
+        if deleted:
+            logging.info(f"Purged {deleted} expired FSM records")
+        return deleted
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        row_key = self.key_builder.build(key)
+        await self._write(_UPSERT_STATE, (row_key, state, time.time() + self.ttl), row_key, state is None)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._read(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        row_key = self.key_builder.build(key)
+        await self._write(_UPSERT_DATA, (row_key, json.dumps(data), time.time() + self.ttl), row_key, not data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._read(key)
+        # Parsed per call, so every caller gets its own dict to modify
+        return json.loads(data)
+
+    async def close(self) -> None:
+        # The database connection is shared and closed by its owner
+        pass
+
+
+FSM_BACKENDS = ("memory", "sqlite", "redis")
+
+
+def create_fsm_storage(backend: str = "memory", ttl: float = 86400, redis_url: str = "") -> BaseStorage:
+    """Build the FSM storage selected by configuration.
+
+    Args:
+        backend: "memory" (per process, lost on restart), "sqlite" (the bot's
+            database, survives restarts) or "redis" (shared by several instances)
+        ttl: Seconds FSM records are kept after their last write
+        redis_url: Connection URL for the redis backend
+
+    Returns:
+        aiogram storage instance for the Dispatcher
+    """
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "sqlite":
+        return SQLiteStorage(db, ttl=ttl)
+    if backend == "redis":
+        if not redis_url:
+            raise RuntimeError("FSM_STORAGE=redis requires REDIS_URL")
+        # Imported here: only this backend needs the optional redis package
+        try:
+            from aiogram.fsm.storage.redis import RedisStorage
+        except ImportError as e:
+            raise RuntimeError("FSM_STORAGE=redis requires the redis package (pip install redis)") from e
+        return RedisStorage.from_url(redis_url, state_ttl=int(ttl), data_ttl=int(ttl))
+    raise ValueError(f"Unknown FSM storage backend {backend!r}, expected one of {', '.join(FSM_BACKENDS)}")
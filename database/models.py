@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class Alert:
+    """A user's price alert on one coin."""
+
+    id: int
+    user_id: int
+    chat_id: int
+    coin_id: str
+    kind: str  # one of ALERT_KINDS
+    threshold: float
+    armed: bool
+    created_at: float
+    last_triggered_at: Optional[float] = None
+
+
+# Price crosses above / below the threshold, or moves by at least
+# threshold percent (either direction) over the last hour
+ALERT_ABOVE = "above"
+ALERT_BELOW = "below"
+ALERT_MOVE_1H = "move_1h"
+ALERT_KINDS = (ALERT_ABOVE, ALERT_BELOW, ALERT_MOVE_1H)
+
+
+# Schema migrations, applied in order inside one transaction each.
+# PRAGMA user_version stores how many have been applied; never edit a
+# released migration, append a new one instead.
+MIGRATIONS: List[Tuple[str, ...]] = [
+    (
+        # Clustered on (user_id, coin_id): a user's favorites are one index range
+        """
+        CREATE TABLE favorites (
+            user_id  INTEGER NOT NULL,
+            coin_id  TEXT    NOT NULL,
+            added_at REAL    NOT NULL,
+            PRIMARY KEY (user_id, coin_id)
+        ) WITHOUT ROWID
+        """,
+    ),
+    (
+        """
+        CREATE TABLE alerts (
+            id                INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id           INTEGER NOT NULL,
+            chat_id           INTEGER NOT NULL,
+            coin_id           TEXT    NOT NULL,
+            kind              TEXT    NOT NULL,
+            threshold         REAL    NOT NULL,
+            armed             INTEGER NOT NULL DEFAULT 1,
+            created_at        REAL    NOT NULL,
+            last_triggered_at REAL
+        )
+        """,
+        "CREATE INDEX idx_alerts_user ON alerts (user_id)",
+    ),
+    (
+        # FSM state and data of one chat/user key, expiring expires_at (unix time)
+        """
+        CREATE TABLE fsm_storage (
+            key        TEXT PRIMARY KEY,
+            state      TEXT,
+            data       TEXT NOT NULL DEFAULT '{}',
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX idx_fsm_storage_expires ON fsm_storage (expires_at)",
+    ),
+]
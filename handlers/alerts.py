@@ -0,0 +1,152 @@
+import re
+
+from aiogram import types, Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from database.models import ALERT_ABOVE, ALERT_BELOW, ALERT_MOVE_1H
+from handlers.search import coin_index
+from services.alerts import AlertError, alert_engine
+from services.market_snapshot import market_snapshot
+
+
+# "BTC > 70000", "eth < 1,500.5", "SOL 5%"
+ALERT_PATTERN = re.compile(r"^\s*(.+?)\s*(>=|<=|>|<)?\s*\$?([\d][\d,]*(?:\.\d+)?)\s*(%)?\s*$")
+
+ALERT_USAGE = (
+    "🔔 *Price alerts*\n\n"
+    "`/alert BTC > 70000` - notify when the price rises above $70,000\n"
+    "`/alert BTC < 50000` - notify when the price falls below $50,000\n"
+    "`/alert BTC 5%` - notify when the price moves 5% within an hour\n\n"
+    "`/alerts` - list your alerts\n"
+    "`/delalert 12` - delete alert #12"
+)
+
+
+def describe_alert(alert) -> str:
+    """One-line description of an alert for the alert list"""
+    coin = market_snapshot.get_coin(alert.coin_id)
+    symbol = coin.symbol if coin else alert.coin_id
+    status = "" if alert.armed else " (triggered, waiting to re-arm)"
+
+    if alert.kind == ALERT_ABOVE:
+        return f"#{alert.id} {symbol} above ${alert.threshold:,.6g}{status}"
+    if alert.kind == ALERT_BELOW:
+        return f"#{alert.id} {symbol} below ${alert.threshold:,.6g}{status}"
+    return f"#{alert.id} {symbol} moves {alert.threshold:g}% in 1h{status}"
+
+
+def find_coin(query: str):
+    """Resolve a symbol or coin name to a ticker"""
+    coin = coin_index.find_symbol(query)
+    if coin is None:
+        results = coin_index.search(query, limit=1)
+        coin = results[0] if results else None
+    return coin
+
+
+async def alert_command(message: types.Message, command: CommandObject):
+    """Handle /alert <coin> <condition>"""
+    match = ALERT_PATTERN.match(command.args or "")
+    if not match:
+        await message.answer(ALERT_USAGE, parse_mode="Markdown")
+        return
+
+    query, operator, value, percent = match.groups()
+    threshold = float(value.replace(",", ""))
+
+    if percent and not operator:
+        kind = ALERT_MOVE_1H
+    elif operator and not percent:
+        kind = ALERT_ABOVE if operator.startswith(">") else ALERT_BELOW
+    else:
+        await message.answer(ALERT_USAGE, parse_mode="Markdown")
+        return
+
+    if not len(coin_index):
+        await message.answer("Market data is still loading. Please try again in a minute.")
+        return
+
+    coin = find_coin(query)
+    if coin is None:
+        await message.answer(f"No cryptocurrency found for '{query}'.")
+        return
+
+    try:
+        alert = await alert_engine.add_alert(
+            message.from_user.id, message.chat.id, coin, kind, threshold
+        )
+    except AlertError as e:
+        await message.answer(f"⚠️ {e}")
+        return
+
+    text = f"✅ Alert created: {describe_alert(alert)}"
+    if not alert.armed:
+        text += "\n\nThe condition already holds, so you'll be notified on the next crossing."
+    await message.answer(text)
+
+
+def build_alerts_list(user_id: int):
+    """Build the alert list text and its delete buttons, or (None, None) if there are no alerts"""
+    alerts = alert_engine.get_user_alerts(user_id)
+    if not alerts:
+        return None, None
+
+    lines = ["🔔 Your price alerts\n"]
+    buttons = []
+    for alert in alerts:
+        lines.append(describe_alert(alert))
+        buttons.append([InlineKeyboardButton(text=f"❌ Delete #{alert.id}", callback_data=f"del_alert_{alert.id}")])
+
+    return "\n".join(lines), InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+async def alerts_command(message: types.Message):
+    """Handle /alerts - list the user's alerts"""
+    text, keyboard = build_alerts_list(message.from_user.id)
+
+    if text is None:
+        await message.answer("You don't have any price alerts yet.\n\n" + ALERT_USAGE, parse_mode="Markdown")
+        return
+
+    await message.answer(text, reply_markup=keyboard)
+
+
+async def delalert_command(message: types.Message, command: CommandObject):
+    """Handle /delalert <id>"""
+    args = (command.args or "").strip().lstrip("#")
+    if not args.isdigit():
+        await message.answer("Usage: /delalert <alert number>, see /alerts")
+        return
+
+    if await alert_engine.remove_alert(message.from_user.id, int(args)):
+        await message.answer(f"🗑 Alert #{args} deleted.")
+    else:
+        await message.answer(f"Alert #{args} not found.")
+
+
+async def delete_alert_callback(callback: types.CallbackQuery):
+    """Handle the delete button in the alert list"""
+    alert_id = int(callback.data.split("_")[2])
+
+    if await alert_engine.remove_alert(callback.from_user.id, alert_id):
+        await callback.answer(f"Alert #{alert_id} deleted")
+        text, keyboard = build_alerts_list(callback.from_user.id)
+        if text is None:
+            await callback.message.edit_text("You don't have any price alerts left.")
+        else:
+            await callback.message.edit_text(text, reply_markup=keyboard)
+    else:
+        await callback.answer("Alert not found")
+
+
+def register_alerts_handlers(dp):
+    """Register all price alert related handlers"""
+    router = Router()
+
+    router.message.register(alert_command, Command(commands=["alert"]))
+    router.message.register(alerts_command, Command(commands=["alerts"]))
+    router.message.register(delalert_command, Command(commands=["delalert"]))
+    router.callback_query.register(delete_alert_callback, F.data.startswith("del_alert_"))
+
+    dp.include_router(router)
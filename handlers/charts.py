@@ -0,0 +1,113 @@
+import logging
+
+from aiogram import types, Router, F
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
+from aiogram.types import BufferedInputFile, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto
+
+from services.chart_renderer import CHART_RANGES, DEFAULT_CHART_RANGE, chart_renderer
+from services.price_history import price_history
+
+
+def get_chart_keyboard(range_name: str, coin_name: str) -> InlineKeyboardMarkup:
+    """Range switcher under a chart, the current range marked"""
+    range_buttons = [
+        InlineKeyboardButton(
+            text=f"• {name} •" if name == range_name else name,
+            callback_data=f"chart_{name}"
+        )
+        for name in CHART_RANGES
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=[
+        range_buttons,
+        [InlineKeyboardButton(text=f"🔙 Back to {coin_name}", callback_data="back_to_coin")]
+    ])
+
+
+def format_chart_caption(coin_id: str, coin_name: str, range_name: str) -> str:
+    """Caption with the price change over the charted range"""
+    caption = f"📈 {coin_name} price, last {range_name}"
+    change = price_history.change(coin_id, CHART_RANGES[range_name][0])
+    if change is not None:
+        emoji = "🟢" if change >= 0 else "🔴"
+        caption += f"\n{emoji} {change:+.2f}%"
+    return caption
+
+
+async def show_chart(callback: types.CallbackQuery, state: FSMContext, range_name: str, edit: bool):
+    """Send a coin's chart, or swap the chart in place when changing range"""
+    state_data = await state.get_data()
+    coin_id = state_data.get('selected_coin_id')
+    coin_name = state_data.get('selected_coin_name', 'this coin')
+
+    if not coin_id:
+        await callback.answer("Please select a coin first.")
+        return
+
+    key, chart = await chart_renderer.get_chart(coin_id, coin_name, range_name)
+
+    if chart is None:
+        await callback.answer(
+            "Not enough price history for this coin yet. Please check back later.",
+            show_alert=True
+        )
+        return
+
+    # A cached file_id is resent as is; fresh PNGs are uploaded once
+    photo = chart if isinstance(chart, str) else BufferedInputFile(chart, filename=f"{coin_id}_{range_name}.png")
+    caption = format_chart_caption(coin_id, coin_name, range_name)
+    keyboard = get_chart_keyboard(range_name, coin_name)
+
+    if edit:
+        sent = await edit_chart_message(callback.message, photo, caption, keyboard)
+    else:
+        sent = await callback.message.answer_photo(photo, caption=caption, reply_markup=keyboard)
+
+    if isinstance(chart, bytes) and isinstance(sent, types.Message) and sent.photo:
+        chart_renderer.remember_file_id(key, sent.photo[-1].file_id)
+
+    await state.update_data(chart_range=range_name)
+    await callback.answer()
+
+
+async def edit_chart_message(message: types.Message, photo, caption: str, keyboard: InlineKeyboardMarkup):
+    """Swap the chart shown in a message, or send it anew if the message can no longer be edited"""
+    try:
+        return await message.edit_media(InputMediaPhoto(media=photo, caption=caption), reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        # A repeated click for the chart already shown changes nothing
+        if "message is not modified" in str(e):
+            return None
+        logging.warning(f"Could not edit chart message, sending a new one: {e}")
+        return await message.answer_photo(photo, caption=caption, reply_markup=keyboard)
+
+
+async def price_chart_callback_handler(callback: types.CallbackQuery, state: FSMContext):
+    """Handle the Price Chart button on the coin menu"""
+    await show_chart(callback, state, DEFAULT_CHART_RANGE, edit=False)
+
+
+async def chart_range_callback_handler(callback: types.CallbackQuery, state: FSMContext):
+    """Handle the range buttons under a chart"""
+    range_name = callback.data.split("_", 1)[1]
+
+    # Re-selecting the shown range would leave the message unchanged, which Telegram rejects
+    state_data = await state.get_data()
+    if range_name not in CHART_RANGES or range_name == state_data.get('chart_range'):
+        await callback.answer()
+        return
+
+    await show_chart(callback, state, range_name, edit=True)
+
+
+def register_charts_handlers(dp):
+    """Register all price chart related handlers"""
+    router = Router()
+
+    # Price Chart button on the coin menu
+    router.callback_query.register(price_chart_callback_handler, F.data == "price_chart")
+
+    # Switching the charted range
+    router.callback_query.register(chart_range_callback_handler, F.data.startswith("chart_"))
+
+    dp.include_router(router)
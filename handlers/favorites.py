@@ -1,17 +1,26 @@
+from typing import List
+
 from aiogram import types, Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from database.db import favorites_store
 from keyboards.main_menu import get_main_menu_keyboard
-from services.coinlore_api import CoinloreAPI
+from services.market_snapshot import market_snapshot
+from services.tickers import Ticker
+from utils.formaters import render_favorite_entry
+
+
+def sort_favorites(coins: List[Ticker]) -> List[Ticker]:
+    """Order favorite coins by market cap, largest first"""
+    return sorted(coins, key=lambda x: x.market_cap_usd, reverse=True)
 
 
 async def favorites_command(message: types.Message, state: FSMContext):
     """Handle the Favorites button press"""
     
-    # Get user data from state to retrieve favorites
-    user_data = await state.get_data()
-    favorites = user_data.get("favorites", [])
+    # Get the user's saved favorites
+    favorites = await favorites_store.get(message.from_user.id)
     
     if not favorites:
         await message.answer(
@@ -22,17 +31,12 @@ async def favorites_command(message: types.Message, state: FSMContext):
         )
         return
     
-    # Get current data for all favorite coins
-    favorite_coins = []
-    
-    for coin_id in favorites:
-        coin_data = await CoinloreAPI.get_ticker(coin_id)
-        if coin_data:
-            favorite_coins.append(coin_data)
+    # Get current data for all favorite coins from the market snapshot;
+    # coins missing from it are fetched in batched requests
+    favorite_coins = await market_snapshot.get_tickers_by_ids(favorites)
     
     if favorite_coins:
-        # Sort favorites by market cap
-        sorted_favorites = sorted(favorite_coins, key=lambda x: float(x.get('market_cap_usd', 0)), reverse=True)
+        sorted_favorites = sort_favorites(favorite_coins)
         
         # Create message with favorite coins
         message_text = "⭐ Your Favorite Cryptocurrencies\n\n"
@@ -40,26 +44,13 @@ async def favorites_command(message: types.Message, state: FSMContext):
         buttons = []
         
         for coin in sorted_favorites:
-            coin_id = coin.get('id')
-            name = coin.get('name', 'Unknown')
-            symbol = coin.get('symbol', '')
-            price = coin.get('price_usd', 'N/A')
-            
-            # Format price
-            price_formatted = f"${float(price):,.2f}" if price and price != 'N/A' else "N/A"
-            
-            # Calculate 24h change
-            change_24h = coin.get('percent_change_24h', 0)
-            change_emoji = "🟢" if float(change_24h) > 0 else "🔴" if float(change_24h) < 0 else "⚪"
-            
-            message_text += f"*{name} ({symbol})*\n"
-            message_text += f"Price: {price_formatted}\n"
-            message_text += f"24h Change: {change_emoji} {change_24h}%\n\n"
+            snapshot = market_snapshot.snapshot_of(coin)
+            message_text += render_favorite_entry(coin, snapshot.version if snapshot else None)
             
             # Add button for this coin
             buttons.append([InlineKeyboardButton(
-                text=f"{name} ({symbol})",
-                callback_data=f"coin_{coin_id}"
+                text=f"{coin.name} ({coin.symbol})",
+                callback_data=f"coin_{coin.id}"
             )])
         
         # Add button to remove all favorites
@@ -94,18 +85,11 @@ async def add_favorite_callback(callback: types.CallbackQuery, state: FSMContext
     # The callback data format is expected to be "add_fav_COIN_ID"
     coin_id = callback.data.split("_")[2]
     
-    # Get current favorites
-    user_data = await state.get_data()
-    favorites = user_data.get("favorites", [])
-    
-    if coin_id in favorites:
+    # Add to favorites unless it is already there
+    if not await favorites_store.add(callback.from_user.id, coin_id):
         await callback.answer("This coin is already in your favorites!")
         return
     
-    # Add to favorites
-    favorites.append(coin_id)
-    await state.update_data(favorites=favorites)
-    
     await callback.answer("Added to favorites!")
 
 
@@ -114,13 +98,7 @@ async def remove_favorite_callback(callback: types.CallbackQuery, state: FSMCont
     # The callback data format is expected to be "rm_fav_COIN_ID"
     coin_id = callback.data.split("_")[2]
     
-    # Get current favorites
-    user_data = await state.get_data()
-    favorites = user_data.get("favorites", [])
-    
-    if coin_id in favorites:
-        favorites.remove(coin_id)
-        await state.update_data(favorites=favorites)
+    if await favorites_store.remove(callback.from_user.id, coin_id):
         await callback.answer("Removed from favorites!")
     else:
         await callback.answer("This coin is not in your favorites!")
@@ -128,7 +106,7 @@ async def remove_favorite_callback(callback: types.CallbackQuery, state: FSMCont
 
 async def clear_favorites_callback(callback: types.CallbackQuery, state: FSMContext):
     """Handle clearing all favorites"""
-    await state.update_data(favorites=[])
+    await favorites_store.clear(callback.from_user.id)
     await callback.answer("All favorites cleared!")
     
     # Update the message to show empty favorites
@@ -4,6 +4,7 @@ from aiogram.fsm.context import FSMContext
 
 from services.coinlore_api import CoinloreAPI
 from keyboards.main_menu import get_main_menu_keyboard
+from utils.formaters import format_large_number
 
 
 async def global_stats_handler(message: types.Message, state: FSMContext):
@@ -30,10 +31,10 @@ async def global_stats_handler(message: types.Message, state: FSMContext):
     # Format the statistics message
     stats_text = (
         "🌐 *Global Cryptocurrency Statistics*\n\n"
-        f"💰 *Total Market Cap:* ${format_number(stats.get('total_mcap', 0))} USD\n"
-        f"💵 *Total Volume (24h):* ${format_number(stats.get('total_volume', 0))} USD\n\n"
-        f"📊 *Active Markets:* {format_number(stats.get('active_markets', 0))}\n"
-        f"🪙 *Active Cryptocurrencies:* {format_number(stats.get('active_cryptocurrencies', 0))}\n\n"
+        f"💰 *Total Market Cap:* ${format_large_number(stats.get('total_mcap', 0))} USD\n"
+        f"💵 *Total Volume (24h):* ${format_large_number(stats.get('total_volume', 0))} USD\n\n"
+        f"📊 *Active Markets:* {format_large_number(stats.get('active_markets', 0))}\n"
+        f"🪙 *Active Cryptocurrencies:* {format_large_number(stats.get('active_cryptocurrencies', 0))}\n\n"
         f"🔷 *BTC Dominance:* {stats.get('btc_d', 0)}%\n"
         f"🔹 *ETH Dominance:* {stats.get('eth_d', 0)}%\n\n"
         f"📈 *Market Cap Change (24h):* {stats.get('mcap_change', 0)}%\n"
@@ -47,26 +48,6 @@ async def global_stats_handler(message: types.Message, state: FSMContext):
     )
 
 
-def format_number(num):
-    """Format large numbers for better readability"""
-    if isinstance(num, str):
-        try:
-            num = float(num)
-        except ValueError:
-            return num
-    
-    if isinstance(num, (int, float)):
-        if num >= 1_000_000_000:
-            return f"{num / 1_000_000_000:.2f}B"
-        elif num >= 1_000_000:
-            return f"{num / 1_000_000:.2f}M"
-        elif num >= 1_000:
-            return f"{num / 1_000:.2f}K"
-        else:
-            return f"{num:.2f}"
-    return str(num)
-
-
 def register_global_stats_handlers(dp):
     """
     Register handlers for global statistics
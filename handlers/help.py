@@ -46,7 +46,9 @@ async def help_command(message: types.Message, state: FSMContext):
         "/start - Restart the bot\n"
         "/help - Show this help message\n"
         "/global - Show global statistics\n"
-        "/top - Show top cryptocurrencies\n\n"
+        "/top - Show top cryptocurrencies\n"
+        "/alert - Create a price alert, e.g. /alert BTC > 70000\n"
+        "/alerts - List and delete your price alerts\n\n"
         "*Data Source:*\n"
         "All cryptocurrency data is provided by CoinLore API"
         
@@ -0,0 +1,158 @@
+from aiogram import types, Router, F
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.fsm.context import FSMContext
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from keyboards.coin_buttons import get_coin_markets_keyboard
+from services.coinlore_api import CoinloreAPI
+from utils.cache import TTLCache
+from utils.formaters import format_large_number, format_price
+
+
+MARKETS_PER_PAGE = 8
+
+# Markets of a coin, sorted by volume and split into pages once per fetch,
+# so paging through them never calls the API again
+market_pages_cache = TTLCache(max_size=256, default_ttl=120, stale_ttl=300, name="markets")
+
+
+def _market_volume(market: Dict) -> float:
+    try:
+        return float(market.get('volume_usd') or 0)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+async def _load_market_pages(coin_id: str, background: bool = False) -> Optional[Tuple[List[Dict], ...]]:
+    """Fetch a coin's markets and split them into pages sorted by volume"""
+    markets = await CoinloreAPI.get_coin_markets(coin_id, background=background)
+    if not markets or not isinstance(markets, list):
+        return None
+    
+    valid_markets = [market for market in markets if isinstance(market, dict)]
+    sorted_markets = sorted(valid_markets, key=_market_volume, reverse=True)
+    return tuple(
+        sorted_markets[i:i + MARKETS_PER_PAGE]
+        for i in range(0, len(sorted_markets), MARKETS_PER_PAGE)
+    )
+
+
+async def get_market_pages(coin_id: str) -> Optional[Tuple[List[Dict], ...]]:
+    """Return a coin's market pages from the cache, fetching them if needed
+    
+    Stale pages are refreshed straight from upstream: going through the API
+    response cache, which has the same TTLs, could return its own stale copy
+    and mark it fresh here again.
+    """
+    return await market_pages_cache.get_or_fetch(
+        coin_id,
+        lambda: _load_market_pages(coin_id),
+        refresher=lambda: _load_market_pages(coin_id, background=True),
+    )
+
+
+def format_markets_page(coin_name: str, page_markets: List[Dict], page: int, total_pages: int) -> str:
+    """Build the message text for one page of markets"""
+    message_text = f"📊 *Markets for {coin_name}* (Page {page + 1}/{total_pages})\n\n"
+    
+    for market in page_markets:
+        exchange_name = market.get('name', 'Unknown')
+        pair = market.get('pair') or f"{market.get('base', '?')}/{market.get('quote', '?')}"
+        
+        try:
+            price_formatted = format_price(float(market.get('price_usd', 0)))
+        except (ValueError, TypeError):
+            price_formatted = "N/A"
+        
+        volume = _market_volume(market)
+        volume_formatted = f"${format_large_number(volume)}" if volume else "N/A"
+        
+        message_text += f"*{exchange_name}* {pair}\n"
+        message_text += f"Price: {price_formatted} | Volume (24h): {volume_formatted}\n\n"
+    
+    return message_text
+
+
+async def show_markets_page(callback: types.CallbackQuery, state: FSMContext, page: int, edit: bool):
+    """Show one page of markets for the coin selected in state"""
+    state_data = await state.get_data()
+    coin_id = state_data.get('selected_coin_id')
+    coin_name = state_data.get('selected_coin_name', 'this coin')
+    
+    if not coin_id:
+        await callback.answer("Please select a coin first.")
+        return
+    
+    pages = await get_market_pages(coin_id)
+    
+    if not pages:
+        await callback.answer("Could not retrieve market data. Please try again.")
+        return
+    
+    # Keep the page inside the available range
+    page = max(0, min(page, len(pages) - 1))
+    
+    message_text = format_markets_page(coin_name, pages[page], page, len(pages))
+    keyboard = get_coin_markets_keyboard(pages[page], coin_name)
+    
+    if edit:
+        await edit_markets_message(callback.message, message_text, keyboard)
+    else:
+        await callback.message.answer(message_text, reply_markup=keyboard, parse_mode="Markdown")
+    
+    # Only remember the page once it is shown
+    await state.update_data(markets_page=page)
+    await callback.answer()
+
+
+async def edit_markets_message(message: types.Message, text: str, keyboard):
+    """Replace a markets message with another page, or send the page anew if the message can no longer be edited"""
+    try:
+        await message.edit_text(text, reply_markup=keyboard, parse_mode="Markdown")
+    except TelegramBadRequest as e:
+        # Already on the first/last page: the page shown does not change
+        if "message is not modified" in str(e):
+            return
+        logging.warning(f"Could not edit markets message, sending a new one: {e}")
+        await message.answer(text, reply_markup=keyboard, parse_mode="Markdown")
+
+
+async def markets_callback_handler(callback: types.CallbackQuery, state: FSMContext):
+    """Handle the Markets button on the coin menu"""
+    await show_markets_page(callback, state, page=0, edit=False)
+
+
+async def markets_pagination_handler(callback: types.CallbackQuery, state: FSMContext):
+    """Handle previous/next page buttons of the markets view"""
+    state_data = await state.get_data()
+    page = state_data.get('markets_page', 0)
+    
+    if callback.data == "prev_markets":
+        page -= 1
+    else:
+        page += 1
+    
+    await show_markets_page(callback, state, page=page, edit=True)
+
+
+async def back_to_coin_callback(callback: types.CallbackQuery):
+    """Close the markets view, returning to the coin message above it"""
+    await callback.answer()
+    await callback.message.delete()
+
+
+def register_markets_handlers(dp):
+    """Register all markets related handlers"""
+    router = Router()
+    
+    # Markets button on the coin menu
+    router.callback_query.register(markets_callback_handler, F.data == "markets")
+    
+    # Paging through markets
+    router.callback_query.register(markets_pagination_handler, F.data.in_(["prev_markets", "next_markets"]))
+    
+    # Back to the coin
+    router.callback_query.register(back_to_coin_callback, F.data == "back_to_coin")
+    
+    dp.include_router(router)
@@ -5,12 +5,24 @@ from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMar
 
 from keyboards.main_menu import get_main_menu_keyboard
 from services.coinlore_api import CoinloreAPI
+from services.market_snapshot import MarketSnapshot, market_snapshot
+from utils.formaters import render_search_result
+from utils.search_index import SearchIndex
 
 
 class SearchStates(StatesGroup):
     waiting_for_query = State()
 
 
+# Index over the whole coin universe, kept in sync with the market snapshot
+coin_index = SearchIndex()
+
+
+def index_snapshot(snapshot: MarketSnapshot):
+    """Snapshot listener re-indexing the coins of each new market snapshot"""
+    coin_index.update(snapshot.coins)
+
+
 async def search_command(message: types.Message, state: FSMContext):
     """Handle the Search Coin button press"""
     await state.set_state(SearchStates.waiting_for_query)
@@ -39,36 +51,18 @@ async def process_search_query(message: types.Message, state: FSMContext):
     """Process the search query entered by the user"""
     query = message.text.strip().lower()
     
-    # Search for the coin in the CoinLore API
-    search_results = []
-    
-    # Get the first 100 coins
-    coins_data = await CoinloreAPI.get_tickers(0, 100)
-    
-    # The API returns data in a nested structure where 'data' contains the coin list
-    if coins_data and isinstance(coins_data, dict) and 'data' in coins_data:
-        coins = coins_data['data']
-    elif coins_data and isinstance(coins_data, list):
-        coins = coins_data
-    else:
-        coins = []
-    
-    if coins:
-        # Filter coins by name or symbol
-        for coin in coins:
-            # Check if coin is a dictionary before using get()
-            if not isinstance(coin, dict):
-                continue
-                
-            name = coin.get('name', '').lower()
-            symbol = coin.get('symbol', '').lower()
-            nameid = coin.get('nameid', '').lower()
-            
-            if (query in name or query in symbol or query in nameid):
-                search_results.append(coin)
+    if not len(coin_index):
+        # No market snapshot yet: index the first 100 coins from the API
+        coins_data = await CoinloreAPI.get_tickers(0, 100)
         
-        # Limit to top 5 results
-        search_results = search_results[:5]
+        # The API returns data in a nested structure where 'data' contains the coin list
+        if coins_data and isinstance(coins_data, dict) and 'data' in coins_data:
+            coin_index.update(coins_data['data'])
+        elif coins_data and isinstance(coins_data, list):
+            coin_index.update(coins_data)
+    
+    # Match by symbol, name prefix or close spelling, limited to top 5 results
+    search_results = coin_index.search(query, limit=5)
     
     if search_results:
         result_text = "🔍 Search Results:\n\n"
@@ -76,19 +70,13 @@ async def process_search_query(message: types.Message, state: FSMContext):
         # Create inline buttons for each result
         buttons = []
         for coin in search_results:
-            coin_id = coin.get('id')
-            coin_name = coin.get('name')
-            coin_symbol = coin.get('symbol')
-            coin_price = coin.get('price_usd', 'N/A')
-            
-            result_text += f"*{coin_name} ({coin_symbol})*\n"
-            result_text += f"Price: ${coin_price}\n"
-            result_text += f"Rank: {coin.get('rank', 'N/A')}\n\n"
+            snapshot = market_snapshot.snapshot_of(coin)
+            result_text += render_search_result(coin, snapshot.version if snapshot else None)
             
             # Add button for this coin
             buttons.append([InlineKeyboardButton(
-                text=f"{coin_name} ({coin_symbol})",
-                callback_data=f"coin_{coin_id}"
+                text=f"{coin.name} ({coin.symbol})",
+                callback_data=f"coin_{coin.id}"
             )])
         
         # Add a keyboard with buttons for each result
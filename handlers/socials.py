@@ -0,0 +1,123 @@
+from aiogram import types, Router, F
+from aiogram.fsm.context import FSMContext
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from services.coinlore_api import CoinloreAPI
+from services.market_snapshot import MarketSnapshot
+from utils.cache import TTLCache
+
+
+# Social data changes slowly, so it is kept much longer than prices
+SOCIAL_STATS_TTL = 3600  # seconds
+SOCIAL_STATS_STALE_TTL = 6 * 3600  # seconds
+
+# Social stats of the top coins are fetched in the background after each
+# snapshot refresh, so the slow endpoint is rarely hit while a user waits
+SOCIAL_PREFETCH_TOP_N = 20
+SOCIAL_PREFETCH_CONCURRENCY = 3
+
+social_stats_cache = TTLCache(
+    max_size=1024, default_ttl=SOCIAL_STATS_TTL, stale_ttl=SOCIAL_STATS_STALE_TTL, name="social_stats"
+)
+
+_prefetch_task: Optional[asyncio.Task] = None
+
+
+async def get_social_stats(coin_id: str) -> Optional[Dict]:
+    """Return a coin's social stats from the cache, fetching them on first use"""
+    return await social_stats_cache.get_or_fetch(
+        coin_id,
+        lambda: CoinloreAPI.get_coin_social_stats(coin_id),
+        refresher=lambda: CoinloreAPI.get_coin_social_stats(coin_id, background=True),
+    )
+
+
+async def prefetch_social_stats(coin_ids):
+    """Fetch social stats for coins that are not cached yet, a few at a time"""
+    semaphore = asyncio.Semaphore(SOCIAL_PREFETCH_CONCURRENCY)
+    
+    async def prefetch(coin_id: str):
+        async with semaphore:
+            stats = await CoinloreAPI.get_coin_social_stats(coin_id, background=True)
+            if stats:
+                social_stats_cache.set(coin_id, stats)
+    
+    missing = [coin_id for coin_id in coin_ids if coin_id not in social_stats_cache]
+    if missing:
+        await asyncio.gather(*(prefetch(coin_id) for coin_id in missing))
+        logging.info(f"Prefetched social stats for {len(missing)} coins")
+
+
+def schedule_social_prefetch(snapshot: MarketSnapshot):
+    """Snapshot listener starting a prefetch for the current top-N coins"""
+    global _prefetch_task
+    
+    # Skip if the previous prefetch is still running
+    if _prefetch_task is not None and not _prefetch_task.done():
+        return
+    
+    top_ids = [coin.id for coin in snapshot.coins[:SOCIAL_PREFETCH_TOP_N]]
+    _prefetch_task = asyncio.create_task(prefetch_social_stats(top_ids))
+
+
+def format_social_stats(coin_name: str, stats: Dict) -> str:
+    """Build the social stats message text"""
+    reddit = stats.get('reddit') or {}
+    twitter = stats.get('twitter') or {}
+    
+    def number(value):
+        try:
+            return f"{int(float(value)):,}"
+        except (ValueError, TypeError):
+            return "N/A"
+    
+    return (
+        f"📱 *Social Stats for {coin_name}*\n\n"
+        "*Reddit*\n"
+        f"👥 Subscribers: {number(reddit.get('subscribers'))}\n"
+        f"🟢 Active Users (avg): {number(reddit.get('avg_active_users'))}\n\n"
+        "*Twitter*\n"
+        f"🐦 Followers: {number(twitter.get('followers_count'))}\n"
+        f"💬 Tweets: {number(twitter.get('status_count'))}"
+    )
+
+
+async def social_stats_callback_handler(callback: types.CallbackQuery, state: FSMContext):
+    """Handle the Social Stats button on the coin menu"""
+    state_data = await state.get_data()
+    coin_id = state_data.get('selected_coin_id')
+    coin_name = state_data.get('selected_coin_name', 'this coin')
+    
+    if not coin_id:
+        await callback.answer("Please select a coin first.")
+        return
+    
+    stats = await get_social_stats(coin_id)
+    
+    if not stats or not isinstance(stats, dict):
+        await callback.answer("Social stats are not available for this coin.")
+        return
+    
+    back_keyboard = InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text=f"🔙 Back to {coin_name}", callback_data="back_to_coin")
+    ]])
+    
+    await callback.message.answer(
+        format_social_stats(coin_name, stats),
+        reply_markup=back_keyboard,
+        parse_mode="Markdown"
+    )
+    await callback.answer()
+
+
+def register_socials_handlers(dp):
+    """Register all social stats related handlers"""
+    router = Router()
+    
+    # Social Stats button on the coin menu
+    router.callback_query.register(social_stats_callback_handler, F.data == "social_stats")
+    
+    dp.include_router(router)
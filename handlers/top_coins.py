@@ -1,10 +1,31 @@
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
 from aiogram import types, Router, F
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from services.coinlore_api import CoinloreAPI
+from services.market_snapshot import market_snapshot
+from services.tickers import Ticker
 from keyboards.coin_buttons import get_top_coins_keyboard
 from keyboards.main_menu import get_main_menu_keyboard, get_coin_menu_inline_keyboard
+from utils.cache import TTLCache
+from utils.formaters import render_coin_card
+
+
+COINS_PER_PAGE = 10
+
+# Pages fetched from the API while no market snapshot is available. The
+# neighbours of every page shown are prefetched in the background, so
+# paging on costs no upstream call while the user waits.
+api_pages_cache = TTLCache(max_size=64, default_ttl=60, stale_ttl=120, name="top_pages")
+
+_prefetch_tasks: Set[asyncio.Task] = set()
+
+TopCoinsPage = Tuple[int, List[Ticker], int, Optional[int]]  # (page, coins, total pages, snapshot version)
 
 
 # Define states for pagination
@@ -22,44 +43,93 @@ async def top_cryptos_handler(message: types.Message, state: FSMContext):
     # Show typing status while fetching data
     await message.chat.do("typing")
     
-    # Reset state data and set the page to 0
-    await state.update_data(page=0)
     await state.set_state(TopCoinsStates.viewing_list)
     
-    await show_top_coins_page(message, state)
-
-
-async def show_top_coins_page(message: types.Message, state: FSMContext):
-    """
-    Display the current page of top cryptocurrencies.
-    """
-    # Get current page from state
-    state_data = await state.get_data()
-    page = state_data.get('page', 0)
-    
-    # Calculate start index for API pagination (10 coins per page)
-    start = page * 10
-    
-    # Fetch data from the API
-    coins_data = await CoinloreAPI.get_tickers(start=start, limit=10)
-    
-    if not coins_data or 'data' not in coins_data or not coins_data['data']:
+    top_page = await load_top_coins_page(0)
+    if top_page is None:
         await message.answer(
             "❌ Sorry, couldn't fetch cryptocurrency data. Please try again later.",
             reply_markup=get_main_menu_keyboard()
         )
         return
     
-    coins = coins_data['data']
+    text, keyboard = render_top_coins_page(top_page)
+    await message.answer(text, parse_mode="Markdown", reply_markup=keyboard)
+    prefetch_adjacent_pages(top_page)
+
+
+async def _fetch_api_page(page: int, background: bool = False) -> Optional[Tuple[List[Ticker], int]]:
+    """Fetch one page of coins and the total page count from the API"""
+    coins_data = await CoinloreAPI.get_tickers(
+        start=page * COINS_PER_PAGE, limit=COINS_PER_PAGE, background=background
+    )
+    if not isinstance(coins_data, dict) or not coins_data.get('data'):
+        return None
     
-    # Create a message with the list of coins
-    header_text = f"💹 *Top Cryptocurrencies* (Page {page + 1})\n\n"
+    total_coins = int((coins_data.get('info') or {}).get('coins_num') or 0)
+    return coins_data['data'], max(-(-total_coins // COINS_PER_PAGE), page + 1)
+
+
+async def _prefetch_api_page(page: int):
+    if page in api_pages_cache:
+        return
+    result = await _fetch_api_page(page, background=True)
+    if result is not None:
+        api_pages_cache.set(page, result)
+
+
+async def load_top_coins_page(page: int) -> Optional[TopCoinsPage]:
+    """
+    Return a page of the ranked coin list.
     
-    await message.answer(
-        header_text, 
-        parse_mode="Markdown",
-        reply_markup=get_top_coins_keyboard(coins)
+    Pages come from the market snapshot, which holds the whole ranked list
+    locally; pages past its end are clamped to the last one. Only while no
+    snapshot is available are pages fetched from the API.
+    """
+    snapshot = market_snapshot.snapshot
+    if snapshot is not None and len(snapshot):
+        total_pages = -(-len(snapshot) // COINS_PER_PAGE)
+        page = min(max(page, 0), total_pages - 1)
+        return page, snapshot.page(page * COINS_PER_PAGE, COINS_PER_PAGE), total_pages, snapshot.version
+    
+    result = await api_pages_cache.get_or_fetch(
+        page,
+        lambda: _fetch_api_page(page),
+        refresher=lambda: _fetch_api_page(page, background=True),
     )
+    if result is None:
+        return None
+    coins, total_pages = result
+    return page, coins, total_pages, None
+
+
+def render_top_coins_page(top_page: TopCoinsPage):
+    """Build the message text and keyboard of a page"""
+    page, coins, total_pages, version = top_page
+    text = f"💹 *Top Cryptocurrencies* (Page {page + 1}/{total_pages})\n\n"
+    return text, get_top_coins_keyboard(coins, page, total_pages, version)
+
+
+def prefetch_adjacent_pages(top_page: TopCoinsPage):
+    """
+    Prepare the pages before and after the one shown, ahead of the click.
+    
+    Snapshot pages only need their keyboards built; API pages are fetched
+    in the background.
+    """
+    page, _, total_pages, version = top_page
+    snapshot = market_snapshot.snapshot
+    
+    for neighbour in (page + 1, page - 1):
+        if not 0 <= neighbour < total_pages:
+            continue
+        if version is not None and snapshot is not None and snapshot.version == version:
+            coins = snapshot.page(neighbour * COINS_PER_PAGE, COINS_PER_PAGE)
+            get_top_coins_keyboard(coins, neighbour, total_pages, version)
+        elif version is None:
+            task = asyncio.create_task(_prefetch_api_page(neighbour))
+            _prefetch_tasks.add(task)
+            task.add_done_callback(_prefetch_tasks.discard)
 
 
 async def coin_callback_handler(callback_query: types.CallbackQuery, state: FSMContext):
@@ -81,7 +151,7 @@ async def coin_callback_handler(callback_query: types.CallbackQuery, state: FSMC
     await callback_query.message.chat.do("typing")
     
     # Fetch coin data
-    coin_data = await CoinloreAPI.get_ticker(coin_id)
+    coin_data = await market_snapshot.get_ticker(coin_id)
     
     if not coin_data:
         await callback_query.message.answer(
@@ -89,32 +159,12 @@ async def coin_callback_handler(callback_query: types.CallbackQuery, state: FSMC
         )
         return
     
-    # Format coin information
-    coin_name = coin_data.get('name', 'Unknown')
-    coin_symbol = coin_data.get('symbol', '?')
-    price_usd = float(coin_data.get('price_usd', 0))
-    price_btc = float(coin_data.get('price_btc', 0))
-    market_cap = float(coin_data.get('market_cap_usd', 0))
-    volume_24h = float(coin_data.get('volume24', 0))
-    percent_change_1h = coin_data.get('percent_change_1h', '0')
-    percent_change_24h = coin_data.get('percent_change_24h', '0')
-    percent_change_7d = coin_data.get('percent_change_7d', '0')
-    
-    # Add emoji based on price change
-    emoji_24h = "🔴" if float(percent_change_24h) < 0 else "🟢"
-    
-    coin_text = (
-        f"{emoji_24h} *{coin_name} ({coin_symbol})*\n\n"
-        f"💵 *Price:* ${price_usd:.4f} USD / {price_btc:.8f} BTC\n"
-        f"💰 *Market Cap:* ${format_large_number(market_cap)} USD\n"
-        f"📊 *Volume (24h):* ${format_large_number(volume_24h)} USD\n\n"
-        f"⏱ *Change (1h):* {percent_change_1h}%\n"
-        f"📅 *Change (24h):* {percent_change_24h}%\n"
-        f"📆 *Change (7d):* {percent_change_7d}%\n"
-    )
+    # Format coin information, rendered once per snapshot for all users
+    snapshot = market_snapshot.snapshot_of(coin_data)
+    coin_text = render_coin_card(coin_data, snapshot.version if snapshot else None)
     
     # Save coin name for later use in other handlers
-    await state.update_data(selected_coin_name=coin_name)
+    await state.update_data(selected_coin_name=coin_data.name)
     
     await callback_query.message.answer(
         coin_text,
@@ -126,35 +176,47 @@ async def coin_callback_handler(callback_query: types.CallbackQuery, state: FSMC
 async def pagination_callback_handler(callback_query: types.CallbackQuery, state: FSMContext):
     """
     Handler for pagination navigation.
+    Swaps the page shown in the list message in place.
     """
-    action = callback_query.data
-    state_data = await state.get_data()
-    current_page = state_data.get('page', 0)
+    # The target page travels in the callback data (format: top_page_N)
+    page = int(callback_query.data.rsplit('_', 1)[1])
+    
+    top_page = await load_top_coins_page(page)
+    if top_page is None:
+        await callback_query.answer("❌ Couldn't fetch cryptocurrency data. Please try again later.")
+        return
     
-    if action == "prev_coins" and current_page > 0:
-        await state.update_data(page=current_page - 1)
-    elif action == "next_coins":
-        await state.update_data(page=current_page + 1)
+    await state.set_state(TopCoinsStates.viewing_list)
     
-    # Acknowledge the callback
+    text, keyboard = render_top_coins_page(top_page)
+    
+    # Acknowledge the callback first so the client drops its loading spinner
     await callback_query.answer()
+    await edit_page_message(callback_query.message, text, keyboard)
     
-    # Update the message with new page
-    await show_top_coins_page(callback_query.message, state)
+    prefetch_adjacent_pages(top_page)
 
 
-def format_large_number(num: float) -> str:
+async def edit_page_message(message: types.Message, text: str, keyboard):
     """
-    Format large numbers with K, M, B suffixes.
+    Replace a list message with another page, or send the page anew if the
+    message can no longer be edited.
     """
-    if num >= 1_000_000_000:
-        return f"{num / 1_000_000_000:.2f}B"
-    elif num >= 1_000_000:
-        return f"{num / 1_000_000:.2f}M"
-    elif num >= 1_000:
-        return f"{num / 1_000:.2f}K"
-    else:
-        return f"{num:.2f}"
+    try:
+        await message.edit_text(text, parse_mode="Markdown", reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        # Clicking a stale button for the page already shown changes nothing
+        if "message is not modified" in str(e):
+            return
+        logging.warning(f"Could not edit top coins page, sending a new message: {e}")
+        await message.answer(text, parse_mode="Markdown", reply_markup=keyboard)
+
+
+async def page_info_callback_handler(callback_query: types.CallbackQuery):
+    """
+    Handler for the page indicator button, which does nothing.
+    """
+    await callback_query.answer()
 
 
 def register_top_coins_handlers(dp):
@@ -173,10 +235,12 @@ def register_top_coins_handlers(dp):
         TopCoinsStates.viewing_list
     )
     
+    # Page turns work from any state, the page is in the callback data
     router.callback_query.register(
         pagination_callback_handler,
-        F.data.in_(["prev_coins", "next_coins"]),
-        TopCoinsStates.viewing_list
+        F.data.regexp(r"^top_page_\d+$")
     )
     
+    router.callback_query.register(page_info_callback_handler, F.data == "page_info")
+    
     dp.include_router(router)
\ No newline at end of file
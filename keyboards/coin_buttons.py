@@ -1,41 +1,53 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
+from keyboards.main_menu import get_pagination_keyboard
+from services.tickers import Ticker
+from utils.formaters import RenderCache, format_large_number
 
-def get_top_coins_keyboard(coins: List[Dict[Any, Any]]) -> InlineKeyboardMarkup:
+
+# Top coins page keyboards of the current market snapshot, shared by every
+# user viewing the same page until the next refresh
+top_coins_keyboards = RenderCache()
+
+
+def get_top_coins_keyboard(coins: List[Ticker], page: int, total_pages: int,
+                           version: Optional[int] = None) -> InlineKeyboardMarkup:
     """
     Creates an inline keyboard with buttons for top cryptocurrencies.
     
     Args:
-        coins: List of coin data dictionaries from API
+        coins: List of coin tickers on the page
+        page: Page the coins make up (starting from 0)
+        total_pages: Total number of pages
+        version: Snapshot version the coins come from; such keyboards are
+            built once per page and snapshot and then shared
         
     Returns:
-        InlineKeyboardMarkup: Keyboard with coin buttons
+        InlineKeyboardMarkup: Keyboard with coin buttons and page navigation
     """
+    return top_coins_keyboards.get(
+        (page, total_pages), version, lambda: _build_top_coins_keyboard(coins, page, total_pages)
+    )
+
+
+def _build_top_coins_keyboard(coins: List[Ticker], page: int, total_pages: int) -> InlineKeyboardMarkup:
     buttons = []
     
     for coin in coins[:10]:  # Limit to top 10 coins
-        coin_name = coin.get('name', 'Unknown')
-        coin_symbol = coin.get('symbol', '?')
-        coin_id = coin.get('id', '')
-        price_usd = coin.get('price_usd', '0.00')
-        price_change = coin.get('percent_change_24h', '0.00')
+        price_change = coin.percent_change_24h
         
         # Add emoji based on price change
-        emoji = "🔴" if float(price_change) < 0 else "🟢"
+        emoji = "🔴" if price_change < 0 else "🟢"
         
-        button_text = f"{emoji} {coin_name} ({coin_symbol}): ${float(price_usd):.2f} ({price_change}%)"
+        button_text = f"{emoji} {coin.name} ({coin.symbol}): ${coin.price_usd:.2f} ({price_change:.2f}%)"
         buttons.append([InlineKeyboardButton(
             text=button_text, 
-            callback_data=f"coin_{coin_id}"
+            callback_data=f"coin_{coin.id}"
         )])
     
-    # Add navigation buttons
-    navigation_row = [
-        InlineKeyboardButton(text="⬅️ Previous", callback_data="prev_coins"),
-        InlineKeyboardButton(text="Next ➡️", callback_data="next_coins")
-    ]
-    buttons.append(navigation_row)
+    # Add navigation buttons (top_page_N) with the page count
+    buttons.extend(get_pagination_keyboard(page, total_pages, "top").inline_keyboard)
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
@@ -91,7 +103,8 @@ def get_coin_markets_keyboard(markets: List[Dict[Any, Any]], coin_name: str) ->
     
     for market in markets[:8]:  # Limit to 8 markets
         exchange_name = market.get('name', 'Unknown')
-        pair = market.get('pair', '?')
+        # The markets endpoint reports the pair as separate base and quote symbols
+        pair = market.get('pair') or f"{market.get('base', '?')}/{market.get('quote', '?')}"
         price_usd = market.get('price_usd', '0.00')
         
         button_text = f"💱 {exchange_name}: {pair} ${float(price_usd):.2f}"
@@ -109,24 +122,4 @@ def get_coin_markets_keyboard(markets: List[Dict[Any, Any]], coin_name: str) ->
     
     buttons.append([InlineKeyboardButton(text=f"🔙 Back to {coin_name}", callback_data="back_to_coin")])
     
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
-
-def format_large_number(num: float) -> str:
-    """
-    Format large numbers with K, M, B suffixes.
-    
-    Args:
-        num: Number to format
-        
-    Returns:
-        String representation with appropriate suffix
-    """
-    if num >= 1_000_000_000:
-        return f"{num / 1_000_000_000:.2f}B"
-    elif num >= 1_000_000:
-        return f"{num / 1_000_000:.2f}M"
-    elif num >= 1_000:
-        return f"{num / 1_000:.2f}K"
-    else:
-        return f"{num:.2f}"
\ No newline at end of file
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
\ No newline at end of file
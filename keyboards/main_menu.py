@@ -1,11 +1,17 @@
+from functools import lru_cache
+
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+# Keyboards below are built once and the same instance is attached to every
+# reply; callers must never modify a returned keyboard.
+
+@lru_cache(maxsize=None)
 def get_main_menu_keyboard() -> ReplyKeyboardMarkup:
     """
     Creates the main menu keyboard with primary cryptocurrency actions.
     
     Returns:
-        ReplyKeyboardMarkup: Main menu keyboard for Telegram bot
+        ReplyKeyboardMarkup: Main menu keyboard for Telegram bot, shared by all callers
     """
     keyboard = [
         [
@@ -24,6 +30,7 @@ def get_main_menu_keyboard() -> ReplyKeyboardMarkup:
     
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
+@lru_cache(maxsize=None)
 def get_coin_menu_inline_keyboard() -> InlineKeyboardMarkup:
 
     keyboard = [
@@ -43,6 +50,7 @@ def get_coin_menu_inline_keyboard() -> InlineKeyboardMarkup:
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=256)
 def get_pagination_keyboard(current_page: int, total_pages: int, action_prefix: str) -> InlineKeyboardMarkup:
     """
     Creates pagination keyboard for navigating through lists.
@@ -53,7 +61,7 @@ def get_pagination_keyboard(current_page: int, total_pages: int, action_prefix:
         action_prefix: Prefix for callback data
         
     Returns:
-        InlineKeyboardMarkup: Pagination keyboard
+        InlineKeyboardMarkup: Pagination keyboard, shared by all callers
     """
     buttons = []
     
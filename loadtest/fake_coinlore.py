@@ -0,0 +1,283 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import string
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+
+# Real coins first so searches for familiar names and symbols hit
+KNOWN_COINS = [
+    ("90", "BTC", "Bitcoin", 65000.0),
+    ("80", "ETH", "Ethereum", 3200.0),
+    ("518", "USDT", "Tether", 1.0),
+    ("2710", "BNB", "Binance Coin", 580.0),
+    ("48543", "SOL", "Solana", 150.0),
+    ("58", "XRP", "XRP", 0.52),
+    ("33285", "USDC", "USD Coin", 1.0),
+    ("2", "DOGE", "Dogecoin", 0.12),
+    ("257", "ADA", "Cardano", 0.45),
+    ("2713", "TRX", "TRON", 0.12),
+]
+_SYLLABLES = ["ba", "co", "da", "fi", "ge", "ka", "lo", "mi", "no", "pa", "qu", "ro", "sa", "ti", "vo", "xe", "ze"]
+_SUFFIXES = ["coin", "chain", "swap", "token", " Network", " Protocol", " Finance", ""]
+
+
+class FakeCoinlore:
+    """Local stand-in for the CoinLore endpoints CoinloreAPI calls.
+
+    The coin universe is generated once from a seed, so runs with the same
+    settings see the same coins. Prices drift slowly with time, so every
+    snapshot refresh brings new numbers like the real API does.
+    """
+
+    def __init__(self, coins: int = 2000, latency: float = 0.05, jitter: float = 0.02,
+                 error_rate: float = 0.0, exchanges: int = 300, seed: int = 1):
+        """
+        Args:
+            coins: Size of the coin universe
+            latency: Mean response delay in seconds
+            jitter: Standard deviation of the response delay
+            error_rate: Share of requests answered with HTTP 500
+            exchanges: Number of exchanges listed
+            seed: Seed of the generated dataset
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.coins = self._generate_coins(coins)
+        self.coins_by_id = {coin["id"]: coin for coin in self.coins}
+        self.exchanges = self._generate_exchanges(exchanges)
+        self.requests: Counter = Counter()
+        self.errors = 0
+        self.started = time.time()
+
+    def _generate_coins(self, count: int) -> List[Dict[str, Any]]:
+        used_ids = {coin_id for coin_id, *_ in KNOWN_COINS}
+        used_symbols = {symbol for _, symbol, *_ in KNOWN_COINS}
+        coins = []
+        for rank in range(1, count + 1):
+            if rank <= len(KNOWN_COINS):
+                coin_id, symbol, name, price = KNOWN_COINS[rank - 1]
+            else:
+                coin_id = str(self.rng.randint(100, 200_000))
+                while coin_id in used_ids:
+                    coin_id = str(self.rng.randint(100, 200_000))
+                symbol = "".join(self.rng.choices(string.ascii_uppercase, k=self.rng.randint(3, 5)))
+                while symbol in used_symbols:
+                    symbol = "".join(self.rng.choices(string.ascii_uppercase, k=self.rng.randint(3, 5)))
+                stem = "".join(self.rng.choices(_SYLLABLES, k=self.rng.randint(2, 3)))
+                name = stem.capitalize() + self.rng.choice(_SUFFIXES)
+                # Prices spread over many orders of magnitude, falling with rank
+                price = 10 ** self.rng.uniform(-6, 3) / math.sqrt(rank)
+            used_ids.add(coin_id)
+            used_symbols.add(symbol)
+            supply = 10 ** self.rng.uniform(6, 11)
+            coins.append({
+                "id": coin_id,
+                "symbol": symbol,
+                "name": name,
+                "nameid": name.lower().replace(" ", "-"),
+                "rank": rank,
+                "base_price": price,
+                "supply": supply,
+                "phase": self.rng.uniform(0, 2 * math.pi),
+                "change_7d": self.rng.uniform(-25, 25),
+            })
+        return coins
+
+    def _generate_exchanges(self, count: int) -> Dict[str, Dict[str, Any]]:
+        exchanges = {}
+        for index in range(count):
+            exchange_id = str(index + 1)
+            name = "".join(self.rng.choices(_SYLLABLES, k=2)).capitalize() + self.rng.choice(["ex", " Exchange", "Swap", ""])
+            exchanges[exchange_id] = {
+                "id": exchange_id,
+                "name": name,
+                "name_id": name.lower().replace(" ", "-"),
+                "volume_usd": round(10 ** self.rng.uniform(3, 10), 2),
+                "active_pairs": self.rng.randint(1, 2000),
+                "url": f"https://{name.lower().replace(' ', '')}.example",
+                "country": self.rng.choice(["", "US", "UK", "Japan", "Singapore", "Seychelles"]),
+            }
+        return exchanges
+
+    def render_ticker(self, coin: Dict[str, Any], now: float) -> Dict[str, Any]:
+        """Render a coin the way CoinLore does, numbers as strings."""
+        # A slow wave with a period of about ten minutes, different per coin
+        wave = math.sin(now / 100 + coin["phase"])
+        price = coin["base_price"] * (1 + 0.02 * wave)
+        btc_price = KNOWN_COINS[0][3] * (1 + 0.02 * math.sin(now / 100 + self.coins[0]["phase"]))
+        market_cap = price * coin["supply"]
+        return {
+            "id": coin["id"],
+            "symbol": coin["symbol"],
+            "name": coin["name"],
+            "nameid": coin["nameid"],
+            "rank": coin["rank"],
+            "price_usd": f"{price:.8g}",
+            "percent_change_24h": f"{4 * wave:.2f}",
+            "percent_change_1h": f"{0.5 * math.cos(now / 100 + coin['phase']):.2f}",
+            "percent_change_7d": f"{coin['change_7d']:.2f}",
+            "price_btc": f"{price / btc_price:.8g}",
+            "market_cap_usd": f"{market_cap:.2f}",
+            "volume24": round(market_cap * 0.05, 2),
+            "volume24a": round(market_cap * 0.048, 2),
+            "csupply": f"{coin['supply']:.2f}",
+            "tsupply": f"{coin['supply']:.2f}",
+            "msupply": "",
+        }
+
+    def _coin_ids(self, request: web.Request) -> List[str]:
+        return [coin_id for coin_id in request.query.get("id", "").split(",") if coin_id]
+
+    def _coin(self, request: web.Request) -> Optional[Dict[str, Any]]:
+        ids = self._coin_ids(request)
+        return self.coins_by_id.get(ids[0]) if ids else None
+
+    async def global_stats(self, request: web.Request) -> Any:
+        now = time.time()
+        total_mcap = sum(coin["base_price"] * coin["supply"] for coin in self.coins)
+        btc = self.coins[0]
+        return [{
+            "coins_count": len(self.coins),
+            "active_markets": len(self.exchanges) * 40,
+            "total_mcap": total_mcap,
+            "total_volume": total_mcap * 0.05,
+            "btc_d": f"{100 * btc['base_price'] * btc['supply'] / total_mcap:.2f}",
+            "eth_d": f"{100 * self.coins[1]['base_price'] * self.coins[1]['supply'] / total_mcap:.2f}",
+            "mcap_change": f"{2 * math.sin(now / 100):.2f}",
+            "volume_change": f"{3 * math.cos(now / 100):.2f}",
+            "avg_change_percent": f"{math.sin(now / 100):.2f}",
+            "volume_ath": total_mcap * 0.2,
+            "mcap_ath": total_mcap * 1.3,
+        }]
+
+    async def tickers(self, request: web.Request) -> Any:
+        start = max(int(request.query.get("start", 0)), 0)
+        limit = min(max(int(request.query.get("limit", 100)), 0), 100)
+        now = time.time()
+        return {
+            "data": [self.render_ticker(coin, now) for coin in self.coins[start:start + limit]],
+            "info": {"coins_num": len(self.coins), "time": int(now)},
+        }
+
+    async def ticker(self, request: web.Request) -> Any:
+        now = time.time()
+        return [self.render_ticker(self.coins_by_id[coin_id], now)
+                for coin_id in self._coin_ids(request) if coin_id in self.coins_by_id]
+
+    async def coin_markets(self, request: web.Request) -> Any:
+        coin = self._coin(request)
+        if coin is None:
+            return []
+        rng = random.Random(f"markets-{coin['id']}")
+        price = float(self.render_ticker(coin, time.time())["price_usd"])
+        markets = []
+        for exchange in rng.sample(list(self.exchanges.values()), min(50, len(self.exchanges))):
+            quote = rng.choice(["USDT", "USD", "BTC", "EUR"])
+            volume = rng.uniform(1, 1_000_000)
+            markets.append({
+                "name": exchange["name"],
+                "base": coin["symbol"],
+                "quote": quote,
+                "price": price,
+                "price_usd": price * rng.uniform(0.995, 1.005),
+                "volume": volume,
+                "volume_usd": volume * price,
+                "time": int(time.time()),
+            })
+        return markets
+
+    async def exchanges_list(self, request: web.Request) -> Any:
+        return self.exchanges
+
+    async def exchange(self, request: web.Request) -> Any:
+        exchange = self.exchanges.get(request.query.get("id", ""))
+        if exchange is None:
+            return []
+        rng = random.Random(f"pairs-{exchange['id']}")
+        return {
+            "0": {"name": exchange["name"], "date_live": "2017-01-01", "url": exchange["url"]},
+            "pairs": [
+                {
+                    "base": coin["symbol"],
+                    "quote": "USDT",
+                    "volume": rng.uniform(1, 100_000),
+                    "price": coin["base_price"],
+                    "price_usd": coin["base_price"],
+                    "time": int(time.time()),
+                }
+                for coin in rng.sample(self.coins, min(20, len(self.coins)))
+            ],
+        }
+
+    async def social_stats(self, request: web.Request) -> Any:
+        coin = self._coin(request)
+        if coin is None:
+            return []
+        rng = random.Random(f"social-{coin['id']}")
+        return {
+            "reddit": {"avg_active_users": rng.randint(0, 10_000), "subscribers": rng.randint(0, 3_000_000)},
+            "twitter": {"followers_count": rng.randint(0, 5_000_000), "status_count": rng.randint(0, 50_000)},
+        }
+
+    def create_app(self) -> web.Application:
+        """Build the aiohttp application serving the CoinLore endpoints."""
+        routes = {
+            "/api/global/": self.global_stats,
+            "/api/tickers/": self.tickers,
+            "/api/ticker/": self.ticker,
+            "/api/coin/markets/": self.coin_markets,
+            "/api/exchanges/": self.exchanges_list,
+            "/api/exchange/": self.exchange,
+            "/api/coin/social_stats/": self.social_stats,
+        }
+
+        async def handle(request: web.Request) -> web.Response:
+            self.requests[request.path] += 1
+            delay = self.rng.gauss(self.latency, self.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.rng.random() < self.error_rate:
+                self.errors += 1
+                return web.Response(status=500, text="Internal Server Error")
+            body = await routes[request.path](request)
+            return web.Response(body=json.dumps(body, separators=(",", ":")), content_type="application/json")
+
+        app = web.Application()
+        for path in routes:
+            app.router.add_get(path, handle)
+        return app
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request counts per endpoint and the number of injected errors."""
+        return {"requests": dict(self.requests), "errors": self.errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake CoinLore API endpoints for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8701)
+    parser.add_argument("--coins", type=int, default=2000, help="size of the coin universe")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="standard deviation of the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with HTTP 500")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    fake = FakeCoinlore(args.coins, args.latency, args.jitter, args.error_rate, seed=args.seed)
+    logging.info(f"Fake CoinLore with {args.coins} coins on http://{args.host}:{args.port}")
+    web.run_app(fake.create_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
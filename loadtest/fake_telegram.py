@@ -0,0 +1,213 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+
+BOT_USER = {"id": 1000000, "is_bot": True, "first_name": "Load Test Bot", "username": "loadtest_bot"}
+
+# Methods whose result is the message they sent or edited
+MESSAGE_METHODS = {
+    "sendMessage", "sendPhoto", "sendDocument", "editMessageText",
+    "editMessageCaption", "editMessageReplyMarkup", "editMessageMedia",
+}
+
+
+class Chat:
+    """What one simulated user currently sees in their private chat."""
+
+    def __init__(self, user_id: int):
+        self.user = {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+        self.chat = {"id": user_id, "type": "private", "first_name": self.user["first_name"]}
+        self.messages: Dict[int, Dict[str, Any]] = {}
+        self.message_ids = itertools.count(1)
+        self.keyboard: List[str] = []  # reply keyboard button texts
+        self.inline_message: Optional[Dict[str, Any]] = None  # latest message with inline buttons
+        self.waiter: Optional[asyncio.Future] = None
+
+    def callback_buttons(self) -> List[str]:
+        """Callback data of the inline buttons under the latest inline message."""
+        if self.inline_message is None:
+            return []
+        rows = self.inline_message.get("reply_markup", {}).get("inline_keyboard", [])
+        return [button["callback_data"] for row in rows for button in row if button.get("callback_data")]
+
+
+class FakeTelegram:
+    """Local stand-in for the Telegram Bot API, driven by the load generator.
+
+    The bot long-polls getUpdates here like it would on Telegram. The load
+    generator injects user messages and button clicks and waits for the
+    bot's answer to each: the first message the bot sends or edits in
+    that chat, or its answerCallbackQuery for a click.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency: Delay in seconds added to every Bot API call except getUpdates
+        """
+        self.latency = latency
+        self.chats: Dict[int, Chat] = {}
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.ready = asyncio.Event()
+        self._updates: List[Dict[str, Any]] = []
+        self._update_ids = itertools.count(1)
+        self._callback_ids = itertools.count(1)
+        self._new_updates = asyncio.Event()
+        self._callbacks: Dict[str, Chat] = {}
+
+    def chat(self, user_id: int) -> Chat:
+        chat = self.chats.get(user_id)
+        if chat is None:
+            chat = self.chats[user_id] = Chat(user_id)
+        return chat
+
+    async def _push(self, chat: Chat, update: Dict[str, Any], timeout: float) -> Optional[Dict[str, Any]]:
+        chat.waiter = asyncio.get_running_loop().create_future()
+        update["update_id"] = next(self._update_ids)
+        self._updates.append(update)
+        self._new_updates.set()
+        try:
+            return await asyncio.wait_for(chat.waiter, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            chat.waiter = None
+
+    async def send_text(self, user_id: int, text: str, timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+        """Deliver a text message from the user and wait for the bot's answer.
+
+        Returns:
+            The bot's answer, or None if it did not answer within timeout
+        """
+        chat = self.chat(user_id)
+        message = {
+            "message_id": next(chat.message_ids),
+            "date": int(time.time()),
+            "chat": chat.chat,
+            "from": chat.user,
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return await self._push(chat, {"message": message}, timeout)
+
+    async def click(self, user_id: int, data: str, timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+        """Click an inline button of the chat's latest inline message and wait for the bot's answer."""
+        chat = self.chat(user_id)
+        callback_id = str(next(self._callback_ids))
+        self._callbacks[callback_id] = chat
+        callback = {
+            "id": callback_id,
+            "from": chat.user,
+            "chat_instance": str(user_id),
+            "message": chat.inline_message,
+            "data": data,
+        }
+        try:
+            return await self._push(chat, {"callback_query": callback}, timeout)
+        finally:
+            self._callbacks.pop(callback_id, None)
+
+    def _answer(self, chat: Chat, result: Any) -> None:
+        if chat.waiter is not None and not chat.waiter.done():
+            chat.waiter.set_result(result)
+
+    async def _get_updates(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        self.ready.set()
+        offset = int(params.get("offset") or 0)
+        self._updates = [update for update in self._updates if update["update_id"] >= offset]
+        if not self._updates:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:int(params.get("limit") or 100)]
+
+    def _message_result(self, method: str, params: Dict[str, Any]) -> Any:
+        chat_id = params.get("chat_id")
+        if chat_id is None:
+            # Inline-mode edits have no chat and return True
+            return True
+        chat = self.chat(int(chat_id))
+        markup = json.loads(params["reply_markup"]) if params.get("reply_markup") else None
+
+        if method.startswith("edit"):
+            message = chat.messages.get(int(params.get("message_id") or 0))
+            if message is None:
+                return {"_error": "Bad Request: message to edit not found"}
+            text = params.get("text", message.get("text"))
+            if text == message.get("text") and markup == message.get("reply_markup"):
+                return {"_error": "Bad Request: message is not modified"}
+            message = dict(message, date=int(time.time()))
+        else:
+            message = {"message_id": next(chat.message_ids), "date": int(time.time()), "chat": chat.chat, "from": BOT_USER}
+            text = params.get("text")
+        if text is not None:
+            message["text"] = text
+        if params.get("caption") is not None:
+            message["caption"] = params["caption"]
+        if method == "sendPhoto":
+            file_id = f"photo-{message['message_id']}-{chat.chat['id']}"
+            message["photo"] = [{"file_id": file_id, "file_unique_id": file_id, "width": 800, "height": 400}]
+
+        if markup and "keyboard" in markup:
+            chat.keyboard = [button["text"] for row in markup["keyboard"] for button in row]
+        elif markup and "remove_keyboard" in markup:
+            chat.keyboard = []
+        if markup and "inline_keyboard" in markup:
+            message["reply_markup"] = markup
+            chat.inline_message = message
+        else:
+            message.pop("reply_markup", None)
+            if chat.inline_message is not None and chat.inline_message["message_id"] == message["message_id"]:
+                chat.inline_message = None
+        chat.messages[message["message_id"]] = message
+        self._answer(chat, message)
+        return message
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        params.update(request.query)
+        self.calls[method] += 1
+
+        if method == "getUpdates":
+            return web.json_response({"ok": True, "result": await self._get_updates(params)})
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if method == "getMe":
+            result = BOT_USER
+        elif method in MESSAGE_METHODS:
+            result = self._message_result(method, params)
+        elif method == "answerCallbackQuery":
+            chat = self._callbacks.get(params.get("callback_query_id", ""))
+            if chat is not None:
+                self._answer(chat, {"answerCallbackQuery": params.get("text")})
+            result = True
+        else:
+            result = True
+
+        if isinstance(result, dict) and "_error" in result:
+            self.errors[method] += 1
+            return web.json_response({"ok": False, "error_code": 400, "description": result["_error"]}, status=400)
+        return web.json_response({"ok": True, "result": result})
+
+    def create_app(self) -> web.Application:
+        """Build the aiohttp application serving /bot<token>/<method>."""
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        app.router.add_get("/bot{token}/{method}", self.handle)
+        return app
+
+    def stats(self) -> Dict[str, Any]:
+        """Return Bot API call counts per method and the error replies sent."""
+        return {"calls": dict(self.calls), "errors": dict(self.errors)}
@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from loadtest.fake_coinlore import KNOWN_COINS, FakeCoinlore
+from loadtest.fake_telegram import FakeTelegram
+
+
+ROOT = Path(__file__).resolve().parent.parent
+SEARCH_BUTTON = "🔍 Search Coin"
+
+
+class Results:
+    """Answer latencies of the simulated users' actions."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.timeouts: Counter = Counter()
+
+    def record(self, action: str, latency: Optional[float]) -> None:
+        if latency is None:
+            self.timeouts[action] += 1
+        else:
+            self.latencies[action].append(latency)
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        """Return latency percentiles in milliseconds per action and overall."""
+        actions = {
+            action: _summarize(self.latencies.get(action, []), self.timeouts[action])
+            for action in sorted(set(self.latencies) | set(self.timeouts))
+        }
+        total = _summarize([latency for values in self.latencies.values() for latency in values],
+                           sum(self.timeouts.values()))
+        total["throughput"] = round(total["count"] / elapsed, 2) if elapsed > 0 else 0.0
+        return {"elapsed": round(elapsed, 2), "total": total, "actions": actions}
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, max(0, math.ceil(share * len(values)) - 1))]
+
+
+def _summarize(latencies: List[float], timeouts: int) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "timeouts": timeouts,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def click_label(data: str) -> str:
+    """Group button clicks by callback data without coin, page or alert ids."""
+    return "click " + (re.sub(r"_?\d+$", "", data) or data)
+
+
+async def simulate_user(telegram: FakeTelegram, user_id: int, deadline: float, args: argparse.Namespace,
+                        search_terms: List[str], results: Results) -> None:
+    """One user clicking through the menus until the deadline.
+
+    Every step waits for the bot's answer and a random think time, then
+    clicks an inline button of the latest message, presses a reply
+    keyboard button, or types a coin name after pressing Search.
+    """
+    rng = random.Random(user_id)
+    chat = telegram.chat(user_id)
+
+    async def act(action: str, answer) -> None:
+        started = time.perf_counter()
+        reply = await answer
+        results.record(action, time.perf_counter() - started if reply is not None else None)
+
+    await act("/start", telegram.send_text(user_id, "/start", args.timeout))
+    searching = False
+    while True:
+        await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+        if time.monotonic() >= deadline:
+            return
+        buttons = chat.callback_buttons()
+        if searching:
+            searching = False
+            await act("search query", telegram.send_text(user_id, rng.choice(search_terms), args.timeout))
+        elif buttons and (not chat.keyboard or rng.random() < args.click_share):
+            data = rng.choice(buttons)
+            await act(click_label(data), telegram.click(user_id, data, args.timeout))
+        elif chat.keyboard:
+            text = rng.choice(chat.keyboard)
+            searching = text == SEARCH_BUTTON
+            await act(text, telegram.send_text(user_id, text, args.timeout))
+        else:
+            await act("/start", telegram.send_text(user_id, "/start", args.timeout))
+
+
+async def run_users(telegram: FakeTelegram, args: argparse.Namespace, search_terms: List[str]) -> Dict[str, Any]:
+    """Run every simulated user, starting them evenly over the ramp-up time."""
+    results = Results()
+    started = time.monotonic()
+    deadline = started + args.ramp_up + args.duration
+
+    async def start_user(index: int) -> None:
+        await asyncio.sleep(args.ramp_up * index / args.users)
+        await simulate_user(telegram, args.first_user_id + index, deadline, args, search_terms, results)
+
+    await asyncio.gather(*(start_user(index) for index in range(args.users)))
+    return results.summary(time.monotonic() - started)
+
+
+async def serve(app: web.Application, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    return runner
+
+
+def start_bot(args: argparse.Namespace, coinlore_url: str, telegram_url: str, data_dir: str) -> subprocess.Popen:
+    """Start main.py against the fakes, with its own database and price history."""
+    env = dict(
+        os.environ,
+        TELEGRAM_BOT_TOKEN=args.token,
+        TELEGRAM_API_URL=telegram_url,
+        COINLORE_BASE_URL=coinlore_url,
+        DATABASE_PATH=os.path.join(data_dir, "bot.db"),
+        PRICE_HISTORY_DIR=os.path.join(data_dir, "price_history"),
+        BOT_RUN_MODE="polling",
+    )
+    logging.info(f"Starting the bot, log in {args.bot_log}")
+    with open(args.bot_log, "w") as log:
+        return subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_bot(bot: subprocess.Popen) -> None:
+    if bot.poll() is None:
+        bot.send_signal(signal.SIGINT)
+        try:
+            bot.wait(30)
+        except subprocess.TimeoutExpired:
+            bot.kill()
+            bot.wait()
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    total = report["total"]
+    print(f"\n{report['users']} users for {report['elapsed']}s: {total['count']} answers, "
+          f"{total['timeouts']} timeouts, {total['throughput']} answers/s")
+    print(f"{'action':<28}{'count':>8}{'timeouts':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for action, row in [*report["actions"].items(), ("total", total)]:
+        print(f"{action:<28}{row['count']:>8}{row['timeouts']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    if report.get("coinlore"):
+        print(f"\nCoinLore requests: {report['coinlore']['requests']}, injected errors: {report['coinlore']['errors']}")
+    print(f"Telegram calls: {report['telegram']['calls']}")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    runners = []
+    telegram = FakeTelegram(args.telegram_latency)
+    runners.append(await serve(telegram.create_app(), args.host, args.telegram_port))
+    telegram_url = f"http://{args.host}:{args.telegram_port}"
+
+    coinlore = None
+    coinlore_url = args.coinlore_url
+    if not coinlore_url:
+        coinlore = FakeCoinlore(args.coins, args.coinlore_latency, args.coinlore_jitter, args.coinlore_error_rate,
+                                seed=args.seed)
+        runners.append(await serve(coinlore.create_app(), args.host, args.coinlore_port))
+        coinlore_url = f"http://{args.host}:{args.coinlore_port}"
+    search_terms = ([coin[key] for coin in coinlore.coins[:200] for key in ("name", "symbol")] if coinlore
+                    else [name for _, _, name, _ in KNOWN_COINS])
+
+    bot = None
+    with tempfile.TemporaryDirectory() as data_dir:
+        try:
+            if args.no_bot:
+                logging.info(f"Waiting for a bot using TELEGRAM_API_URL={telegram_url} COINLORE_BASE_URL={coinlore_url}")
+            else:
+                bot = start_bot(args, coinlore_url, telegram_url, data_dir)
+            waited = 0.0
+            while not telegram.ready.is_set():
+                if bot is not None and bot.poll() is not None:
+                    raise RuntimeError(f"The bot exited with code {bot.returncode}, see {args.bot_log}")
+                if waited >= args.startup_timeout:
+                    raise RuntimeError("The bot did not start polling in time")
+                await asyncio.sleep(0.2)
+                waited += 0.2
+
+            logging.info(f"Bot is polling, running {args.users} users for {args.duration}s")
+            report = await run_users(telegram, args, search_terms)
+        finally:
+            if bot is not None:
+                await asyncio.get_running_loop().run_in_executor(None, stop_bot, bot)
+            for runner in runners:
+                await runner.cleanup()
+
+    report["users"] = args.users
+    report["coinlore"] = coinlore.stats() if coinlore else None
+    report["telegram"] = telegram.stats()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the bot against local CoinLore and Telegram fakes and measure answer latency",
+    )
+    parser.add_argument("--users", type=int, default=50, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds every user stays active after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean pause between a user's actions")
+    parser.add_argument("--click-share", type=float, default=0.6, help="chance of clicking an inline button over the menu")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for an answer")
+    parser.add_argument("--first-user-id", type=int, default=100000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--telegram-port", type=int, default=8702)
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="delay of every Bot API call")
+    parser.add_argument("--coinlore-url", default="", help="use this CoinLore server instead of the local fake")
+    parser.add_argument("--coinlore-port", type=int, default=8701)
+    parser.add_argument("--coins", type=int, default=2000, help="size of the fake coin universe")
+    parser.add_argument("--coinlore-latency", type=float, default=0.05, help="mean fake CoinLore delay")
+    parser.add_argument("--coinlore-jitter", type=float, default=0.02)
+    parser.add_argument("--coinlore-error-rate", type=float, default=0.0, help="share of CoinLore calls failing")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--token", default="123456:LOADTEST", help="bot token the bot process is started with")
+    parser.add_argument("--no-bot", action="store_true", help="do not start main.py, wait for a bot started by hand")
+    parser.add_argument("--bot-log", default="loadtest-bot.log")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
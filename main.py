@@ -5,24 +5,78 @@ import signal
 import time
 from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import BotCommand
 from aiogram.exceptions import TelegramNetworkError
 from handlers.start import register_start_handlers
 from handlers.global_stats import register_global_stats_handlers
 from handlers.top_coins import register_top_coins_handlers
-from handlers.search import register_search_handlers
+from handlers.search import index_snapshot, register_search_handlers
 from handlers.exchanges import register_exchanges_handlers
 from handlers.favorites import register_favorites_handlers
 from handlers.help import register_help_handlers
 from handlers.coin_details import register_coin_details_handlers
+from handlers.markets import register_markets_handlers
+from handlers.socials import register_socials_handlers, schedule_social_prefetch
+from handlers.alerts import register_alerts_handlers
+from handlers.charts import register_charts_handlers
+from database.db import db, favorites_store
+from database.fsm_storage import create_fsm_storage
+from services.alerts import alert_engine
+from services.chart_renderer import chart_renderer
+from services.coinlore_api import CoinloreAPI
+from services.market_snapshot import market_snapshot
+from services.price_history import price_history
+from services.send_scheduler import send_scheduler
+from services.supervisor import Supervisor, serve_worker
+from services.webhook import run_webhook, start_metrics_server
+from middlewares.concurrency import ConcurrencyLimitMiddleware
+from middlewares.metrics import setup_metrics_middlewares
+from utils.hash_ring import HashRing
 
 
 logging.basicConfig(level=logging.INFO)
 
 load_dotenv()
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+DATABASE_PATH = os.getenv("DATABASE_PATH", "bot.db")
+
+# FSM storage: "memory" (default), "sqlite" (survives restarts) or "redis"
+# (shared by several instances, needs the redis package)
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory").lower()
+FSM_TTL = float(os.getenv("FSM_TTL", "86400"))  # seconds since last write
+REDIS_URL = os.getenv("REDIS_URL", "")
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "60"))  # seconds
+SNAPSHOT_MAX_COINS = int(os.getenv("SNAPSHOT_MAX_COINS", "0"))  # 0 = whole universe
+PRICE_HISTORY_DIR = os.getenv("PRICE_HISTORY_DIR", "price_history")
+PRICE_HISTORY_COINS = int(os.getenv("PRICE_HISTORY_COINS", "500"))  # top-N coins with local history
+
+# API roots, empty for the public APIs; point them at the loadtest fakes to
+# run the bot offline
+COINLORE_BASE_URL = os.getenv("COINLORE_BASE_URL", "")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+# Run mode: "polling" (default) or "webhook" for running behind a reverse proxy
+BOT_RUN_MODE = os.getenv("BOT_RUN_MODE", "polling").lower()
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", "8080"))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "100"))
+# Port serving /metrics outside webhook mode (0 = off); the webhook server
+# always serves it. Supervisor workers use METRICS_PORT + 1 + worker index
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Supervisor mode: with WORKERS > 1 one process receives updates and routes
+# them by chat to WORKERS handler processes
+WORKERS = int(os.getenv("WORKERS", "1"))
+SUPERVISOR_COINLORE_SHARE = 0.5  # of the CoinLore rate limit, the rest is split between workers
+# Update types the handlers use (the supervisor does not build a dispatcher to resolve them)
+ALLOWED_UPDATES = ["message", "callback_query"]
 
 
 async def set_commands(bot: Bot):
@@ -31,6 +85,7 @@ async def set_commands(bot: Bot):
         BotCommand(command="/help", description="Get help"),
         BotCommand(command="/global", description="Global crypto stats"),
         BotCommand(command="/top", description="View top cryptocurrencies"),
+        BotCommand(command="/alerts", description="Your price alerts"),
     ]
     # Retry mechanism for network issues
     max_retries = 3
@@ -51,14 +106,20 @@ async def set_commands(bot: Bot):
                 return
 
 
-async def main():
-    # Initialize bot and dispatcher
-    bot = Bot(token=BOT_TOKEN)
-    
-    # Create storage and dispatcher
-    storage = MemoryStorage()
+def create_bot() -> Bot:
+    """Create the bot, talking to TELEGRAM_API_URL when one is set"""
+    session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+    return Bot(token=BOT_TOKEN, session=session)
+
+
+def create_dispatcher() -> Dispatcher:
+    """Create the dispatcher with its FSM storage and every handler registered"""
+    storage = create_fsm_storage(FSM_STORAGE, ttl=FSM_TTL, redis_url=REDIS_URL)
     dp = Dispatcher(storage=storage)
     
+    # Time every update and handler for /metrics
+    setup_metrics_middlewares(dp)
+    
     # Register all handlers
     register_start_handlers(dp)
     register_global_stats_handlers(dp)
@@ -68,6 +129,77 @@ async def main():
     register_favorites_handlers(dp)
     register_help_handlers(dp)
     register_coin_details_handlers(dp)
+    register_markets_handlers(dp)
+    register_socials_handlers(dp)
+    register_alerts_handlers(dp)
+    register_charts_handlers(dp)
+    
+    return dp
+
+
+async def start_services(bot: Bot, worker_index: int = 0, workers: int = 1):
+    """Open the database and start the services the handlers rely on
+    
+    With several workers, each one only loads the alerts of its own chats,
+    only worker 0 writes price history to disk, and the Telegram and
+    CoinLore rate limits are split between the processes.
+    """
+    # Open the database (favorites, alerts, FSM) and apply pending migrations
+    await db.connect(DATABASE_PATH)
+    await favorites_store.start()
+    
+    owns_chat = None
+    if workers > 1:
+        ring = HashRing(range(workers))
+        owns_chat = lambda chat_id: ring.get(chat_id) == worker_index
+        send_scheduler.set_rate_share(1 / workers)
+    
+    # Load price alerts and start the notification delivery worker
+    await alert_engine.start(bot, owns_chat=owns_chat)
+    
+    # Load local price history; it records every snapshot tick from now on
+    await price_history.start(path=PRICE_HISTORY_DIR, max_coins=PRICE_HISTORY_COINS, persist=worker_index == 0)
+    
+    # Re-index search and prefetch top coins' social stats whenever the
+    # market snapshot refreshes
+    market_snapshot.add_listener(index_snapshot)
+    market_snapshot.add_listener(schedule_social_prefetch)
+    
+    # Open the shared CoinLore HTTP session (pooled, keep-alive)
+    await CoinloreAPI.start(
+        rate_share=1.0 if workers == 1 else (1 - SUPERVISOR_COINLORE_SHARE) / workers,
+        base_url=COINLORE_BASE_URL,
+    )
+
+
+async def stop_services(dp: Dispatcher):
+    """Stop the services started by start_services, flushing buffered writes"""
+    await alert_engine.stop()
+    await price_history.stop()
+    chart_renderer.close()
+    await CoinloreAPI.close()
+    # Write out buffered favorites changes before the database closes
+    await favorites_store.close()
+    await dp.storage.close()
+    await db.close()
+
+
+async def main():
+    if WORKERS > 1:
+        await run_supervisor()
+        return
+    
+    # Initialize bot and dispatcher
+    bot = create_bot()
+    
+    # Pace every outgoing message to Telegram's global and per-chat limits
+    bot.session.middleware(send_scheduler)
+    
+    dp = create_dispatcher()
+    await start_services(bot)
+    
+    # Keep the full coin universe in memory, refreshed in the background
+    await market_snapshot.start(interval=SNAPSHOT_INTERVAL, max_coins=SNAPSHOT_MAX_COINS)
     
     # Set bot commands with error handling
     try:
@@ -76,6 +208,111 @@ async def main():
         logging.error(f"Error setting commands: {e}")
         # Continue without commands if setting fails
     
+    try:
+        if BOT_RUN_MODE == "webhook":
+            await run_webhook(
+                bot, dp,
+                base_url=WEBHOOK_BASE_URL,
+                path=WEBHOOK_PATH,
+                secret=WEBHOOK_SECRET,
+                host=WEBAPP_HOST,
+                port=WEBAPP_PORT,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+                concurrency=UPDATE_CONCURRENCY,
+            )
+        else:
+            metrics_runner = await start_metrics_server(WEBAPP_HOST, METRICS_PORT) if METRICS_PORT else None
+            try:
+                await run_polling(bot, dp)
+            finally:
+                if metrics_runner:
+                    await metrics_runner.cleanup()
+    finally:
+        await market_snapshot.stop()
+        await stop_services(dp)
+
+
+async def run_supervisor():
+    """Receive updates and poll CoinLore here, handle updates in WORKERS processes"""
+    bot = create_bot()
+    supervisor = Supervisor(WORKERS, run_worker)
+    
+    await CoinloreAPI.start(rate_share=SUPERVISOR_COINLORE_SHARE, base_url=COINLORE_BASE_URL)
+    supervisor.start()
+    monitor = asyncio.create_task(supervisor.monitor())
+    
+    # The supervisor owns the only snapshot poller and shares every snapshot with the workers
+    await market_snapshot.start(interval=SNAPSHOT_INTERVAL, max_coins=SNAPSHOT_MAX_COINS)
+    
+    try:
+        await set_commands(bot)
+    except Exception as e:
+        logging.error(f"Error setting commands: {e}")
+    
+    try:
+        if BOT_RUN_MODE == "webhook":
+            await supervisor.serve_webhook(
+                bot,
+                base_url=WEBHOOK_BASE_URL,
+                path=WEBHOOK_PATH,
+                secret=WEBHOOK_SECRET,
+                allowed_updates=ALLOWED_UPDATES,
+                host=WEBAPP_HOST,
+                port=WEBAPP_PORT,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+            )
+        else:
+            metrics_runner = await start_metrics_server(WEBAPP_HOST, METRICS_PORT) if METRICS_PORT else None
+            try:
+                await supervisor.poll_updates(bot, ALLOWED_UPDATES)
+            finally:
+                if metrics_runner:
+                    await metrics_runner.cleanup()
+    finally:
+        monitor.cancel()
+        await market_snapshot.stop()
+        await supervisor.stop()
+        await CoinloreAPI.close()
+        await bot.session.close()
+
+
+async def worker_main(index: int, workers: int, update_queue):
+    """Handle the updates the supervisor routes to this worker"""
+    bot = create_bot()
+    bot.session.middleware(send_scheduler)
+    
+    dp = create_dispatcher()
+    dp.update.outer_middleware(ConcurrencyLimitMiddleware(UPDATE_CONCURRENCY))
+    await start_services(bot, worker_index=index, workers=workers)
+    logging.info(f"Worker {index}/{workers} ready")
+    
+    # Each worker process keeps its own handler metrics
+    metrics_runner = await start_metrics_server(WEBAPP_HOST, METRICS_PORT + 1 + index) if METRICS_PORT else None
+    
+    try:
+        await serve_worker(bot, dp, update_queue)
+    finally:
+        if metrics_runner:
+            await metrics_runner.cleanup()
+        await stop_services(dp)
+        await bot.session.close()
+
+
+def run_worker(index: int, workers: int, update_queue):
+    """Entry point of a worker process started by the supervisor"""
+    # Ctrl+C reaches the whole process group; workers wait for the supervisor's
+    # stop message instead, so queued updates are handled before exiting
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    try:
+        asyncio.run(worker_main(index, workers, update_queue))
+    except (KeyboardInterrupt, SystemExit):
+        logging.info(f"Worker {index} stopped")
+
+
+async def run_polling(bot: Bot, dp: Dispatcher):
+    """Run long polling with retries"""
     # Start polling with retry mechanism
     max_polling_retries = 5
     polling_retry_delay = 5  # seconds
@@ -110,7 +347,15 @@ async def main():
 
 
 def signal_handler(sig, frame):
-    """Handle termination signals properly"""
+    """Handle termination signals properly
+    
+    Used in webhook and supervisor mode and during startup: the
+    KeyboardInterrupt makes asyncio.run() cancel main(), and in supervisor
+    mode it also stops the worker processes. While polling, aiogram's
+    start_polling installs its own SIGINT/SIGTERM handlers instead, which
+    stop polling so main() returns normally. Either way buffered favorites
+    are flushed by stop_services() in main()'s finally block.
+    """
     logging.info(f"Received signal {sig}, shutting down...")
     raise KeyboardInterrupt
 
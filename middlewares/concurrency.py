@@ -0,0 +1,30 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """Outer update middleware capping how many updates are handled at once.
+
+    Webhook updates are processed in background tasks, so without a cap a
+    burst of traffic would start an unbounded number of handlers.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Args:
+            limit: Maximum number of updates processed concurrently
+        """
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        async with self._semaphore:
+            return await handler(event, data)
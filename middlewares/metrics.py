@@ -0,0 +1,89 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.types import TelegramObject, Update
+
+from utils.metrics import Counter, Histogram
+
+
+UPDATE_DURATION = Histogram(
+    "bot_update_duration_seconds",
+    "Time from receiving an update to finishing it, including FSM storage and filters",
+    ["type"],
+)
+UPDATES = Counter("bot_updates_total", "Updates received by outcome", ["type", "status"])
+HANDLER_DURATION = Histogram("bot_handler_duration_seconds", "Time spent inside each handler", ["handler"])
+HANDLER_ERRORS = Counter("bot_handler_errors_total", "Handler calls that raised", ["handler"])
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer update middleware timing every update end to end.
+
+    Updates no handler matched are counted as unhandled.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        update_type = event.event_type
+        started = time.perf_counter()
+        status = "handled"
+        try:
+            result = await handler(event, data)
+            if result is UNHANDLED:
+                status = "unhandled"
+            return result
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            UPDATE_DURATION.observe(time.perf_counter() - started, update_type)
+            UPDATES.inc(update_type, status)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware timing the handler an event was routed to.
+
+    Only inner middlewares know which handler runs, so this one is
+    registered per event type next to UpdateMetricsMiddleware.
+    """
+
+    def __init__(self):
+        self._names: Dict[Callable, str] = {}
+
+    def _handler_name(self, callback: Callable) -> str:
+        name = self._names.get(callback)
+        if name is None:
+            module = getattr(callback, "__module__", "").removeprefix("handlers.")
+            name = self._names[callback] = f"{module}.{getattr(callback, '__qualname__', repr(callback))}"
+        return name
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        name = self._handler_name(data["handler"].callback)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - started, name)
+
+
+def setup_metrics_middlewares(dp) -> None:
+    """Register update and per-handler latency middlewares on a dispatcher."""
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    handler_metrics = HandlerMetricsMiddleware()
+    # Inner middlewares of the dispatcher also wrap handlers of included routers
+    dp.message.middleware(handler_metrics)
+    dp.callback_query.middleware(handler_metrics)
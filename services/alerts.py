@@ -0,0 +1,376 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+
+from database.db import AlertsStore, alerts_store
+from database.models import ALERT_ABOVE, ALERT_BELOW, ALERT_MOVE_1H, Alert
+from services.market_snapshot import MarketSnapshot, market_snapshot
+from services.send_scheduler import PRIORITY_BROADCAST, send_priority
+from services.tickers import Ticker
+from utils.formaters import format_price
+
+
+class AlertError(Exception):
+    """Raised when an alert cannot be created; the message is shown to the user."""
+
+
+class _Thresholds:
+    """Alert ids kept sorted by threshold in two parallel lists.
+
+    Every trigger or re-arm condition is "threshold <= x" or "threshold >= x",
+    so all alerts affected by a price are one prefix or suffix found by bisect.
+    """
+
+    __slots__ = ("values", "ids")
+
+    def __init__(self):
+        self.values: List[float] = []
+        self.ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, value: float, alert_id: int) -> None:
+        i = bisect_right(self.values, value)
+        self.values.insert(i, value)
+        self.ids.insert(i, alert_id)
+
+    def discard(self, value: float, alert_id: int) -> bool:
+        lo = bisect_left(self.values, value)
+        hi = bisect_right(self.values, value)
+        for i in range(lo, hi):
+            if self.ids[i] == alert_id:
+                del self.values[i]
+                del self.ids[i]
+                return True
+        return False
+
+    def pop_at_most(self, limit: float) -> List[Tuple[float, int]]:
+        """Remove and return every entry with threshold <= limit."""
+        i = bisect_right(self.values, limit)
+        if not i:
+            return []
+        taken = list(zip(self.values[:i], self.ids[:i]))
+        del self.values[:i]
+        del self.ids[:i]
+        return taken
+
+    def pop_at_least(self, limit: float) -> List[Tuple[float, int]]:
+        """Remove and return every entry with threshold >= limit."""
+        i = bisect_left(self.values, limit)
+        if i == len(self.values):
+            return []
+        taken = list(zip(self.values[i:], self.ids[i:]))
+        del self.values[i:]
+        del self.ids[i:]
+        return taken
+
+    def extend(self, entries: List[Tuple[float, int]]) -> None:
+        """Add entries that are already sorted by threshold."""
+        if len(entries) <= 8:
+            for value, alert_id in entries:
+                self.add(value, alert_id)
+            return
+        # Two sorted runs: timsort merges them in linear time
+        merged = sorted(chain(zip(self.values, self.ids), entries), key=itemgetter(0))
+        self.values = [value for value, _ in merged]
+        self.ids = [alert_id for _, alert_id in merged]
+
+
+class _CoinAlerts:
+    """Armed and disarmed alerts of one coin, one sorted list per kind and state."""
+
+    __slots__ = ("armed", "disarmed")
+
+    def __init__(self):
+        self.armed = {kind: _Thresholds() for kind in (ALERT_ABOVE, ALERT_BELOW, ALERT_MOVE_1H)}
+        self.disarmed = {kind: _Thresholds() for kind in (ALERT_ABOVE, ALERT_BELOW, ALERT_MOVE_1H)}
+
+    def __len__(self) -> int:
+        return sum(map(len, self.armed.values())) + sum(map(len, self.disarmed.values()))
+
+    def add(self, alert: Alert) -> None:
+        lists = self.armed if alert.armed else self.disarmed
+        lists[alert.kind].add(alert.threshold, alert.id)
+
+    def discard(self, alert: Alert) -> None:
+        if not self.armed[alert.kind].discard(alert.threshold, alert.id):
+            self.disarmed[alert.kind].discard(alert.threshold, alert.id)
+
+    def evaluate(self, price: Optional[float], change_1h: Optional[float],
+                 hysteresis: float, move_rearm_ratio: float) -> Tuple[List[int], List[int]]:
+        """Fire alerts whose condition is met and re-arm those that moved back far enough.
+
+        Returns:
+            Tuple of (fired alert ids, re-armed alert ids)
+        """
+        fired: List[Tuple[float, int]] = []
+        rearmed: List[Tuple[float, int]] = []
+
+        if price is not None and price > 0:
+            # Above: fires at price >= t, re-arms once price <= t * (1 - hysteresis)
+            hit = self.armed[ALERT_ABOVE].pop_at_most(price)
+            back = self.disarmed[ALERT_ABOVE].pop_at_least(price / (1 - hysteresis))
+            self.disarmed[ALERT_ABOVE].extend(hit)
+            self.armed[ALERT_ABOVE].extend(back)
+            fired += hit
+            rearmed += back
+
+            # Below: fires at price <= t, re-arms once price >= t * (1 + hysteresis)
+            hit = self.armed[ALERT_BELOW].pop_at_least(price)
+            back = self.disarmed[ALERT_BELOW].pop_at_most(price / (1 + hysteresis))
+            self.disarmed[ALERT_BELOW].extend(hit)
+            self.armed[ALERT_BELOW].extend(back)
+            fired += hit
+            rearmed += back
+
+        if change_1h is not None:
+            # Move: fires at |change| >= t, re-arms once |change| <= t * move_rearm_ratio
+            move = abs(change_1h)
+            hit = self.armed[ALERT_MOVE_1H].pop_at_most(move)
+            back = self.disarmed[ALERT_MOVE_1H].pop_at_least(move / move_rearm_ratio)
+            self.disarmed[ALERT_MOVE_1H].extend(hit)
+            self.armed[ALERT_MOVE_1H].extend(back)
+            fired += hit
+            rearmed += back
+
+        return [alert_id for _, alert_id in fired], [alert_id for _, alert_id in rearmed]
+
+
+class AlertEngine:
+    """Evaluates every user's price alerts against each market snapshot.
+
+    Alerts live in memory grouped by coin, sorted by threshold, so one pass
+    over the coins that have alerts finds everything that fired with a couple
+    of bisects per coin, however many alerts there are. A fired alert is
+    disarmed until the price moves back past the threshold by a hysteresis
+    margin, which keeps prices hovering around a threshold from sending a
+    stream of notifications. Armed state is persisted after every pass and
+    notifications go through a queue drained by a few background tasks at
+    broadcast priority, so the send scheduler paces them behind interactive
+    replies and a slow Telegram API never delays evaluation.
+    """
+
+    HYSTERESIS = 0.01  # price must move back 1% past the threshold to re-arm
+    MOVE_REARM_RATIO = 0.5  # 1h move must fall to half the threshold to re-arm
+    MAX_ALERTS_PER_USER = 20
+    QUEUE_SIZE = 10000
+    DELIVERY_WORKERS = 8  # a chat waiting on its flood limit does not block the others
+
+    def __init__(self, store: AlertsStore):
+        self.store = store
+        self._alerts: Dict[int, Alert] = {}
+        self._by_coin: Dict[str, _CoinAlerts] = {}
+        self._by_user: Dict[int, Dict[int, Alert]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._bot: Optional[Bot] = None
+        self.triggered = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+
+    async def start(self, bot: Bot, owns_chat: Optional[Callable[[int], bool]] = None) -> None:
+        """Load stored alerts, evaluate them on every market snapshot and
+        start delivering notifications through ``bot``.
+
+        Args:
+            bot: Bot used to send notifications
+            owns_chat: When running as one of several workers, returns whether
+                a chat is served by this worker; only those chats' alerts are loaded
+        """
+        self._bot = bot
+        self._alerts.clear()
+        self._by_coin.clear()
+        self._by_user.clear()
+        for alert in await self.store.load_all():
+            if owns_chat is None or owns_chat(alert.chat_id):
+                self._index(alert)
+        self._queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        market_snapshot.add_listener(self.evaluate)
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._deliver()) for _ in range(self.DELIVERY_WORKERS)]
+        logging.info(f"Alert engine started with {len(self._alerts)} alerts on {len(self._by_coin)} coins")
+
+    async def stop(self) -> None:
+        """Stop delivering notifications; undelivered ones are dropped."""
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        pending = self._queue.qsize() if self._queue else 0
+        if pending:
+            logging.warning(f"Alert engine stopped with {pending} undelivered notifications")
+
+    def _index(self, alert: Alert) -> None:
+        self._alerts[alert.id] = alert
+        self._by_user.setdefault(alert.user_id, {})[alert.id] = alert
+        self._by_coin.setdefault(alert.coin_id, _CoinAlerts()).add(alert)
+
+    def _unindex(self, alert: Alert) -> None:
+        self._alerts.pop(alert.id, None)
+        user_alerts = self._by_user.get(alert.user_id)
+        if user_alerts is not None:
+            user_alerts.pop(alert.id, None)
+            if not user_alerts:
+                del self._by_user[alert.user_id]
+        coin_alerts = self._by_coin.get(alert.coin_id)
+        if coin_alerts is not None:
+            coin_alerts.discard(alert)
+            if not len(coin_alerts):
+                del self._by_coin[alert.coin_id]
+
+    def get_user_alerts(self, user_id: int) -> List[Alert]:
+        """Return a user's alerts, oldest first."""
+        return sorted(self._by_user.get(user_id, {}).values(), key=lambda alert: alert.id)
+
+    @staticmethod
+    def _condition_met(kind: str, threshold: float, coin: Ticker) -> bool:
+        if kind == ALERT_ABOVE:
+            return coin.price_usd >= threshold
+        if kind == ALERT_BELOW:
+            return coin.price_usd <= threshold
+        return abs(coin.percent_change_1h) >= threshold
+
+    async def add_alert(self, user_id: int, chat_id: int, coin: Ticker, kind: str, threshold: float) -> Alert:
+        """Create an alert for a user.
+
+        An alert whose condition already holds starts disarmed, so it fires
+        on the next crossing instead of immediately.
+
+        Args:
+            user_id: Telegram user id owning the alert
+            chat_id: Chat notifications are sent to
+            coin: Ticker of the coin
+            kind: One of ALERT_ABOVE, ALERT_BELOW, ALERT_MOVE_1H
+            threshold: Price in USD, or percent for ALERT_MOVE_1H
+
+        Returns:
+            The stored alert
+
+        Raises:
+            AlertError: If the threshold is invalid or the user has too many alerts
+        """
+        if threshold <= 0:
+            raise AlertError("The threshold must be a positive number.")
+        if len(self._by_user.get(user_id, {})) >= self.MAX_ALERTS_PER_USER:
+            raise AlertError(f"You can have at most {self.MAX_ALERTS_PER_USER} alerts. Delete one first.")
+
+        armed = not self._condition_met(kind, threshold, coin)
+        alert = await self.store.create(user_id, chat_id, coin.id, kind, threshold, armed)
+        self._index(alert)
+        return alert
+
+    async def remove_alert(self, user_id: int, alert_id: int) -> bool:
+        """Delete one of a user's alerts.
+
+        Returns:
+            True if the alert existed and belonged to the user
+        """
+        alert = self._by_user.get(user_id, {}).get(alert_id)
+        if alert is None:
+            return False
+        self._unindex(alert)
+        await self.store.delete(alert_id, user_id)
+        return True
+
+    async def evaluate(self, snapshot: MarketSnapshot) -> None:
+        """Snapshot listener running one pass over all alerts."""
+        started = time.perf_counter()
+        now = time.time()
+        changed: List[Alert] = []
+        fired_count = 0
+
+        for coin_id, coin_alerts in self._by_coin.items():
+            coin = snapshot.by_id.get(coin_id)
+            if coin is None:
+                continue
+            fired, rearmed = coin_alerts.evaluate(
+                coin.price_usd,
+                coin.percent_change_1h,
+                self.HYSTERESIS,
+                self.MOVE_REARM_RATIO,
+            )
+            for alert_id in fired:
+                alert = self._alerts[alert_id]
+                alert.armed = False
+                alert.last_triggered_at = now
+                changed.append(alert)
+                self._enqueue(alert.chat_id, self.format_notification(alert, coin))
+            for alert_id in rearmed:
+                alert = self._alerts[alert_id]
+                alert.armed = True
+                changed.append(alert)
+            fired_count += len(fired)
+
+        self.triggered += fired_count
+        if changed:
+            await self.store.save_states(changed)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logging.info(
+            f"Evaluated {len(self._alerts)} alerts against snapshot v{snapshot.version} "
+            f"in {elapsed_ms:.1f} ms: {fired_count} fired"
+        )
+
+    @staticmethod
+    def format_notification(alert: Alert, coin: Ticker) -> str:
+        """Build the notification text for a fired alert."""
+        name = coin.name
+        symbol = coin.symbol
+        price_text = format_price(coin.price_usd)
+        threshold_text = format_price(alert.threshold)
+
+        if alert.kind == ALERT_ABOVE:
+            return f"🔔 {name} ({symbol}) rose above {threshold_text}\n💰 Price: {price_text}"
+        if alert.kind == ALERT_BELOW:
+            return f"🔔 {name} ({symbol}) fell below {threshold_text}\n💰 Price: {price_text}"
+        change = coin.percent_change_1h
+        return (
+            f"🔔 {name} ({symbol}) moved {change:+.2f}% in the last hour "
+            f"(alert at {alert.threshold:g}%)\n💰 Price: {price_text}"
+        )
+
+    def _enqueue(self, chat_id: int, text: str) -> None:
+        if self._queue is None:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait((chat_id, text))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logging.warning(f"Alert queue full, dropping notification for chat {chat_id}")
+
+    async def _deliver(self) -> None:
+        # Alerts are fan-out: queue them behind replies to users' own actions
+        send_priority.set(PRIORITY_BROADCAST)
+        while True:
+            chat_id, text = await self._queue.get()
+            try:
+                await self._bot.send_message(chat_id, text)
+                self.delivered += 1
+            except Exception as e:
+                self.failed += 1
+                logging.warning(f"Failed to deliver alert to chat {chat_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, int]:
+        """Return alert and delivery counters."""
+        return {
+            "alerts": len(self._alerts),
+            "coins": len(self._by_coin),
+            "triggered": self.triggered,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queued": self._queue.qsize() if self._queue else 0,
+        }
+
+
+alert_engine = AlertEngine(alerts_store)
@@ -0,0 +1,155 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+from services.price_history import PriceHistoryStore, price_history
+from utils.cache import TTLCache
+from utils.metrics import Histogram
+from utils.singleflight import SingleFlight
+
+
+# Chart range name -> (seconds shown, seconds a rendered chart is reused)
+CHART_RANGES = {
+    "24h": (86400, 300),
+    "7d": (7 * 86400, 3600),
+    "30d": (30 * 86400, 3 * 3600),
+    "1y": (365 * 86400, 86400),
+}
+DEFAULT_CHART_RANGE = "24h"
+
+ChartKey = Tuple[str, str, int]  # (coin id, range name, time bucket)
+
+RENDER_DURATION = Histogram("chart_render_duration_seconds", "Price chart rendering in the worker pool", ["range"])
+
+
+def render_price_chart(title: str, times: List[int], prices: List[float]) -> bytes:
+    """Draw a price line chart and return it as PNG bytes.
+
+    Runs in a worker process. matplotlib is imported here so the bot
+    itself never loads it, and the object-oriented Figure API is used
+    instead of pyplot, which keeps global state.
+    """
+    from datetime import datetime, timezone
+
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    dates = [datetime.fromtimestamp(t, tz=timezone.utc) for t in times]
+    color = "#16c784" if prices[-1] >= prices[0] else "#ea3943"
+
+    figure = Figure(figsize=(8, 4), dpi=100)
+    axes = figure.subplots()
+    axes.plot(dates, prices, color=color, linewidth=1.6)
+    axes.fill_between(dates, prices, min(prices), color=color, alpha=0.12)
+    axes.set_title(title)
+    axes.set_ylabel("USD")
+    axes.grid(alpha=0.3)
+    axes.margins(x=0)
+    figure.autofmt_xdate()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+
+class ChartRenderer:
+    """Renders price charts from local history without blocking the event loop.
+
+    Charts are drawn in a small process pool. A rendered chart is cached
+    under (coin, range, time bucket), where the bucket changes once per
+    range-specific interval; after the first upload the cached PNG is
+    replaced by Telegram's file_id, so repeat views in any chat cost
+    neither rendering nor upload. Concurrent requests for the same chart
+    share one render.
+    """
+
+    MAX_POINTS = 720  # longer series are thinned before rendering
+    MAX_WORKERS = 2
+
+    def __init__(self, history: PriceHistoryStore):
+        self.history = history
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache = TTLCache(max_size=512, default_ttl=86400, name="charts")
+        self._inflight = SingleFlight()
+        self.rendered = 0
+        self.reused = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers do not inherit the bot's event loop, sockets or threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.MAX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def cache_key(coin_id: str, range_name: str) -> ChartKey:
+        """Return the cache key of a coin's chart for the current time bucket."""
+        reuse_seconds = CHART_RANGES[range_name][1]
+        return str(coin_id), range_name, int(time.time()) // reuse_seconds
+
+    async def get_chart(self, coin_id: str, coin_name: str,
+                        range_name: str) -> Tuple[ChartKey, Optional[Union[str, bytes]]]:
+        """Return a chart as a Telegram file_id if uploaded before, else as PNG bytes.
+
+        Args:
+            coin_id: CoinLore coin id
+            coin_name: Name shown in the chart title
+            range_name: One of CHART_RANGES
+
+        Returns:
+            Tuple of (cache key, chart), the chart being a file_id string,
+            PNG bytes, or None if there is not enough history
+        """
+        key = self.cache_key(coin_id, range_name)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.reused += 1
+            return key, cached
+        return key, await self._inflight.do(key, lambda: self._render(key, coin_name))
+
+    async def _render(self, key: ChartKey, coin_name: str) -> Optional[bytes]:
+        coin_id, range_name, _ = key
+        seconds = CHART_RANGES[range_name][0]
+        times, prices = self.history.get_range(coin_id, int(time.time()) - seconds)
+        if len(times) < 2:
+            return None
+
+        step = -(-len(times) // self.MAX_POINTS)
+        if step > 1:
+            # Keep the latest point so the chart ends at the current price
+            times, prices = times[::-1][::step][::-1], prices[::-1][::step][::-1]
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        png = await loop.run_in_executor(
+            self._get_executor(), render_price_chart, f"{coin_name} - {range_name}", times, prices
+        )
+        elapsed = time.perf_counter() - started
+        self.rendered += 1
+        RENDER_DURATION.observe(elapsed, range_name)
+        logging.info(f"Rendered {range_name} chart of coin {coin_id} in {elapsed * 1000:.0f} ms")
+        self._cache.set(key, png)
+        return png
+
+    def remember_file_id(self, key: ChartKey, file_id: str) -> None:
+        """Replace a cached PNG with the file_id Telegram assigned to it."""
+        self._cache.set(key, file_id)
+
+    def stats(self) -> Dict[str, object]:
+        """Return render counters and cache statistics."""
+        return {"rendered": self.rendered, "reused": self.reused, "cache": self._cache.stats.as_dict()}
+
+
+chart_renderer = ChartRenderer(price_history)
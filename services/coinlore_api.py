@@ -1,6 +1,34 @@
 import aiohttp
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Union
+import time
+from typing import Callable, Dict, List, Optional, Any, Tuple, Union
+
+from services.tickers import Ticker, decode_ticker_list, decode_tickers_page
+from utils import fast_json
+from utils.cache import TTLCache
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.metrics import Counter, Histogram
+from utils.rate_limit import PriorityTokenBucket
+from utils.singleflight import SingleFlight
+
+
+REQUEST_DURATION = Histogram(
+    "coinlore_request_duration_seconds",
+    "CoinLore HTTP calls from sending the request to reading the body",
+    ["endpoint", "status"],
+)
+RESPONSE_BYTES = Counter("coinlore_response_bytes_total", "Response body bytes received from CoinLore", ["endpoint"])
+LIMITER_WAIT = Histogram("coinlore_limiter_wait_seconds", "Time calls waited for the outbound rate limiter", ["lane"])
+SKIPPED = Counter("coinlore_requests_skipped_total", "Calls not sent upstream", ["endpoint", "reason"])
+
+
+class CoinloreAPIError(Exception):
+    """Raised when a Coinlore API request fails or returns invalid data."""
+
+
+class CoinloreThrottledError(CoinloreAPIError):
+    """Raised when a request waited too long for the outbound rate limiter."""
 
 
 class CoinloreAPI:
@@ -9,43 +37,282 @@ class CoinloreAPI:
     # Updated to the correct API URL
     BASE_URL = "https://api.coinlore.com"
     
-    @staticmethod
-    async def _make_request(endpoint: str) -> Union[Dict, List, None]:
+    # Connection pool tuning for the shared client session
+    POOL_LIMIT = 100
+    POOL_LIMIT_PER_HOST = 20
+    DNS_CACHE_TTL = 300  # seconds
+    KEEPALIVE_TIMEOUT = 30  # seconds
+    REQUEST_TIMEOUT = 15  # seconds
+    
+    # Response cache TTLs per endpoint path: (fresh seconds, stale seconds).
+    # Stale responses are served instantly while one background refresh runs.
+    CACHE_TTLS: Dict[str, Tuple[float, float]] = {
+        "/api/global/": (60, 120),
+        "/api/tickers/": (60, 120),
+        "/api/ticker/": (30, 90),
+        "/api/coin/markets/": (120, 300),
+        "/api/exchanges/": (300, 600),
+        "/api/exchange/": (300, 600),
+        "/api/coin/social_stats/": (900, 1800),
+    }
+    DEFAULT_CACHE_TTL: Tuple[float, float] = (60, 60)
+    
+    # Response decoders per endpoint path, applied once when a response
+    # arrives so the cache and every caller share the decoded records
+    DECODERS: Dict[str, Callable[[Any], Any]] = {
+        "/api/tickers/": decode_tickers_page,
+        "/api/ticker/": decode_ticker_list,
+    }
+    CACHE_MAX_SIZE = 512
+    
+    # Batched ticker lookups: /api/ticker/?id= accepts comma-separated ids
+    TICKER_BATCH_MAX_IDS = 50
+    TICKER_BATCH_MAX_URL_LENGTH = 1800  # characters, well below common URL limits
+    TICKER_BATCH_CONCURRENCY = 4
+    
+    # Outbound rate limit shared by all calls. User-facing requests have
+    # priority over background refreshes, which must also leave a reserve.
+    RATE_LIMIT_PER_SECOND = 10
+    RATE_LIMIT_BURST = 20
+    RATE_LIMIT_BACKGROUND_RESERVE = 5
+    RATE_LIMIT_MAX_WAIT = 3.0  # seconds a user-facing request may wait
+    PRIORITY_INTERACTIVE = 0
+    PRIORITY_BACKGROUND = 1
+    
+    # Circuit breaker: stop calling CoinLore when too many calls fail
+    BREAKER_FAILURE_THRESHOLD = 0.5
+    BREAKER_MIN_CALLS = 10
+    BREAKER_WINDOW = 30  # seconds
+    BREAKER_OPEN_SECONDS = 30
+    
+    _session: Optional[aiohttp.ClientSession] = None
+    _cache = TTLCache(max_size=CACHE_MAX_SIZE, name="coinlore")
+    _inflight = SingleFlight()
+    _limiter = PriorityTokenBucket(
+        RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, reserve=RATE_LIMIT_BACKGROUND_RESERVE
+    )
+    _breaker = CircuitBreaker(
+        "coinlore",
+        failure_threshold=BREAKER_FAILURE_THRESHOLD,
+        min_calls=BREAKER_MIN_CALLS,
+        window=BREAKER_WINDOW,
+        open_seconds=BREAKER_OPEN_SECONDS,
+    )
+    _stale_served = 0
+    
+    @classmethod
+    async def start(cls, rate_share: float = 1.0, base_url: Optional[str] = None) -> None:
+        """Create the shared client session used by every API call.
+        
+        Called once on bot startup. Safe to call again; an already open
+        session is kept.
+        
+        Args:
+            rate_share: Share of the CoinLore rate limit this process may use,
+                for when several processes call the API
+            base_url: API root to use instead of the public CoinLore API,
+                e.g. the load-test stand-in server
+        """
+        if base_url:
+            cls.BASE_URL = base_url.rstrip("/")
+        if rate_share != 1.0:
+            cls._limiter = PriorityTokenBucket(
+                cls.RATE_LIMIT_PER_SECOND * rate_share,
+                max(cls.RATE_LIMIT_BURST * rate_share, 1.0),
+                reserve=cls.RATE_LIMIT_BACKGROUND_RESERVE * rate_share,
+            )
+        if cls._session is not None and not cls._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=cls.POOL_LIMIT,
+            limit_per_host=cls.POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=cls.DNS_CACHE_TTL,
+            keepalive_timeout=cls.KEEPALIVE_TIMEOUT,
+        )
+        cls._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=cls.REQUEST_TIMEOUT),
+            raise_for_status=False,
+        )
+        logging.info("CoinLore API session started")
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared client session and release pooled connections."""
+        session, cls._session = cls._session, None
+        if session is not None and not session.closed:
+            await session.close()
+            logging.info("CoinLore API session closed")
+    
+    @classmethod
+    async def _get_session(cls) -> aiohttp.ClientSession:
+        """Return the shared session, creating it lazily if startup was skipped."""
+        if cls._session is None or cls._session.closed:
+            await cls.start()
+        return cls._session
+    
+    @classmethod
+    def cache_stats(cls) -> Dict[str, int]:
+        """Return response cache and request coalescing counters."""
+        return {
+            **cls._cache.stats.as_dict(),
+            "size": len(cls._cache),
+            "inflight_started": cls._inflight.started,
+            "inflight_shared": cls._inflight.shared,
+        }
+    
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Return cache, rate limiter and circuit breaker counters."""
+        return {
+            "cache": cls.cache_stats(),
+            "limiter": cls._limiter.stats(),
+            "breaker": {**cls._breaker.stats(), "stale_served": cls._stale_served},
+        }
+    
+    @classmethod
+    def _cache_ttl(cls, endpoint: str) -> Tuple[float, float]:
+        """Look up the cache TTLs configured for an endpoint's path."""
+        path = endpoint.split("?", 1)[0]
+        return cls.CACHE_TTLS.get(path, cls.DEFAULT_CACHE_TTL)
+    
+    @classmethod
+    async def _make_request(cls, endpoint: str, background: bool = False) -> Union[Dict, List, None]:
         """Make an asynchronous request to the Coinlore API.
         
+        Responses are served from the TTL cache when possible, and concurrent
+        identical requests share a single upstream call. When the upstream
+        call fails, is throttled or short-circuited, the last known response
+        is returned if there is one.
+        
         Args:
             endpoint: API endpoint path
+            background: Request made by a background refresh rather than a
+                user; always goes upstream and is not stored in the cache
             
         Returns:
             Response data as dictionary, list or None if error occurred
         """
-        url = f"{CoinloreAPI.BASE_URL}{endpoint}"
+        ttl, stale_ttl = cls._cache_ttl(endpoint)
         try:
-            logging.info(f"Making API request to: {url}")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        try:
-                            # Attempt to parse JSON regardless of Content-Type
-                            result = await response.json(content_type=None)
-                            logging.info(f"API response successful, content type: {response.content_type}")
-                            return result
-                        except Exception as e:
-                            # If parsing fails, log it and return None
-                            logging.error(f"Failed to parse JSON from {url}: {str(e)}")
-                            
-                            # Debug: Log the response content
-                            text = await response.text()
-                            logging.debug(f"Response content: {text[:200]}...")  # Log first 200 chars
-                            
-                            return None
-                    else:
-                        logging.error(f"API request failed: {url}, status: {response.status}")
-                        return None
+            if background:
+                return await cls._fetch_shared(endpoint, background=True)
+            return await cls._cache.get_or_fetch(
+                endpoint,
+                lambda: cls._fetch_shared(endpoint),
+                ttl=ttl,
+                stale_ttl=stale_ttl,
+                refresher=lambda: cls._fetch_shared(endpoint, background=True),
+            )
+        except (CoinloreAPIError, CircuitOpenError) as e:
+            last_known = None if background else cls._cache.peek(endpoint)
+            if last_known is not None:
+                cls._stale_served += 1
+                logging.warning(f"{e}; serving last known response for {endpoint}")
+                return last_known
+            logging.error(str(e))
+            return None
         except Exception as e:
-            logging.error(f"Error making API request to {url}: {str(e)}")
+            logging.error(f"Error making API request to {cls.BASE_URL}{endpoint}: {str(e)}")
             return None
     
+    @classmethod
+    async def _fetch_shared(cls, endpoint: str, background: bool = False) -> Union[Dict, List]:
+        """Fetch an endpoint, joining an identical request already in flight.
+        
+        Calls only join requests of their own rate limiter lane: a user call
+        must not wait without a deadline behind a background request, and a
+        background refresh must not inherit a user call's throttling error.
+        """
+        return await cls._inflight.do((endpoint, background), lambda: cls._fetch(endpoint, background))
+    
+    @classmethod
+    async def _fetch(cls, endpoint: str, background: bool = False) -> Union[Dict, List]:
+        """Fetch an endpoint from the Coinlore API, bypassing the cache.
+        
+        The call goes through the circuit breaker and the outbound rate
+        limiter, in the background lane if ``background`` is set.
+        
+        Args:
+            endpoint: API endpoint path
+            background: Use the low-priority rate limiter lane
+            
+        Returns:
+            Response data as dictionary or list, tickers decoded into Ticker records
+            
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            CoinloreThrottledError: If the rate limiter did not admit the call in time
+            CoinloreAPIError: If the request fails or the body is not JSON
+        """
+        url = f"{cls.BASE_URL}{endpoint}"
+        path = endpoint.split("?", 1)[0]
+        if not cls._breaker.allow():
+            SKIPPED.inc(path, "circuit_open")
+            raise CircuitOpenError(f"CoinLore circuit breaker open, skipped request to {url}")
+        # A half-open probe that is dropped or cancelled before the upstream
+        # answers must free its slot
+        is_probe = cls._breaker.state == CircuitBreaker.HALF_OPEN
+        
+        waiting_since = time.perf_counter()
+        try:
+            if background:
+                admitted = await cls._limiter.acquire(cls.PRIORITY_BACKGROUND)
+            else:
+                admitted = await cls._limiter.acquire(cls.PRIORITY_INTERACTIVE, timeout=cls.RATE_LIMIT_MAX_WAIT)
+        except asyncio.CancelledError:
+            if is_probe:
+                cls._breaker.cancel_probe()
+            raise
+        LIMITER_WAIT.observe(time.perf_counter() - waiting_since, "background" if background else "interactive")
+        if not admitted:
+            if is_probe:
+                cls._breaker.cancel_probe()
+            SKIPPED.inc(path, "throttled")
+            raise CoinloreThrottledError(f"Rate limited, skipped request to {url}")
+        
+        logging.info(f"Making API request to: {url}")
+        started = time.perf_counter()
+        status = "error"
+        try:
+            session = await cls._get_session()
+            async with session.get(url) as response:
+                status = str(response.status)
+                if response.status != 200:
+                    # Throttling and server errors mean the upstream is unhealthy
+                    if response.status == 429 or response.status >= 500:
+                        cls._breaker.record_failure()
+                    else:
+                        cls._breaker.record_success()
+                    raise CoinloreAPIError(f"API request failed: {url}, status: {response.status}")
+                body = await response.read()
+                RESPONSE_BYTES.inc(path, amount=len(body))
+                try:
+                    # Parse JSON regardless of Content-Type
+                    result = fast_json.loads(body)
+                except ValueError as e:
+                    status = "invalid_json"
+                    cls._breaker.record_failure()
+                    # Debug: Log the response content
+                    logging.debug(f"Response content: {body[:200]!r}...")  # Log first 200 bytes
+                    raise CoinloreAPIError(f"Failed to parse JSON from {url}: {str(e)}") from e
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+            cls._breaker.record_failure()
+            raise CoinloreAPIError(f"Error making API request to {url}: {str(e)}") from e
+        except asyncio.CancelledError:
+            status = "cancelled"
+            if is_probe:
+                cls._breaker.cancel_probe()
+            raise
+        finally:
+            REQUEST_DURATION.observe(time.perf_counter() - started, path, status)
+        
+        cls._breaker.record_success()
+        logging.info(f"API response successful, content type: {response.content_type}")
+        decoder = cls.DECODERS.get(path)
+        return decoder(result) if decoder else result
+    
     @classmethod
     async def get_global_stats(cls) -> Optional[List]:
         """Get global cryptocurrency statistics.
@@ -56,42 +323,105 @@ class CoinloreAPI:
         return await cls._make_request("/api/global/")
     
     @classmethod
-    async def get_tickers(cls, start: int = 0, limit: int = 100) -> Optional[List]:
+    async def get_tickers(cls, start: int = 0, limit: int = 100, background: bool = False) -> Optional[Dict]:
         """Get information about multiple cryptocurrencies.
         
         Args:
             start: Offset for pagination
             limit: Number of results to return (max 100)
+            background: Fetch for a background refresh, bypassing the cache
             
         Returns:
-            List of cryptocurrency data dictionaries or None if error occurred
+            Dictionary with the Ticker list under 'data' and totals
+            under 'info', or None if error occurred
         """
-        return await cls._make_request(f"/api/tickers/?start={start}&limit={limit}")
+        return await cls._make_request(f"/api/tickers/?start={start}&limit={limit}", background=background)
     
     @classmethod
-    async def get_ticker(cls, coin_id: str) -> Optional[Dict]:
+    async def get_ticker(cls, coin_id: str) -> Optional[Ticker]:
         """Get information about a specific cryptocurrency.
         
         Args:
             coin_id: ID of the cryptocurrency
             
         Returns:
-            Dictionary with cryptocurrency data or None if error occurred
+            Ticker of the cryptocurrency or None if error occurred
         """
         result = await cls._make_request(f"/api/ticker/?id={coin_id}")
         return result[0] if result and isinstance(result, list) and len(result) > 0 else None
     
     @classmethod
-    async def get_coin_markets(cls, coin_id: str) -> Optional[List]:
+    async def get_tickers_by_ids(cls, coin_ids: List[str]) -> List[Ticker]:
+        """Get information about several cryptocurrencies at once.
+        
+        IDs are split into URL-size-safe batches which are fetched
+        concurrently with a bounded number of requests in flight.
+        
+        Args:
+            coin_ids: IDs of the cryptocurrencies
+            
+        Returns:
+            List of Tickers in the order of coin_ids; coins that could not
+            be retrieved are left out
+        """
+        unique_ids = list(dict.fromkeys(str(coin_id) for coin_id in coin_ids))
+        if not unique_ids:
+            return []
+        
+        semaphore = asyncio.Semaphore(cls.TICKER_BATCH_CONCURRENCY)
+        
+        async def fetch_batch(batch: List[str]) -> Optional[List]:
+            async with semaphore:
+                return await cls._make_request(f"/api/ticker/?id={','.join(batch)}")
+        
+        results = await asyncio.gather(*(fetch_batch(batch) for batch in cls._batch_ids(unique_ids)))
+        
+        tickers_by_id = {}
+        for result in results:
+            if not isinstance(result, list):
+                continue
+            for ticker in result:
+                tickers_by_id[ticker.id] = ticker
+        
+        return [tickers_by_id[coin_id] for coin_id in unique_ids if coin_id in tickers_by_id]
+    
+    @classmethod
+    def _batch_ids(cls, coin_ids: List[str]) -> List[List[str]]:
+        """Split IDs into batches that respect the id count and URL length limits.
+        
+        IDs are sorted first so the same set of coins always produces the
+        same endpoints, which keeps batched responses cacheable.
+        """
+        base_length = len(f"{cls.BASE_URL}/api/ticker/?id=")
+        batches: List[List[str]] = []
+        batch: List[str] = []
+        length = base_length
+        
+        for coin_id in sorted(coin_ids, key=lambda x: (len(x), x)):
+            added = len(coin_id) + (1 if batch else 0)
+            if batch and (len(batch) >= cls.TICKER_BATCH_MAX_IDS
+                          or length + added > cls.TICKER_BATCH_MAX_URL_LENGTH):
+                batches.append(batch)
+                batch, length, added = [], base_length, len(coin_id)
+            batch.append(coin_id)
+            length += added
+        
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    @classmethod
+    async def get_coin_markets(cls, coin_id: str, background: bool = False) -> Optional[List]:
         """Get top 50 markets for a specific cryptocurrency.
         
         Args:
             coin_id: ID of the cryptocurrency
+            background: Fetch for a background refresh, bypassing the cache
             
         Returns:
             List of market data dictionaries or None if error occurred
         """
-        return await cls._make_request(f"/api/coin/markets/?id={coin_id}")
+        return await cls._make_request(f"/api/coin/markets/?id={coin_id}", background=background)
     
     @classmethod
     async def get_exchanges(cls) -> Optional[List]:
@@ -116,13 +446,14 @@ class CoinloreAPI:
         return await cls._make_request(f"/api/exchange/?id={exchange_id}")
     
     @classmethod
-    async def get_coin_social_stats(cls, coin_id: str) -> Optional[Dict]:
+    async def get_coin_social_stats(cls, coin_id: str, background: bool = False) -> Optional[Dict]:
         """Get social media statistics for a specific cryptocurrency.
         
         Args:
             coin_id: ID of the cryptocurrency
+            background: Fetch for a background prefetch, bypassing the cache
             
         Returns:
             Dictionary with social statistics or None if error occurred
         """
-        return await cls._make_request(f"/api/coin/social_stats/?id={coin_id}")
\ No newline at end of file
+        return await cls._make_request(f"/api/coin/social_stats/?id={coin_id}", background=background)
\ No newline at end of file
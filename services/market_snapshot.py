@@ -0,0 +1,255 @@
+import asyncio
+import inspect
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from services.coinlore_api import CoinloreAPI
+from services.tickers import Ticker, rank_key
+from utils.metrics import Gauge
+
+
+class MarketSnapshot:
+    """Read-only view of the whole coin universe at one point in time.
+
+    A snapshot is never modified after it is built; the service replaces it
+    as a whole on every refresh, so readers always see a consistent set.
+    """
+
+    __slots__ = ("coins", "by_id", "version", "fetched_at")
+
+    def __init__(self, coins: List[Ticker], version: int, fetched_at: float):
+        """
+        Args:
+            coins: Tickers as returned by /api/tickers/
+            version: Monotonic snapshot number, bumped on every refresh
+            fetched_at: Unix time the data was fetched
+        """
+        self.coins = tuple(sorted(coins, key=rank_key))
+        self.by_id: Dict[str, Ticker] = {coin.id: coin for coin in self.coins}
+        self.version = version
+        self.fetched_at = fetched_at
+
+    def __len__(self) -> int:
+        return len(self.coins)
+
+    def get(self, coin_id: str) -> Optional[Ticker]:
+        """Return the ticker for a coin id, or None if it is unknown."""
+        return self.by_id.get(str(coin_id))
+
+    def page(self, start: int, limit: int) -> List[Ticker]:
+        """Return ``limit`` coins in rank order starting at offset ``start``."""
+        return list(self.coins[start:start + limit])
+
+
+SnapshotListener = Callable[[MarketSnapshot], Union[Awaitable[None], None]]
+
+
+class MarketSnapshotService:
+    """Keeps an in-memory snapshot of every ticker, refreshed in the background.
+
+    The service pages through /api/tickers/ on a fixed interval and swaps in a
+    new MarketSnapshot once all pages are in, so handlers can read tickers
+    without waiting for CoinLore and upstream load no longer grows with user
+    traffic. Reads fall back to the API while no snapshot is available.
+    """
+
+    PAGE_SIZE = 100  # maximum allowed by /api/tickers/
+
+    def __init__(self, interval: float = 60.0, concurrency: int = 4, max_coins: int = 0):
+        """
+        Args:
+            interval: Seconds between refreshes
+            concurrency: Maximum number of pages fetched at once
+            max_coins: Stop after this many coins (0 fetches the whole universe)
+        """
+        self.interval = interval
+        self.concurrency = concurrency
+        self.max_coins = max_coins
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._version = 0
+        self._listeners: List[SnapshotListener] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> Optional[MarketSnapshot]:
+        """The current snapshot, or None before the first refresh succeeds."""
+        return self._snapshot
+
+    def add_listener(self, listener: SnapshotListener) -> None:
+        """Call ``listener(snapshot)`` after every successful refresh.
+
+        Listeners may be plain functions or coroutine functions. Adding a
+        listener that is already registered does nothing, so services that
+        are started again do not get every snapshot twice.
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    async def start(self, interval: Optional[float] = None, max_coins: Optional[int] = None) -> None:
+        """Start the background refresh loop.
+
+        Args:
+            interval: Override the refresh interval in seconds
+            max_coins: Override the maximum number of coins fetched
+        """
+        if interval is not None:
+            self.interval = interval
+        if max_coins is not None:
+            self.max_coins = max_coins
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logging.info(f"Market snapshot poller started (interval {self.interval}s)")
+
+    async def stop(self) -> None:
+        """Stop the background refresh loop."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            logging.info("Market snapshot poller stopped")
+
+    async def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.error(f"Market snapshot refresh failed: {e}")
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(self.interval - elapsed, 1.0))
+
+    async def refresh(self) -> Optional[MarketSnapshot]:
+        """Fetch the coin universe and publish it as a new snapshot.
+
+        If any page fails the previous snapshot is kept, so readers never see
+        a universe with holes in it (unless there is no previous snapshot).
+
+        Returns:
+            The new snapshot, or None if the refresh was abandoned
+        """
+        first_page = await CoinloreAPI.get_tickers(0, self.PAGE_SIZE, background=True)
+        if not isinstance(first_page, dict) or not first_page.get('data'):
+            logging.warning("Market snapshot refresh skipped: first tickers page unavailable")
+            return None
+
+        coins = list(first_page['data'])
+        total = int((first_page.get('info') or {}).get('coins_num') or len(coins))
+        if self.max_coins:
+            total = min(total, self.max_coins)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_page(start: int) -> Optional[Dict]:
+            async with semaphore:
+                return await CoinloreAPI.get_tickers(start, self.PAGE_SIZE, background=True)
+
+        pages = await asyncio.gather(*(
+            fetch_page(start) for start in range(self.PAGE_SIZE, total, self.PAGE_SIZE)
+        ))
+
+        complete = True
+        for page in pages:
+            if isinstance(page, dict) and isinstance(page.get('data'), list):
+                coins.extend(page['data'])
+            else:
+                complete = False
+
+        if not complete and self._snapshot is not None:
+            logging.warning("Market snapshot refresh incomplete, keeping previous snapshot")
+            return None
+
+        if self.max_coins:
+            coins = coins[:self.max_coins]
+
+        return await self.publish(
+            [coin for coin in coins if isinstance(coin, Ticker)], self._version + 1, time.time()
+        )
+
+    async def publish(self, coins: List[Ticker], version: int, fetched_at: float) -> MarketSnapshot:
+        """Install a new snapshot and notify the listeners.
+
+        Used by ``refresh`` and by worker processes receiving snapshots
+        fetched by the supervisor.
+
+        Args:
+            coins: Tickers of the whole universe
+            version: Snapshot number
+            fetched_at: Unix time the data was fetched
+        """
+        self._version = version
+        snapshot = MarketSnapshot(coins, version, fetched_at)
+        # Publishing is a single reference swap; readers never see a half-built snapshot
+        self._snapshot = snapshot
+        logging.info(f"Market snapshot v{snapshot.version} published with {len(snapshot)} coins")
+
+        await self._notify(snapshot)
+        return snapshot
+
+    async def _notify(self, snapshot: MarketSnapshot) -> None:
+        for listener in self._listeners:
+            try:
+                result = listener(snapshot)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logging.error(f"Market snapshot listener {listener!r} failed: {e}")
+
+    def get_coin(self, coin_id: str) -> Optional[Ticker]:
+        """Return a coin from the current snapshot without any upstream call."""
+        snapshot = self._snapshot
+        return snapshot.get(coin_id) if snapshot else None
+
+    def snapshot_of(self, coin: Ticker) -> Optional[MarketSnapshot]:
+        """Return the current snapshot if the ticker was taken from it, else None."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.by_id.get(coin.id) is coin:
+            return snapshot
+        return None
+
+    def get_page(self, start: int, limit: int) -> Optional[List[Ticker]]:
+        """Return a rank-ordered page from the snapshot, or None if unavailable."""
+        snapshot = self._snapshot
+        if snapshot is None or start >= len(snapshot):
+            return None
+        return snapshot.page(start, limit)
+
+    async def get_ticker(self, coin_id: str) -> Optional[Ticker]:
+        """Return a coin from the snapshot, falling back to the API."""
+        return self.get_coin(coin_id) or await CoinloreAPI.get_ticker(coin_id)
+
+    async def get_tickers_by_ids(self, coin_ids: List[str]) -> List[Ticker]:
+        """Return several coins from the snapshot, fetching only missing ones.
+
+        Returns:
+            Tickers in the order of coin_ids; unknown coins are left out
+        """
+        found = {}
+        missing = []
+        for coin_id in coin_ids:
+            coin = self.get_coin(coin_id)
+            if coin is not None:
+                found[str(coin_id)] = coin
+            else:
+                missing.append(str(coin_id))
+
+        if missing:
+            for coin in await CoinloreAPI.get_tickers_by_ids(missing):
+                found[coin.id] = coin
+
+        return [found[str(coin_id)] for coin_id in coin_ids if str(coin_id) in found]
+
+
+market_snapshot = MarketSnapshotService()
+
+Gauge(
+    "market_snapshot_age_seconds", "Seconds since the current market snapshot was fetched",
+    function=lambda: time.time() - market_snapshot.snapshot.fetched_at if market_snapshot.snapshot else float("nan"),
+)
+Gauge(
+    "market_snapshot_coins", "Coins in the current market snapshot",
+    function=lambda: len(market_snapshot.snapshot) if market_snapshot.snapshot else 0,
+)
@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Set, Tuple
+
+from services.market_snapshot import MarketSnapshot, market_snapshot
+
+
+class _Series:
+    """One downsampled price series in two packed columns (int64 times, float64 prices)."""
+
+    __slots__ = ("times", "prices")
+
+    def __init__(self):
+        self.times = array("q")
+        self.prices = array("d")
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def add(self, bucket: int, price: float) -> None:
+        """Record a price for a bucket; the last price seen in a bucket wins."""
+        if self.times and self.times[-1] == bucket:
+            self.prices[-1] = price
+        elif not self.times or self.times[-1] < bucket:
+            self.times.append(bucket)
+            self.prices.append(price)
+
+    def trim(self, oldest: int) -> None:
+        """Drop every point older than ``oldest``."""
+        cut = bisect_left(self.times, oldest)
+        if cut:
+            del self.times[:cut]
+            del self.prices[:cut]
+
+
+class PriceTier:
+    """Resolution and retention of one downsampling tier."""
+
+    __slots__ = ("name", "resolution", "retention")
+
+    def __init__(self, name: str, resolution: int, retention: int):
+        """
+        Args:
+            name: Tier name, e.g. "1m"
+            resolution: Bucket width in seconds
+            retention: Seconds of history kept
+        """
+        self.name = name
+        self.resolution = resolution
+        self.retention = retention
+
+
+class PriceHistoryStore:
+    """Local price history of the top coins, fed by the market snapshot.
+
+    Every snapshot tick is folded into three tiers (1 minute for a day,
+    1 hour for 90 days, 1 day for 5 years), each kept per coin as two packed
+    arrays sorted by time, so a range query is two bisects and a slice.
+    Points older than a tier's retention are trimmed in batches. The store
+    is checkpointed to one small binary file per coin on an interval and on
+    shutdown, so history survives restarts (at most one interval is lost on
+    a crash).
+    """
+
+    TIERS = (
+        PriceTier("1m", 60, 24 * 3600),
+        PriceTier("1h", 3600, 90 * 24 * 3600),
+        PriceTier("1d", 86400, 5 * 365 * 24 * 3600),
+    )
+    # Expired points are only trimmed once this share of a tier has expired
+    TRIM_SLACK = 0.1
+
+    FILE_MAGIC = b"PHS1"
+    FILE_HEADER = struct.Struct("<4sH")
+    TIER_HEADER = struct.Struct("<I")
+
+    def __init__(self, path: str = "price_history", max_coins: int = 500, save_interval: float = 300.0):
+        """
+        Args:
+            path: Directory holding one history file per coin
+            max_coins: Number of top-ranked coins whose history is kept
+            save_interval: Seconds between checkpoints to disk
+        """
+        self.path = path
+        self.max_coins = max_coins
+        self.save_interval = save_interval
+        self._series: Dict[str, Tuple[_Series, ...]] = {}
+        self._dirty: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._listening = False
+        self.persist = True
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    async def start(self, path: Optional[str] = None, max_coins: Optional[int] = None,
+                    persist: bool = True) -> None:
+        """Load stored history, subscribe to the market snapshot and start checkpointing.
+
+        Args:
+            path: Override the history directory
+            max_coins: Override the number of coins tracked
+            persist: Write checkpoints; when several worker processes keep the
+                same history, only one of them should
+        """
+        if path is not None:
+            self.path = path
+        if max_coins is not None:
+            self.max_coins = max_coins
+        self.persist = persist
+
+        loop = asyncio.get_running_loop()
+        self._series = await loop.run_in_executor(None, self._load_all)
+        logging.info(f"Price history loaded for {len(self._series)} coins from {self.path}")
+
+        if not self._listening:
+            market_snapshot.add_listener(self.record)
+            self._listening = True
+        if persist and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop checkpointing and write out everything recorded since the last save."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.save()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.save_interval)
+            try:
+                await self.save()
+            except Exception as e:
+                logging.error(f"Failed to save price history: {e}")
+
+    def record(self, snapshot: MarketSnapshot) -> None:
+        """Snapshot listener adding the current price of the top coins."""
+        timestamp = int(snapshot.fetched_at)
+        coins = snapshot.coins[:self.max_coins] if self.max_coins else snapshot.coins
+        for coin in coins:
+            self.add(coin.id, timestamp, coin.price_usd)
+
+    def add(self, coin_id: str, timestamp: int, price: float) -> None:
+        """Fold one price observation into every tier of a coin."""
+        series = self._series.get(coin_id)
+        if series is None:
+            series = self._series[coin_id] = tuple(_Series() for _ in self.TIERS)
+        for tier, tier_series in zip(self.TIERS, series):
+            tier_series.add(timestamp - timestamp % tier.resolution, price)
+            max_points = tier.retention // tier.resolution
+            if len(tier_series) > max_points * (1 + self.TRIM_SLACK):
+                tier_series.trim(timestamp - tier.retention)
+        self._dirty.add(coin_id)
+
+    def _tier_for(self, start: int, now: int) -> int:
+        """Index of the finest tier whose retention reaches back to ``start``."""
+        for index, tier in enumerate(self.TIERS):
+            if now - start <= tier.retention:
+                return index
+        return len(self.TIERS) - 1
+
+    def get_range(self, coin_id: str, start: int, end: Optional[int] = None,
+                  tier: Optional[str] = None) -> Tuple[List[int], List[float]]:
+        """Return the recorded prices of a coin within a time range.
+
+        Args:
+            coin_id: CoinLore coin id
+            start: Unix time of the first point
+            end: Unix time of the last point (defaults to now)
+            tier: Tier name to read; by default the finest tier covering ``start``
+
+        Returns:
+            Tuple of (timestamps, prices) in time order, empty if unknown
+        """
+        series = self._series.get(str(coin_id))
+        if series is None:
+            return [], []
+        now = int(time.time())
+        end = now if end is None else end
+        if tier is None:
+            index = self._tier_for(start, now)
+        else:
+            index = [t.name for t in self.TIERS].index(tier)
+
+        tier_series = series[index]
+        lo = bisect_left(tier_series.times, start)
+        hi = bisect_right(tier_series.times, end)
+        return tier_series.times[lo:hi].tolist(), tier_series.prices[lo:hi].tolist()
+
+    def price_at(self, coin_id: str, timestamp: int) -> Optional[float]:
+        """Return the last recorded price of a coin at or before ``timestamp``."""
+        series = self._series.get(str(coin_id))
+        if series is None:
+            return None
+        index = self._tier_for(timestamp, int(time.time()))
+        for tier_series in series[index:]:
+            i = bisect_right(tier_series.times, timestamp)
+            if i:
+                return tier_series.prices[i - 1]
+        return None
+
+    def change(self, coin_id: str, seconds: int) -> Optional[float]:
+        """Return a coin's percent price change over the last ``seconds``, or None."""
+        series = self._series.get(str(coin_id))
+        if series is None or not series[0]:
+            return None
+        latest = series[0].prices[-1]
+        past = self.price_at(coin_id, int(time.time()) - seconds)
+        if not past:
+            return None
+        return (latest - past) / past * 100
+
+    def _file(self, coin_id: str) -> str:
+        return os.path.join(self.path, f"{coin_id}.bin")
+
+    def _encode(self, series: Tuple[_Series, ...]) -> bytes:
+        parts = [self.FILE_HEADER.pack(self.FILE_MAGIC, len(series))]
+        for tier_series in series:
+            parts.append(self.TIER_HEADER.pack(len(tier_series)))
+            parts.append(tier_series.times.tobytes())
+            parts.append(tier_series.prices.tobytes())
+        return b"".join(parts)
+
+    def _decode(self, data: bytes, name: str = "") -> Optional[Tuple[_Series, ...]]:
+        magic, tier_count = self.FILE_HEADER.unpack_from(data)
+        if magic != self.FILE_MAGIC or tier_count != len(self.TIERS):
+            return None
+        offset = self.FILE_HEADER.size
+        series = []
+        for tier in self.TIERS:
+            tier_series = _Series()
+            series.append(tier_series)
+            # A file cut short (e.g. by a full disk) keeps the points both
+            # columns still hold; tiers past the cut start empty
+            if offset + self.TIER_HEADER.size > len(data):
+                logging.warning(f"Price history file {name} is truncated, tier {tier.name} lost")
+                continue
+            (count,) = self.TIER_HEADER.unpack_from(data, offset)
+            offset += self.TIER_HEADER.size
+            times = data[offset:offset + count * 8]
+            offset += count * 8
+            prices = data[offset:offset + count * 8]
+            offset += count * 8
+            kept = min(len(times), len(prices)) // 8
+            if kept < count:
+                logging.warning(
+                    f"Price history file {name} is truncated, kept {kept} of {count} points of tier {tier.name}"
+                )
+            tier_series.times.frombytes(times[:kept * 8])
+            tier_series.prices.frombytes(prices[:kept * 8])
+        return tuple(series)
+
+    def _load_all(self) -> Dict[str, Tuple[_Series, ...]]:
+        if not os.path.isdir(self.path):
+            return {}
+        loaded = {}
+        for name in os.listdir(self.path):
+            if not name.endswith(".bin"):
+                continue
+            try:
+                with open(os.path.join(self.path, name), "rb") as f:
+                    series = self._decode(f.read(), name)
+            except (OSError, struct.error, ValueError) as e:
+                logging.warning(f"Skipping unreadable price history file {name}: {e}")
+                continue
+            if series is not None:
+                loaded[name[:-len(".bin")]] = series
+        return loaded
+
+    def _write(self, files: Dict[str, bytes]) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        for coin_id, data in files.items():
+            path = self._file(coin_id)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+
+    async def save(self) -> None:
+        """Write the history of every coin changed since the last save."""
+        if not self.persist:
+            return
+        dirty, self._dirty = self._dirty, set()
+        # Coin ids come from the API; never let one escape the history directory
+        files = {
+            coin_id: self._encode(self._series[coin_id])
+            for coin_id in dirty if coin_id in self._series and coin_id.isalnum()
+        }
+        if not files:
+            return
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            await loop.run_in_executor(None, self._write, files)
+        except OSError:
+            self._dirty |= dirty
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logging.info(f"Saved price history of {len(files)} coins in {elapsed_ms:.0f} ms")
+
+
+price_history = PriceHistoryStore()
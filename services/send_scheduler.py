@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup, EditMessageText,
+    ForwardMessage, SendAnimation, SendAudio, SendDocument, SendLocation, SendMediaGroup,
+    SendMessage, SendPhoto, SendPoll, SendSticker, SendVideo, SendVoice, TelegramMethod,
+)
+from aiogram.methods.base import Response, TelegramType
+
+from utils.metrics import Histogram
+from utils.rate_limit import PriorityTokenBucket
+
+
+PRIORITY_INTERACTIVE = 0  # replies to a user's own action
+PRIORITY_BROADCAST = 1  # alerts, digests and other fan-out
+
+# Priority of Telegram sends made from the current task. Handlers run with the
+# default; background senders set PRIORITY_BROADCAST once at the top of their task.
+send_priority: ContextVar[int] = ContextVar("send_priority", default=PRIORITY_INTERACTIVE)
+
+REQUEST_DURATION = Histogram(
+    "telegram_request_duration_seconds",
+    "Bot API calls, not counting time waiting for the send scheduler",
+    ["method", "status"],
+)
+SEND_WAIT = Histogram("telegram_send_wait_seconds", "Time sends waited for the flood limits", ["priority"])
+_PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BROADCAST: "broadcast"}
+
+# Methods that put a message in a chat and count against Telegram's flood limits
+THROTTLED_METHODS = (
+    SendMessage, SendPhoto, SendDocument, SendMediaGroup, SendAnimation, SendVideo,
+    SendAudio, SendVoice, SendSticker, SendLocation, SendPoll, CopyMessage, ForwardMessage,
+    EditMessageText, EditMessageCaption, EditMessageMedia, EditMessageReplyMarkup,
+)
+
+
+class _ChatLimiter:
+    __slots__ = ("bucket", "paused_until")
+
+    def __init__(self, rate: float, burst: float):
+        self.bucket = PriorityTokenBucket(rate, burst)
+        self.paused_until = 0.0
+
+    def idle(self) -> bool:
+        return self.bucket.idle() and self.paused_until <= time.monotonic()
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """Session request middleware pacing every outgoing message.
+
+    Telegram allows about 30 messages per second per bot and about one per
+    second per chat. Each send first waits for its chat's token bucket and
+    then for the global one; both are priority buckets, so interactive
+    replies go ahead of queued broadcasts and broadcasts always leave part of
+    the global rate to interactive traffic. A ``TelegramRetryAfter`` pauses
+    the chat for the requested time and the send is retried.
+    """
+
+    GLOBAL_RATE = 30  # messages per second
+    GLOBAL_BURST = 30
+    BROADCAST_RESERVE = 5  # global tokens broadcasts must leave for replies
+    CHAT_RATE = 1  # messages per second per chat
+    CHAT_BURST = 3
+    MAX_RETRIES = 3
+    MAX_CHATS = 10000  # idle per-chat limiters are pruned past this
+    THROUGHPUT_WINDOW = 60  # seconds
+
+    def __init__(self):
+        self._global = PriorityTokenBucket(self.GLOBAL_RATE, self.GLOBAL_BURST, self.BROADCAST_RESERVE)
+        self._chats: Dict[Union[int, str], _ChatLimiter] = {}
+        self._sent_times: Deque[float] = deque()
+        self.sent = {PRIORITY_INTERACTIVE: 0, PRIORITY_BROADCAST: 0}
+        self.delayed = 0
+        self.retried = 0
+        self.failed = 0
+        self._wait_total = 0.0
+
+    def set_rate_share(self, share: float) -> None:
+        """Limit this process to a share of the bot's global rate.
+
+        Used when several worker processes send for the same bot; per-chat
+        limits stay as they are because each chat is served by one worker.
+        """
+        self._global = PriorityTokenBucket(
+            self.GLOBAL_RATE * share, max(self.GLOBAL_BURST * share, 1.0), self.BROADCAST_RESERVE * share
+        )
+
+    def _chat(self, chat_id: Union[int, str]) -> _ChatLimiter:
+        limiter = self._chats.get(chat_id)
+        if limiter is None:
+            if len(self._chats) >= self.MAX_CHATS:
+                self._prune()
+            limiter = self._chats[chat_id] = _ChatLimiter(self.CHAT_RATE, self.CHAT_BURST)
+        return limiter
+
+    def _prune(self) -> None:
+        for chat_id in [chat_id for chat_id, limiter in self._chats.items() if limiter.idle()]:
+            del self._chats[chat_id]
+
+    async def _acquire(self, chat_id: Optional[Union[int, str]], priority: int) -> None:
+        started = time.monotonic()
+        if chat_id is not None:
+            limiter = self._chat(chat_id)
+            while limiter.paused_until > time.monotonic():
+                await asyncio.sleep(limiter.paused_until - time.monotonic())
+            await limiter.bucket.acquire(priority)
+        await self._global.acquire(priority)
+
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self.delayed += 1
+        self._wait_total += waited
+        SEND_WAIT.observe(waited, _PRIORITY_NAMES.get(priority, str(priority)))
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if not isinstance(method, THROTTLED_METHODS):
+            return await self._timed_request(make_request, bot, method)
+
+        priority = send_priority.get()
+        chat_id = getattr(method, "chat_id", None)
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            await self._acquire(chat_id, priority)
+            try:
+                response = await self._timed_request(make_request, bot, method)
+            except TelegramRetryAfter as e:
+                self.retried += 1
+                if attempt == self.MAX_RETRIES or chat_id is None:
+                    self.failed += 1
+                    raise
+                logging.warning(f"Telegram flood limit hit for chat {chat_id}, retrying in {e.retry_after}s")
+                self._chat(chat_id).paused_until = time.monotonic() + e.retry_after
+                continue
+            except Exception:
+                self.failed += 1
+                raise
+
+            self.sent[priority] = self.sent.get(priority, 0) + 1
+            self._sent_times.append(time.monotonic())
+            self._trim_sent_times()
+            return response
+
+    @staticmethod
+    async def _timed_request(make_request: NextRequestMiddlewareType[TelegramType], bot: Bot,
+                             method: TelegramMethod[TelegramType]) -> Response[TelegramType]:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await make_request(bot, method)
+            status = "ok"
+            return response
+        except TelegramRetryAfter:
+            status = "retry_after"
+            raise
+        finally:
+            REQUEST_DURATION.observe(time.perf_counter() - started, method.__api_method__, status)
+
+    def _trim_sent_times(self) -> None:
+        now = time.monotonic()
+        while self._sent_times and now - self._sent_times[0] > self.THROUGHPUT_WINDOW:
+            self._sent_times.popleft()
+
+    def stats(self) -> Dict[str, object]:
+        """Return send counters and the recent throughput."""
+        self._trim_sent_times()
+        total = sum(self.sent.values())
+        return {
+            "sent_interactive": self.sent[PRIORITY_INTERACTIVE],
+            "sent_broadcast": self.sent[PRIORITY_BROADCAST],
+            "delayed": self.delayed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_wait_ms": round(self._wait_total / total * 1000, 1) if total else 0.0,
+            "per_second": round(len(self._sent_times) / self.THROUGHPUT_WINDOW, 2),
+            "chats": len(self._chats),
+            "global": self._global.stats(),
+        }
+
+
+send_scheduler = SendScheduler()
@@ -0,0 +1,329 @@
+import asyncio
+import logging
+import multiprocessing
+import pickle
+import queue
+import time
+from collections import deque
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramNetworkError
+
+from services.market_snapshot import MarketSnapshot, market_snapshot
+from services.tickers import Ticker
+from services.webhook import metrics_handler
+from utils.hash_ring import HashRing
+
+
+# Update fields whose object carries the chat directly
+_CHAT_FIELDS = (
+    "message", "edited_message", "channel_post", "edited_channel_post",
+    "business_message", "edited_business_message",
+    "my_chat_member", "chat_member", "chat_join_request",
+)
+
+
+def update_chat_id(update: Dict[str, Any]) -> int:
+    """Return the chat an update belongs to, falling back to the sending user."""
+    for field in _CHAT_FIELDS:
+        obj = update.get(field)
+        if obj:
+            return obj["chat"]["id"]
+    callback = update.get("callback_query")
+    if callback:
+        message = callback.get("message")
+        return message["chat"]["id"] if message else callback["from"]["id"]
+    for value in update.values():
+        if isinstance(value, dict) and isinstance(value.get("from"), dict):
+            return value["from"]["id"]
+    return 0
+
+
+def write_shared_snapshot(snapshot: MarketSnapshot) -> SharedMemory:
+    """Copy a snapshot's coins into a new shared memory segment."""
+    payload = pickle.dumps(list(snapshot.coins), protocol=pickle.HIGHEST_PROTOCOL)
+    segment = SharedMemory(create=True, size=len(payload))
+    segment.buf[:len(payload)] = payload
+    return segment
+
+
+def read_shared_snapshot(name: str, size: int) -> List[Ticker]:
+    """Unpickle this process's own copy of the coins a supervisor placed in shared memory."""
+    # Spawned workers share the supervisor's resource tracker, which unlinks
+    # the segment only when the supervisor releases it
+    segment = SharedMemory(name=name)
+    try:
+        return pickle.loads(segment.buf[:size])
+    finally:
+        segment.close()
+
+
+class Supervisor:
+    """Runs the bot as several worker processes behind one update intake.
+
+    The supervisor receives every update (long polling or webhook) and
+    forwards it to a worker chosen by consistent hashing of the chat id, so
+    all updates of a chat reach the same process in arrival order and find
+    that chat's in-memory state (FSM, buffers, alerts) there; the worker
+    handles them one at a time in that order (see ``serve_worker``). It
+    also runs the only market snapshot poller. Each new snapshot is pickled
+    once into a shared memory segment and every worker unpickles its own
+    copy from it, which spares sending the coins through each worker's
+    queue; the data itself is not shared. Workers that exit unexpectedly are
+    restarted with exponential backoff and pick up their queue where it
+    stopped.
+    """
+
+    QUEUE_SIZE = 10000  # updates buffered per worker
+    SNAPSHOT_SEGMENTS_KEPT = 2  # older segments are unlinked
+    RESTART_BACKOFF_MIN = 1.0  # seconds
+    RESTART_BACKOFF_MAX = 30.0
+    HEALTHY_AFTER = 60.0  # a worker running this long resets its backoff
+    STOP_TIMEOUT = 15.0  # seconds workers get to shut down cleanly
+
+    def __init__(self, workers: int, target: Callable[[int, int, Any], None]):
+        """
+        Args:
+            workers: Number of worker processes
+            target: Picklable function run in each worker as
+                ``target(index, workers, update_queue)``
+        """
+        self.workers = workers
+        self.target = target
+        self.ring = HashRing(range(workers))
+        self._context = multiprocessing.get_context("spawn")
+        self._queues = [self._context.Queue(maxsize=self.QUEUE_SIZE) for _ in range(workers)]
+        self._processes: List[Optional[multiprocessing.process.BaseProcess]] = [None] * workers
+        self._started_at = [0.0] * workers
+        self._backoff = [self.RESTART_BACKOFF_MIN] * workers
+        self._restart_at: Dict[int, float] = {}
+        self._segments: Deque[SharedMemory] = deque()
+        self._snapshot_message: Optional[tuple] = None
+        self._stopping = False
+        self.routed = [0] * workers
+        self.dropped = 0
+        self.restarts = 0
+
+    def _spawn(self, index: int) -> None:
+        process = self._context.Process(
+            target=self.target, args=(index, self.workers, self._queues[index]),
+            name=f"bot-worker-{index}", daemon=False,
+        )
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+        logging.info(f"Started worker {index} (pid {process.pid})")
+        if self._snapshot_message is not None:
+            self._send(index, self._snapshot_message)
+
+    def start(self) -> None:
+        """Start every worker process and begin sharing market snapshots."""
+        market_snapshot.add_listener(self.publish_snapshot)
+        for index in range(self.workers):
+            self._spawn(index)
+
+    def _send(self, index: int, message: tuple) -> bool:
+        try:
+            self._queues[index].put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def route(self, update: Dict[str, Any]) -> None:
+        """Forward a raw update to the worker owning its chat."""
+        index = self.ring.get(update_chat_id(update))
+        if self._send(index, ("update", update)):
+            self.routed[index] += 1
+        else:
+            self.dropped += 1
+            logging.warning(f"Worker {index} queue full, dropping update {update.get('update_id')}")
+
+    def publish_snapshot(self, snapshot: MarketSnapshot) -> None:
+        """Snapshot listener handing the new snapshot to every worker."""
+        segment = write_shared_snapshot(snapshot)
+        self._segments.append(segment)
+        while len(self._segments) > self.SNAPSHOT_SEGMENTS_KEPT:
+            old = self._segments.popleft()
+            old.close()
+            old.unlink()
+
+        self._snapshot_message = ("snapshot", segment.name, segment.size, snapshot.version, snapshot.fetched_at)
+        for index in range(self.workers):
+            if not self._send(index, self._snapshot_message):
+                logging.warning(f"Worker {index} queue full, it will miss snapshot v{snapshot.version}")
+
+    async def monitor(self) -> None:
+        """Restart workers that exited, backing off if one keeps crashing."""
+        while not self._stopping:
+            now = time.monotonic()
+            for index, process in enumerate(self._processes):
+                if process is None or process.is_alive():
+                    continue
+                if index not in self._restart_at:
+                    if now - self._started_at[index] >= self.HEALTHY_AFTER:
+                        self._backoff[index] = self.RESTART_BACKOFF_MIN
+                    delay = self._backoff[index]
+                    self._backoff[index] = min(delay * 2, self.RESTART_BACKOFF_MAX)
+                    self._restart_at[index] = now + delay
+                    logging.error(
+                        f"Worker {index} exited with code {process.exitcode}, restarting in {delay:.0f}s"
+                    )
+                elif now >= self._restart_at[index]:
+                    del self._restart_at[index]
+                    self.restarts += 1
+                    self._spawn(index)
+            await asyncio.sleep(1)
+
+    async def stop(self) -> None:
+        """Ask every worker to finish, then terminate the ones that do not."""
+        self._stopping = True
+        for index in range(self.workers):
+            self._send(index, ("stop",))
+
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.STOP_TIMEOUT
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            await loop.run_in_executor(None, process.join, max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logging.warning(f"Worker {index} did not stop in time, terminating it")
+                process.terminate()
+                await loop.run_in_executor(None, process.join, 5)
+
+        while self._segments:
+            segment = self._segments.popleft()
+            segment.close()
+            segment.unlink()
+        logging.info("All workers stopped")
+
+    def stats(self) -> Dict[str, object]:
+        """Return routing counters and worker liveness."""
+        return {
+            "workers": [
+                {"alive": bool(process and process.is_alive()), "routed": self.routed[index]}
+                for index, process in enumerate(self._processes)
+            ],
+            "dropped": self.dropped,
+            "restarts": self.restarts,
+        }
+
+    async def poll_updates(self, bot: Bot, allowed_updates: List[str]) -> None:
+        """Long-poll Telegram and route every update until cancelled."""
+        await bot.delete_webhook(drop_pending_updates=True)
+        logging.info(f"Supervisor polling for updates with {self.workers} workers")
+        offset = None
+        retry_delay = 1.0
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=allowed_updates)
+            except TelegramNetworkError as e:
+                logging.warning(f"Network error while polling: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30.0)
+                continue
+            retry_delay = 1.0
+            for update in updates:
+                self.route(update.model_dump(mode="json", by_alias=True, exclude_none=True))
+                offset = update.update_id + 1
+
+    async def serve_webhook(self, bot: Bot, base_url: str, path: str, secret: str,
+                            allowed_updates: List[str], host: str = "0.0.0.0", port: int = 8080,
+                            max_connections: int = 40) -> None:
+        """Receive updates over a webhook and route them until cancelled."""
+        if not base_url or not secret:
+            raise RuntimeError("Webhook mode requires WEBHOOK_BASE_URL and WEBHOOK_SECRET")
+
+        async def handle_update(request: web.Request) -> web.Response:
+            if request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+                return web.Response(status=401)
+            self.route(await request.json())
+            return web.Response()
+
+        async def handle_health(request: web.Request) -> web.Response:
+            snapshot = market_snapshot.snapshot
+            return web.json_response({
+                "status": "ok",
+                "snapshot_version": snapshot.version if snapshot else None,
+                "supervisor": self.stats(),
+            })
+
+        app = web.Application()
+        app.router.add_post(path, handle_update)
+        app.router.add_get("/healthz", handle_health)
+        app.router.add_get("/metrics", metrics_handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host=host, port=port).start()
+        try:
+            await bot.set_webhook(
+                url=f"{base_url.rstrip('/')}{path}",
+                secret_token=secret,
+                max_connections=max_connections,
+                allowed_updates=allowed_updates,
+            )
+            logging.info(f"Supervisor serving webhook on {host}:{port}{path} with {self.workers} workers")
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+
+async def serve_worker(bot: Bot, dp: Dispatcher, update_queue) -> None:
+    """Worker loop: handle updates and snapshots sent by the supervisor until told to stop.
+    
+    Updates of different chats are handled concurrently; those of one chat
+    run one after another in arrival order, so e.g. two FSM transitions of
+    a chat never interleave.
+    """
+    loop = asyncio.get_running_loop()
+    tasks: Set[asyncio.Task] = set()
+    # Latest update task of each chat with one still pending
+    chat_tails: Dict[int, asyncio.Task] = {}
+    
+    async def feed_after(previous: Optional[asyncio.Task], update: Dict[str, Any]) -> None:
+        if previous is not None:
+            # Wait for the chat's previous update without inheriting its errors
+            await asyncio.wait([previous])
+        await dp.feed_raw_update(bot, update)
+    
+    def release_tail(chat_id: int, task: asyncio.Task) -> None:
+        tasks.discard(task)
+        if chat_tails.get(chat_id) is task:
+            del chat_tails[chat_id]
+
+    def next_message():
+        # Short timeout so the thread never outlives a cancelled worker for long
+        try:
+            return update_queue.get(timeout=1)
+        except queue.Empty:
+            return None
+
+    while True:
+        message = await loop.run_in_executor(None, next_message)
+        if message is None:
+            continue
+        kind = message[0]
+
+        if kind == "update":
+            update = message[1]
+            chat_id = update_chat_id(update)
+            task = asyncio.create_task(feed_after(chat_tails.get(chat_id), update))
+            chat_tails[chat_id] = task
+            tasks.add(task)
+            task.add_done_callback(lambda done, chat_id=chat_id: release_tail(chat_id, done))
+        elif kind == "snapshot":
+            _, name, size, version, fetched_at = message
+            try:
+                coins = read_shared_snapshot(name, size)
+            except FileNotFoundError:
+                logging.warning(f"Snapshot v{version} was already released, waiting for the next one")
+                continue
+            await market_snapshot.publish(coins, version, fetched_at)
+        elif kind == "stop":
+            break
+
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class Ticker:
+    """One coin's market data as reported by CoinLore's ticker endpoints.
+
+    CoinLore sends every number as a string; a Ticker holds them parsed
+    once, when the response is decoded, so handlers never convert them
+    again. Instances are immutable and shared by the market snapshot, the
+    response cache and every handler.
+    """
+
+    id: str
+    symbol: str
+    name: str
+    nameid: str
+    rank: int  # 0 when CoinLore has not ranked the coin
+    price_usd: float
+    price_btc: float
+    percent_change_1h: float
+    percent_change_24h: float
+    percent_change_7d: float
+    market_cap_usd: float
+    volume24: float
+    csupply: Optional[float]
+    tsupply: Optional[float]
+    msupply: Optional[float]
+
+
+def _float(value: Any, default: Optional[float] = 0.0) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_ticker(data: Any) -> Optional[Ticker]:
+    """Build a Ticker from a raw ticker dictionary.
+
+    Missing or malformed changes, market cap and volume read as 0, and
+    missing supplies as None.
+
+    Returns:
+        The ticker, or None if the data has no id or no valid price
+    """
+    if not isinstance(data, dict) or data.get('id') is None:
+        return None
+    price_usd = _float(data.get('price_usd'), None)
+    if price_usd is None:
+        return None
+    try:
+        rank = int(data.get('rank') or 0)
+    except (TypeError, ValueError):
+        rank = 0
+    name = str(data.get('name') or 'Unknown')
+    return Ticker(
+        id=str(data['id']),
+        symbol=str(data.get('symbol') or ''),
+        name=name,
+        nameid=str(data.get('nameid') or name.lower()),
+        rank=rank,
+        price_usd=price_usd,
+        price_btc=_float(data.get('price_btc')),
+        percent_change_1h=_float(data.get('percent_change_1h')),
+        percent_change_24h=_float(data.get('percent_change_24h')),
+        percent_change_7d=_float(data.get('percent_change_7d')),
+        market_cap_usd=_float(data.get('market_cap_usd')),
+        volume24=_float(data.get('volume24')),
+        csupply=_float(data.get('csupply'), None),
+        tsupply=_float(data.get('tsupply'), None),
+        msupply=_float(data.get('msupply'), None),
+    )
+
+
+def parse_tickers(items: Iterable[Any]) -> List[Ticker]:
+    """Build Tickers from raw ticker dictionaries, skipping invalid ones."""
+    tickers = []
+    for item in items:
+        ticker = parse_ticker(item)
+        if ticker is not None:
+            tickers.append(ticker)
+    return tickers
+
+
+def decode_tickers_page(result: Any) -> Any:
+    """Decoder for /api/tickers/: parse the coin list under 'data'."""
+    if isinstance(result, dict) and isinstance(result.get('data'), list):
+        return {**result, 'data': parse_tickers(result['data'])}
+    return result
+
+
+def decode_ticker_list(result: Any) -> Any:
+    """Decoder for /api/ticker/: parse the list of requested coins."""
+    if isinstance(result, list):
+        return parse_tickers(result)
+    return result
+
+
+def rank_key(ticker: Ticker) -> int:
+    """Sort key putting tickers in market-cap rank order, unranked coins last."""
+    return ticker.rank if ticker.rank > 0 else 1 << 30
+
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from keyboards.coin_buttons import top_coins_keyboards
+from middlewares.concurrency import ConcurrencyLimitMiddleware
+from services.market_snapshot import market_snapshot
+from services.send_scheduler import send_scheduler
+from utils.formaters import render_cache
+from utils.metrics import CONTENT_TYPE, REGISTRY
+
+
+async def health_handler(request: web.Request) -> web.Response:
+    """Liveness endpoint for the reverse proxy / orchestrator."""
+    snapshot = market_snapshot.snapshot
+    return web.json_response({
+        "status": "ok",
+        "snapshot_version": snapshot.version if snapshot else None,
+        "snapshot_coins": len(snapshot) if snapshot else 0,
+        "sender": send_scheduler.stats(),
+        "render_cache": render_cache.stats(),
+        "keyboard_cache": top_coins_keyboards.stats(),
+    })
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Prometheus scrape endpoint."""
+    return web.Response(body=REGISTRY.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve /metrics and /healthz when there is no webhook server to add them to.
+
+    Returns:
+        Runner to clean up on shutdown
+    """
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_get("/healthz", health_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    logging.info(f"Metrics served on {host}:{port}/metrics")
+    return runner
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher, path: str, secret: str) -> web.Application:
+    """Build the aiohttp application serving Telegram webhook updates.
+
+    Args:
+        bot: Bot instance updates are delivered to
+        dp: Dispatcher with all handlers registered
+        path: URL path Telegram posts updates to
+        secret: Secret token Telegram must send in every request
+
+    Returns:
+        aiohttp application with the webhook, /healthz and /metrics routes
+    """
+    app = web.Application()
+    app.router.add_get("/healthz", health_handler)
+    app.router.add_get("/metrics", metrics_handler)
+
+    # Requests without the matching X-Telegram-Bot-Api-Secret-Token get 401
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=secret,
+        handle_in_background=True,
+    ).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, base_url: str, path: str, secret: str,
+                      host: str = "0.0.0.0", port: int = 8080,
+                      max_connections: int = 40, concurrency: int = 100):
+    """Register the webhook with Telegram and serve updates until cancelled.
+
+    Several instances may run behind a reverse proxy with the same settings;
+    each one re-registers the same URL, and none removes the webhook on
+    shutdown so the others keep receiving updates.
+
+    Args:
+        bot: Bot instance
+        dp: Dispatcher with all handlers registered
+        base_url: Public HTTPS URL of the reverse proxy, without the path
+        path: URL path for webhook updates
+        secret: Secret token for request validation
+        host: Interface the web server binds to
+        port: Port the web server listens on
+        max_connections: Simultaneous connections Telegram may open to us
+        concurrency: Maximum updates handled at once by this instance
+    """
+    if not base_url or not secret:
+        raise RuntimeError("Webhook mode requires WEBHOOK_BASE_URL and WEBHOOK_SECRET")
+
+    dp.update.outer_middleware(ConcurrencyLimitMiddleware(concurrency))
+    app = create_webhook_app(bot, dp, path, secret)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=host, port=port)
+    await site.start()
+
+    try:
+        await bot.set_webhook(
+            url=f"{base_url.rstrip('/')}{path}",
+            secret_token=secret,
+            max_connections=max_connections,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        logging.info(f"Bot started in webhook mode on {host}:{port}{path}")
+
+        # Serve until the task is cancelled on shutdown
+        await asyncio.Event().wait()
+    finally:
+        logging.info("Webhook server stopping...")
+        await runner.cleanup()
+        logging.info("Webhook server stopped!")
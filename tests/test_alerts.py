@@ -0,0 +1,77 @@
+import asyncio
+
+from aiogram import Bot
+
+import services.alerts as alerts_module
+from database.db import AlertsStore, Database
+from database.models import ALERT_ABOVE, ALERT_BELOW, ALERT_MOVE_1H
+from services.alerts import AlertEngine
+from services.market_snapshot import MarketSnapshotService
+from services.tickers import parse_tickers
+
+
+def ticker(price, change_1h=0.0):
+    return parse_tickers([{
+        "id": "90", "symbol": "BTC", "name": "Bitcoin", "rank": 1,
+        "price_usd": str(price), "percent_change_1h": str(change_1h),
+    }])
+
+
+def run_engine(tmp_path, monkeypatch, kind, threshold, ticks, start=(95.0, 0.0)):
+    """Create one alert, publish a snapshot per tick; return the notifications sent and the stored alert"""
+    snapshots = MarketSnapshotService()
+    monkeypatch.setattr(alerts_module, "market_snapshot", snapshots)
+    sent = []
+
+    async def run():
+        database = Database(str(tmp_path / "bot.db"))
+        await database.connect()
+        engine = AlertEngine(AlertsStore(database))
+        bot = Bot(token="123456:TEST")
+
+        async def make_request(bot, method, timeout=None):
+            sent.append(method.text)
+            return True
+
+        bot.session.make_request = make_request
+        await engine.start(bot)
+        await engine.add_alert(42, 42, ticker(*start)[0], kind, threshold)
+        for version, tick in enumerate(ticks, start=1):
+            await snapshots.publish(ticker(*tick), version=version, fetched_at=0.0)
+            await engine._queue.join()
+        await engine.stop()
+        await bot.session.close()
+        stored = await engine.store.load_all()
+        await database.close()
+        return stored[0]
+
+    return sent, asyncio.run(run())
+
+
+def test_above_alert_rearms_only_past_the_hysteresis(tmp_path, monkeypatch):
+    # 1% hysteresis: after firing at 100 the price must fall to 99 to re-arm
+    ticks = [(101.0,), (102.0,), (99.5,), (105.0,), (98.9,), (100.5,)]
+    sent, alert = run_engine(tmp_path, monkeypatch, ALERT_ABOVE, 100.0, ticks)
+    assert len(sent) == 2
+    assert all("rose above $100.00" in text for text in sent)
+    assert not alert.armed
+
+
+def test_below_alert_rearms_only_past_the_hysteresis(tmp_path, monkeypatch):
+    ticks = [(99.0,), (100.5,), (98.0,), (101.2,), (99.9,)]
+    sent, alert = run_engine(tmp_path, monkeypatch, ALERT_BELOW, 100.0, ticks, start=(105.0, 0.0))
+    assert len(sent) == 2
+    assert all("fell below" in text for text in sent)
+
+
+def test_move_alert_rearms_once_the_move_halves(tmp_path, monkeypatch):
+    ticks = [(95.0, 6.0), (95.0, -4.0), (95.0, 2.4), (95.0, -5.5)]
+    sent, alert = run_engine(tmp_path, monkeypatch, ALERT_MOVE_1H, 5.0, ticks)
+    assert len(sent) == 2
+    assert "moved +6.00%" in sent[0] and "moved -5.50%" in sent[1]
+
+
+def test_alert_already_met_starts_disarmed(tmp_path, monkeypatch):
+    sent, alert = run_engine(tmp_path, monkeypatch, ALERT_ABOVE, 90.0, [(96.0,)])
+    assert sent == []
+    assert not alert.armed
@@ -0,0 +1,102 @@
+import asyncio
+
+from utils.cache import TTLCache
+
+
+def counting_fetcher(values):
+    calls = []
+
+    async def fetch():
+        calls.append(len(calls))
+        await asyncio.sleep(0.01)
+        return values[min(len(calls) - 1, len(values) - 1)]
+
+    return fetch, calls
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    cache = TTLCache(default_ttl=0.05, stale_ttl=0.5)
+    fetch, calls = counting_fetcher(["old", "new"])
+
+    async def run():
+        assert await cache.get_or_fetch("key", fetch) == "old"
+        await asyncio.sleep(0.06)
+
+        # Stale: every caller gets the old value at once, one refresh starts
+        stale = await asyncio.gather(*(cache.get_or_fetch("key", fetch) for _ in range(5)))
+        assert stale == ["old"] * 5
+        assert len(calls) == 2
+        await asyncio.sleep(0.03)
+        assert await cache.get_or_fetch("key", fetch) == "new"
+        assert cache.stats.stale_hits == 5
+        assert cache.stats.refreshes == 1
+
+    asyncio.run(run())
+
+
+def test_expired_entry_is_fetched_inline():
+    cache = TTLCache(default_ttl=0.02, stale_ttl=0.02)
+    fetch, calls = counting_fetcher(["old", "new"])
+
+    async def run():
+        await cache.get_or_fetch("key", fetch)
+        await asyncio.sleep(0.05)
+        assert await cache.get_or_fetch("key", fetch) == "new"
+        assert cache.stats.misses == 2
+        # The expired value stays available as a last known fallback
+        assert cache.peek("key") == "new"
+
+    asyncio.run(run())
+
+
+def test_refresher_replaces_fetcher_for_stale_entries():
+    cache = TTLCache(default_ttl=0.02, stale_ttl=0.5)
+    refreshed = []
+
+    async def fetch():
+        return "user"
+
+    async def refresh():
+        refreshed.append(True)
+        return "background"
+
+    async def run():
+        await cache.get_or_fetch("key", fetch, refresher=refresh)
+        await asyncio.sleep(0.03)
+        assert await cache.get_or_fetch("key", fetch, refresher=refresh) == "user"
+        await asyncio.sleep(0)
+        assert refreshed == [True]
+        assert cache.get("key") == "background"
+
+    asyncio.run(run())
+
+
+def test_failed_refresh_keeps_the_stale_value():
+    cache = TTLCache(default_ttl=0.02, stale_ttl=0.5)
+
+    async def fetch():
+        return "old"
+
+    async def fail():
+        raise RuntimeError("upstream down")
+
+    async def run():
+        await cache.get_or_fetch("key", fetch)
+        await asyncio.sleep(0.03)
+        assert await cache.get_or_fetch("key", fail) == "old"
+        await asyncio.sleep(0)
+        assert cache.stats.refresh_errors == 1
+        assert await cache.get_or_fetch("key", fail) == "old"
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.stats.evictions == 1
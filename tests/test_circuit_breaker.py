@@ -0,0 +1,58 @@
+import time
+
+from utils.circuit_breaker import CircuitBreaker
+
+
+def tripped_breaker(open_seconds=0.05):
+    breaker = CircuitBreaker("test", failure_threshold=0.5, min_calls=4, open_seconds=open_seconds)
+    for ok in (True, False, True, False):
+        assert breaker.allow()
+        if ok:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_at_the_failure_ratio():
+    breaker = CircuitBreaker("test", failure_threshold=0.5, min_calls=4)
+    for _ in range(3):
+        breaker.record_failure()
+    # Too few calls for the ratio to count yet
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.short_circuited == 1
+    assert breaker.trips == 1
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success():
+    breaker = tripped_breaker()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_opens_the_breaker_again():
+    breaker = tripped_breaker()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.trips == 2
+
+
+def test_cancelled_probe_frees_the_slot():
+    breaker = tripped_breaker(open_seconds=0.05)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.cancel_probe()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,84 @@
+import asyncio
+
+from aiohttp import web
+
+from loadtest.fake_coinlore import FakeCoinlore
+from services.coinlore_api import CoinloreAPI
+from utils.cache import TTLCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.rate_limit import PriorityTokenBucket
+from utils.singleflight import SingleFlight
+
+
+def fresh_api(monkeypatch, breaker=None):
+    """Give CoinloreAPI its own cache, limiter and breaker for one test"""
+    monkeypatch.setattr(CoinloreAPI, "_session", None)
+    monkeypatch.setattr(CoinloreAPI, "_cache", TTLCache(max_size=16, name="test_coinlore"))
+    monkeypatch.setattr(CoinloreAPI, "_inflight", SingleFlight())
+    monkeypatch.setattr(CoinloreAPI, "_limiter", PriorityTokenBucket(100, 100, reserve=10))
+    monkeypatch.setattr(CoinloreAPI, "_breaker", breaker or CircuitBreaker("test_coinlore"))
+
+
+async def serve_fake(fake: FakeCoinlore) -> web.AppRunner:
+    """Serve the fake on a free local port and point CoinloreAPI at it"""
+    runner = web.AppRunner(fake.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    await CoinloreAPI.start(base_url=f"http://127.0.0.1:{port}")
+    return runner
+
+
+def test_user_call_does_not_join_background_request(monkeypatch):
+    fresh_api(monkeypatch)
+    monkeypatch.setattr(CoinloreAPI, "BASE_URL", CoinloreAPI.BASE_URL)
+    fake = FakeCoinlore(coins=20, latency=0.2, jitter=0)
+
+    async def run():
+        runner = await serve_fake(fake)
+        try:
+            background = asyncio.create_task(CoinloreAPI.get_tickers(limit=10, background=True))
+            await asyncio.sleep(0.05)
+            user, refreshed = await asyncio.gather(CoinloreAPI.get_tickers(limit=10), background)
+        finally:
+            await CoinloreAPI.close()
+            await runner.cleanup()
+
+        assert user["data"] and refreshed["data"]
+        # Each lane sent its own request instead of sharing the one in flight
+        assert fake.requests["/api/tickers/"] == 2
+        assert CoinloreAPI._inflight.shared == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_probe_releases_half_open_breaker(monkeypatch):
+    breaker = CircuitBreaker("test_coinlore", min_calls=1, open_seconds=30)
+    fresh_api(monkeypatch, breaker)
+    monkeypatch.setattr(CoinloreAPI, "BASE_URL", CoinloreAPI.BASE_URL)
+    fake = FakeCoinlore(coins=20, latency=1.0, jitter=0)
+
+    async def run():
+        runner = await serve_fake(fake)
+        try:
+            breaker.record_failure()
+            breaker._opened_at -= breaker.open_seconds  # the open period is over
+            probe = asyncio.create_task(CoinloreAPI.get_global_stats())
+            await asyncio.sleep(0.1)
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert fake.requests["/api/global/"] == 1
+
+            # The user gives up while the probe's HTTP call is pending
+            probe.cancel()
+            await asyncio.gather(probe, return_exceptions=True)
+            await asyncio.sleep(0)
+
+            # The next call may probe instead of being short-circuited
+            assert breaker.allow()
+            assert breaker.short_circuited == 0
+        finally:
+            await CoinloreAPI.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
@@ -0,0 +1,76 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from database.db import Database, FavoritesStore
+
+
+async def open_store(path) -> FavoritesStore:
+    database = Database(str(path))
+    await database.connect()
+    return FavoritesStore(database)
+
+
+def test_read_during_flush_sees_added_favorite(tmp_path):
+    async def run():
+        store = await open_store(tmp_path / "bot.db")
+        await store.add(1, "90")
+
+        # The read's query is queued ahead of the flush transaction
+        favorites, _ = await asyncio.gather(store.get(1), store.flush())
+        assert favorites == ["90"]
+        await store.db.close()
+
+    asyncio.run(run())
+
+
+def test_read_during_flush_does_not_see_removed_favorite(tmp_path):
+    async def run():
+        store = await open_store(tmp_path / "bot.db")
+        await store.add(1, "90")
+        await store.add(1, "80")
+        await store.flush()
+        await store.remove(1, "90")
+
+        favorites, contained, _ = await asyncio.gather(store.get(1), store.contains(1, "90"), store.flush())
+        assert favorites == ["80"]
+        assert not contained
+        assert await store.get(1) == ["80"]
+        await store.db.close()
+
+    asyncio.run(run())
+
+
+def test_failed_flush_requeues_under_newer_changes(tmp_path):
+    async def run():
+        path = tmp_path / "bot.db"
+        store = await open_store(path)
+        await store.db.execute("PRAGMA busy_timeout=50")
+        await store.add(1, "90")
+        await store.add(1, "80")
+        await store.add(2, "2")
+
+        # Another writer holds the database, so the flush fails
+        blocker = sqlite3.connect(str(path), isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        flush = asyncio.create_task(store.flush())
+        await asyncio.sleep(0)
+        # Changes made while the batch is being written
+        assert await store.remove(1, "90")
+        await store.clear(2)
+        with pytest.raises(sqlite3.OperationalError):
+            await flush
+        blocker.execute("ROLLBACK")
+        blocker.close()
+
+        # The newer removal and clear win over the requeued additions
+        assert store.pending_count == 3
+        assert await store.get(1) == ["80"]
+        assert await store.get(2) == []
+        assert await store.flush() == 3
+        assert await store.get(1) == ["80"]
+        assert await store.get(2) == []
+        await store.db.close()
+
+    asyncio.run(run())
@@ -0,0 +1,101 @@
+import asyncio
+import datetime
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import Chat, Message, Update, User
+
+from database.db import Database
+from database.fsm_storage import SQLiteStorage
+from handlers.search import SearchStates, register_search_handlers
+
+
+BOT_ID = 123456
+
+
+def storage_key(user_id):
+    return StorageKey(bot_id=BOT_ID, chat_id=user_id, user_id=user_id)
+
+
+async def open_storage(path, ttl=86400):
+    database = Database(str(path))
+    await database.connect()
+    return SQLiteStorage(database, ttl=ttl)
+
+
+def test_concurrent_reads_share_one_select(tmp_path):
+    async def run():
+        storage = await open_storage(tmp_path / "bot.db")
+        for user_id in range(1, 6):
+            await storage.set_state(storage_key(user_id), f"state:{user_id}")
+            await storage.set_data(storage_key(user_id), {"user": user_id})
+
+        keys = [storage_key(user_id) for user_id in range(1, 8)]
+        states = await asyncio.gather(*(storage.get_state(key) for key in keys))
+        assert states == [f"state:{user_id}" for user_id in range(1, 6)] + [None, None]
+        assert storage.batches == 1
+
+        data = await asyncio.gather(*(storage.get_data(key) for key in keys))
+        assert data == [{"user": user_id} for user_id in range(1, 6)] + [{}, {}]
+        assert storage.batches == 2
+        await storage.db.close()
+
+    asyncio.run(run())
+
+
+def test_records_expire_after_ttl(tmp_path):
+    async def run():
+        storage = await open_storage(tmp_path / "bot.db", ttl=0.05)
+        await storage.set_state(storage_key(1), "state")
+        await storage.set_data(storage_key(1), {"coin": "90"})
+        assert await storage.get_state(storage_key(1)) == "state"
+
+        await asyncio.sleep(0.1)
+        assert await storage.get_state(storage_key(1)) is None
+        assert await storage.get_data(storage_key(1)) == {}
+        assert await storage.purge_expired() == 1
+        await storage.db.close()
+
+    asyncio.run(run())
+
+
+def test_cleared_record_is_deleted(tmp_path):
+    async def run():
+        storage = await open_storage(tmp_path / "bot.db", ttl=0.05)
+        await storage.set_state(storage_key(1), "state")
+        await storage.set_data(storage_key(1), {"coin": "90"})
+        await storage.set_state(storage_key(1), None)
+        await storage.set_data(storage_key(1), {})
+
+        await asyncio.sleep(0.1)
+        assert await storage.purge_expired() == 0
+        await storage.db.close()
+
+    asyncio.run(run())
+
+
+def test_state_set_by_a_handler_survives_a_restart(tmp_path):
+    user = User(id=42, is_bot=False, first_name="Test")
+    message = Message(message_id=1, date=datetime.datetime.now(), chat=Chat(id=42, type="private"),
+                      from_user=user, text="🔍 Search Coin")
+
+    async def run():
+        storage = await open_storage(tmp_path / "bot.db")
+        dp = Dispatcher(storage=storage)
+        register_search_handlers(dp)
+        bot = Bot(token=f"{BOT_ID}:TEST")
+
+        async def make_request(bot, method, timeout=None):
+            return True
+
+        bot.session.make_request = make_request
+        await dp.feed_update(bot, Update(update_id=1, message=message))
+        await bot.session.close()
+        await storage.db.close()
+
+        # A new process opening the same database finds the user mid-search
+        restarted = await open_storage(tmp_path / "bot.db")
+        assert await restarted.get_state(storage_key(42)) == SearchStates.waiting_for_query.state
+        await restarted.db.close()
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+from collections import Counter
+
+import pytest
+
+from utils.hash_ring import HashRing
+
+
+CHATS = range(100_000, 110_000)
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(range(4))
+    before = {chat_id: ring.get(chat_id) for chat_id in CHATS}
+    ring.remove(3)
+    after = {chat_id: ring.get(chat_id) for chat_id in CHATS}
+
+    moved = [chat_id for chat_id in CHATS if before[chat_id] != after[chat_id]]
+    assert moved and all(before[chat_id] == 3 for chat_id in moved)
+    assert 3 not in after.values()
+    # Its keys spread over every remaining node
+    assert set(after[chat_id] for chat_id in moved) == {0, 1, 2}
+
+
+def test_adding_the_node_back_restores_the_mapping():
+    ring = HashRing(range(4))
+    before = [ring.get(chat_id) for chat_id in CHATS]
+    ring.remove(2)
+    ring.add(2)
+    assert [ring.get(chat_id) for chat_id in CHATS] == before
+
+
+def test_mapping_is_stable_across_processes_and_balanced():
+    # Workers each build their own ring; they must agree on every chat
+    ring, other = HashRing(range(4)), HashRing(range(4))
+    assert [ring.get(chat_id) for chat_id in CHATS] == [other.get(chat_id) for chat_id in CHATS]
+    counts = Counter(ring.get(chat_id) for chat_id in CHATS)
+    assert all(0.15 < count / len(CHATS) < 0.35 for count in counts.values())
+
+
+def test_empty_ring_has_no_owner():
+    with pytest.raises(LookupError):
+        HashRing([]).get(1)
@@ -0,0 +1,34 @@
+import asyncio
+
+import main
+from services.market_snapshot import MarketSnapshotService, market_snapshot
+from services.tickers import parse_tickers
+
+
+def make_tickers(count):
+    return parse_tickers(
+        {"id": str(rank), "symbol": f"C{rank}", "name": f"Coin {rank}", "rank": rank, "price_usd": "1.5"}
+        for rank in range(1, count + 1)
+    )
+
+
+def test_listener_added_twice_runs_once_per_snapshot():
+    snapshots = MarketSnapshotService()
+    seen = []
+
+    def listener(snapshot):
+        seen.append(snapshot.version)
+
+    # e.g. a worker restarted inside the same process starts its services again
+    snapshots.add_listener(listener)
+    snapshots.add_listener(listener)
+
+    asyncio.run(snapshots.publish(make_tickers(3), version=7, fetched_at=0.0))
+    assert seen == [7]
+
+
+def test_creating_dispatchers_adds_no_snapshot_listeners():
+    listeners = list(market_snapshot._listeners)
+    main.create_dispatcher()
+    main.create_dispatcher()
+    assert market_snapshot._listeners == listeners
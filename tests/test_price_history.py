@@ -0,0 +1,54 @@
+import asyncio
+import os
+import time
+
+import services.price_history as price_history_module
+from services.market_snapshot import MarketSnapshotService
+from services.price_history import PriceHistoryStore
+
+
+def record_prices(store, coin_id, now):
+    """One price a minute over the last three hours"""
+    for minutes in range(180, 0, -1):
+        store.add(coin_id, now - minutes * 60, 100.0 + minutes)
+
+
+def reload(path):
+    store = PriceHistoryStore(path=str(path))
+    asyncio.run(store.start(persist=False))
+    return store
+
+
+def test_saved_history_loads_back_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_history_module, "market_snapshot", MarketSnapshotService())
+    now = int(time.time())
+    store = PriceHistoryStore(path=str(tmp_path))
+    record_prices(store, "90", now)
+    asyncio.run(store.save())
+
+    loaded = reload(tmp_path)
+    for tier in PriceHistoryStore.TIERS:
+        assert loaded.get_range("90", now - 4 * 3600, tier=tier.name) == \
+            store.get_range("90", now - 4 * 3600, tier=tier.name)
+    assert loaded.price_at("90", now - 3600) == store.price_at("90", now - 3600)
+
+
+def test_truncated_history_file_keeps_matching_columns(tmp_path, monkeypatch):
+    monkeypatch.setattr(price_history_module, "market_snapshot", MarketSnapshotService())
+    now = int(time.time())
+    store = PriceHistoryStore(path=str(tmp_path))
+    record_prices(store, "90", now)
+    asyncio.run(store.save())
+
+    # Cut the file inside the 1m tier's price column
+    path = os.path.join(str(tmp_path), "90.bin")
+    header = PriceHistoryStore.FILE_HEADER.size + PriceHistoryStore.TIER_HEADER.size
+    minute_points = len(store.get_range("90", now - 4 * 3600, tier="1m")[0])
+    with open(path, "r+b") as f:
+        f.truncate(header + minute_points * 8 + 50 * 8)
+
+    loaded = reload(tmp_path)
+    times, prices = loaded.get_range("90", now - 4 * 3600, tier="1m")
+    assert len(times) == len(prices) == 50
+    assert loaded.get_range("90", now - 4 * 3600, tier="1h") == ([], [])
+    assert loaded.price_at("90", now) is not None
@@ -0,0 +1,50 @@
+import asyncio
+
+from utils.rate_limit import PriorityTokenBucket
+
+
+def test_background_lane_leaves_the_reserve():
+    limiter = PriorityTokenBucket(rate=1, capacity=5, reserve=2)
+
+    async def run():
+        background = [await limiter.acquire(1, timeout=0.02) for _ in range(4)]
+        assert background == [True, True, True, False]
+        # The reserve is still there for interactive calls
+        assert await limiter.acquire(0, timeout=0.02)
+        assert await limiter.acquire(0, timeout=0.02)
+        assert not await limiter.acquire(0, timeout=0.02)
+        assert limiter.rejected == 2
+
+    asyncio.run(run())
+
+
+def test_waiting_interactive_call_goes_before_background():
+    limiter = PriorityTokenBucket(rate=20, capacity=1)
+    order = []
+
+    async def take(lane, name):
+        await limiter.acquire(lane)
+        order.append(name)
+
+    async def run():
+        assert await limiter.acquire(0)
+        # The background call starts waiting first but is served last
+        background = asyncio.create_task(take(1, "background"))
+        await asyncio.sleep(0.01)
+        interactive = asyncio.create_task(take(0, "interactive"))
+        await asyncio.gather(background, interactive)
+        assert order == ["interactive", "background"]
+        assert limiter.throttled == 2
+
+    asyncio.run(run())
+
+
+def test_tokens_refill_over_time():
+    limiter = PriorityTokenBucket(rate=50, capacity=1)
+
+    async def run():
+        assert await limiter.acquire(0)
+        assert not await limiter.acquire(0, timeout=0.005)
+        assert await limiter.acquire(0, timeout=0.1)
+
+    asyncio.run(run())
@@ -0,0 +1,69 @@
+from services.tickers import parse_tickers
+from utils.search_index import SearchIndex
+
+
+COINS = [
+    ("90", "BTC", "Bitcoin", 1),
+    ("80", "ETH", "Ethereum", 2),
+    ("2321", "BCH", "Bitcoin Cash", 20),
+    ("33234", "ETC", "Ethereum Classic", 25),
+    ("44011", "BRISE", "Bitgert", 300),
+    ("51000", "ETHW", "EthereumPoW", 400),
+    ("60000", "BTCB", "Bitcoin BEP2", 900),
+]
+
+
+def tickers(coins):
+    return parse_tickers(
+        {"id": coin_id, "symbol": symbol, "name": name, "nameid": name.lower().replace(" ", "-"),
+         "rank": rank, "price_usd": "1"}
+        for coin_id, symbol, name, rank in coins
+    )
+
+
+def make_index():
+    index = SearchIndex()
+    index.update(tickers(COINS))
+    return index
+
+
+def names(results):
+    return [coin.name for coin in results]
+
+
+def test_exact_symbol_comes_before_prefix_matches():
+    index = make_index()
+    assert names(index.search("BTCB", limit=2)) == ["Bitcoin BEP2"]
+    assert names(index.search("btc", limit=2)) == ["Bitcoin", "Bitcoin BEP2"]
+
+
+def test_prefix_matches_are_ranked_by_market_cap_rank():
+    index = make_index()
+    assert names(index.search("bit")) == ["Bitcoin", "Bitcoin Cash", "Bitgert", "Bitcoin BEP2"]
+    # Word prefixes match too
+    assert names(index.search("cash")) == ["Bitcoin Cash"]
+
+
+def test_prefix_longer_than_the_trie_filters_by_terms():
+    index = make_index()
+    assert len("bitcoin c") > SearchIndex.TRIE_DEPTH
+    assert names(index.search("bitcoin c")) == ["Bitcoin Cash"]
+    assert names(index.search("ethereum")) == ["Ethereum", "Ethereum Classic", "EthereumPoW"]
+
+
+def test_typos_are_ranked_by_distance_then_rank():
+    index = make_index()
+    assert names(index.search("etherium", limit=1)) == ["Ethereum"]
+    assert names(index.search("bitcoim")) == ["Bitcoin", "Bitcoin Cash", "Bitcoin BEP2"]
+    assert index.search("qqqqqqqq") == []
+
+
+def test_update_reindexes_renamed_and_removed_coins():
+    index = make_index()
+    renamed = [coin for coin in COINS if coin[0] != "2321"]
+    renamed[1] = ("80", "ETH", "Ether", 2)
+    index.update(tickers(renamed))
+    assert "Bitcoin Cash" not in names(index.search("bit"))
+    assert names(index.search("ether", limit=1)) == ["Ether"]
+    assert index.find_symbol("eth").name == "Ether"
+    assert len(index) == len(renamed)
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(True)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        assert flight.started == 1 and flight.shared == 4
+        assert len(flight) == 0
+
+    asyncio.run(run())
+
+
+def test_error_is_raised_to_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(run())
+
+
+def test_shared_task_survives_until_last_waiter_leaves():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def run():
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+
+        # One waiter giving up leaves the call running for the other
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled
+        assert len(flight) == 1
+
+        # The last one leaving cancels it, and a new caller starts over
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled == [True]
+        assert len(flight) == 0
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+    asyncio.run(run())
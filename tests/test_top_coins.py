@@ -0,0 +1,88 @@
+import asyncio
+import datetime
+
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+import handlers.top_coins as top_coins
+from keyboards.coin_buttons import top_coins_keyboards
+from services.market_snapshot import MarketSnapshotService
+from services.tickers import parse_tickers
+
+
+USER = User(id=42, is_bot=False, first_name="Test")
+CHAT = Chat(id=42, type="private")
+
+
+def make_tickers(count):
+    return parse_tickers(
+        {"id": str(rank), "symbol": f"C{rank}", "name": f"Coin {rank}", "rank": rank, "price_usd": "1.5"}
+        for rank in range(1, count + 1)
+    )
+
+
+def page_click(page):
+    message = Message(message_id=7, date=datetime.datetime.now(), chat=CHAT, text="💹 Top Cryptocurrencies")
+    callback = CallbackQuery(id="1", from_user=USER, chat_instance="42", message=message, data=f"top_page_{page}")
+    return Update(update_id=1, callback_query=callback)
+
+
+async def turn_page(page):
+    """Feed a page click through a dispatcher; return the Bot API methods called"""
+    dp = Dispatcher(storage=MemoryStorage())
+    top_coins.register_top_coins_handlers(dp)
+    bot = Bot(token="123456:TEST")
+    calls = []
+
+    async def make_request(bot, method, timeout=None):
+        calls.append(method.__api_method__)
+        return True
+
+    bot.session.make_request = make_request
+    await dp.feed_update(bot, page_click(page))
+    await bot.session.close()
+    return calls
+
+
+def test_page_turn_answers_callback_and_prefetches_snapshot_pages(monkeypatch):
+    snapshots = MarketSnapshotService()
+    monkeypatch.setattr(top_coins, "market_snapshot", snapshots)
+
+    async def run():
+        snapshot = await snapshots.publish(make_tickers(35), version=10_000, fetched_at=0.0)
+        calls = await turn_page(1)
+
+        assert "answerCallbackQuery" in calls
+        assert "editMessageText" in calls
+        # The neighbouring pages' keyboards were built ahead of the next click
+        hits = top_coins_keyboards.hits
+        for neighbour in (0, 2):
+            coins = snapshot.page(neighbour * top_coins.COINS_PER_PAGE, top_coins.COINS_PER_PAGE)
+            top_coins.get_top_coins_keyboard(coins, neighbour, 4, snapshot.version)
+        assert top_coins_keyboards.hits == hits + 2
+
+    asyncio.run(run())
+
+
+def test_page_turn_prefetches_api_pages_without_snapshot(monkeypatch):
+    monkeypatch.setattr(top_coins, "market_snapshot", MarketSnapshotService())
+    top_coins.api_pages_cache.clear()
+    requests = []
+
+    async def get_tickers(start=0, limit=100, background=False):
+        requests.append((start, background))
+        return {"data": make_tickers(limit), "info": {"coins_num": 100}}
+
+    monkeypatch.setattr(top_coins.CoinloreAPI, "get_tickers", get_tickers)
+
+    async def run():
+        calls = await turn_page(3)
+        await asyncio.gather(*top_coins._prefetch_tasks)
+
+        assert "answerCallbackQuery" in calls
+        assert "editMessageText" in calls
+        assert (30, False) in requests
+        assert {(20, True), (40, True)} <= set(requests)
+
+    asyncio.run(run())
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class CacheStats:
+    """Counters describing how a cache is performing."""
+
+    __slots__ = ("hits", "stale_hits", "misses", "evictions", "refreshes", "refresh_errors")
+
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """Return the counters as a plain dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _Entry:
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: Any, fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class TTLCache:
+    """Bounded in-memory LRU cache with per-entry TTL and stale-while-revalidate.
+
+    Every entry has two deadlines: until ``ttl`` expires it is fresh and
+    returned as is; until ``ttl + stale_ttl`` expires it is stale, returned
+    immediately while a single background refresh replaces it. Older entries
+    are treated as misses but stay in memory (see ``peek``) until they are
+    overwritten or evicted by the LRU policy.
+    """
+
+    def __init__(self, max_size: int = 1024, default_ttl: float = 60.0,
+                 stale_ttl: Optional[float] = None, name: str = "cache"):
+        """
+        Args:
+            max_size: Maximum number of entries kept before LRU eviction
+            default_ttl: Seconds an entry stays fresh when no TTL is given
+            stale_ttl: Seconds an expired entry may still be served while
+                refreshing (defaults to ``default_ttl``)
+            name: Name used in log messages
+        """
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.stale_ttl = default_ttl if stale_ttl is None else stale_ttl
+        self.name = name
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and time.monotonic() < entry.fresh_until
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh cached value without touching the upstream.
+
+        Args:
+            key: Cache key
+            default: Value returned when the key is missing or expired
+
+        Returns:
+            Cached value or default
+        """
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry.fresh_until:
+            return default
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return the last stored value for a key, however old it is.
+
+        Useful as a last-known-good fallback when the upstream is failing.
+        """
+        entry = self._entries.get(key)
+        return default if entry is None else entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            stale_ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Seconds the value stays fresh (defaults to ``default_ttl``)
+            stale_ttl: Extra seconds the value may be served stale
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        now = time.monotonic()
+        self._entries[key] = _Entry(value, now + ttl, now + ttl + stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single key from the cache."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry from the cache."""
+        self._entries.clear()
+
+    async def get_or_fetch(self, key: Hashable, fetcher: Callable[[], Awaitable[Any]],
+                           ttl: Optional[float] = None,
+                           stale_ttl: Optional[float] = None,
+                           refresher: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """Return a cached value, calling ``fetcher`` only when needed.
+
+        Fresh entries are returned directly. Stale entries are returned
+        directly too, and one background refresh is started for the key.
+        Missing or fully expired entries are fetched inline. ``None`` results
+        are never cached.
+
+        Args:
+            key: Cache key
+            fetcher: Zero-argument coroutine function producing the value
+            ttl: Seconds the fetched value stays fresh
+            stale_ttl: Extra seconds the value may be served stale
+            refresher: Coroutine function used for background refreshes
+                instead of ``fetcher``
+
+        Returns:
+            Cached or freshly fetched value
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if now < entry.fresh_until:
+                self.stats.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self.stats.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._schedule_refresh(key, refresher or fetcher, ttl, stale_ttl)
+                return entry.value
+
+        self.stats.misses += 1
+        value = await fetcher()
+        if value is not None:
+            self.set(key, value, ttl, stale_ttl)
+        return value
+
+    def _schedule_refresh(self, key: Hashable, fetcher: Callable[[], Awaitable[Any]],
+                          ttl: Optional[float], stale_ttl: Optional[float]) -> None:
+        """Start a background refresh for a key unless one is already running."""
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(key, fetcher, ttl, stale_ttl))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: Hashable, fetcher: Callable[[], Awaitable[Any]],
+                       ttl: Optional[float], stale_ttl: Optional[float]) -> None:
+        self.stats.refreshes += 1
+        try:
+            value = await fetcher()
+        except Exception as e:
+            self.stats.refresh_errors += 1
+            logging.warning(f"Background refresh failed in {self.name} for {key}: {e}")
+            return
+        if value is not None:
+            self.set(key, value, ttl, stale_ttl)
+        else:
+            self.stats.refresh_errors += 1
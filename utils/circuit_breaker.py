@@ -0,0 +1,127 @@
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker.
+
+    While closed, outcomes of recent calls are kept for ``window`` seconds.
+    Once at least ``min_calls`` were made and the share of failures reaches
+    ``failure_threshold`` the breaker opens and rejects calls for
+    ``open_seconds``. After that it lets a single probe call through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: float = 0.5, min_calls: int = 10,
+                 window: float = 30.0, open_seconds: float = 30.0):
+        """
+        Args:
+            name: Name used in log messages
+            failure_threshold: Failure ratio (0-1) that trips the breaker
+            min_calls: Calls needed in the window before the ratio counts
+            window: Seconds of history considered
+            open_seconds: Seconds calls are rejected once tripped
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self.short_circuited = 0
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """Return whether a call may go ahead; count it if it may not."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.short_circuited += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+            logging.info(f"Circuit breaker {self.name} half-open, probing upstream")
+
+        if self.state == self.HALF_OPEN:
+            # A probe that never reported back (e.g. cancelled) is replaced after a while
+            now = time.monotonic()
+            if self._probe_in_flight and now - self._probe_started < self.open_seconds:
+                self.short_circuited += 1
+                return False
+            self._probe_in_flight = True
+            self._probe_started = now
+        return True
+
+    def cancel_probe(self) -> None:
+        """Release the half-open probe slot of a call that was never sent.
+
+        The probe gave no evidence about the upstream, so the next call
+        may probe instead of waiting for ``open_seconds``.
+        """
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        if self.state == self.HALF_OPEN:
+            self._close()
+            return
+        self._record(True)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker if the error rate is too high."""
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self._record(False)
+        calls = len(self._outcomes)
+        if calls >= self.min_calls and self._failures / calls >= self.failure_threshold:
+            self._open()
+
+    def _record(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        if not ok:
+            self._failures += 1
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            _, old_ok = self._outcomes.popleft()
+            if not old_ok:
+                self._failures -= 1
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.trips += 1
+        logging.warning(f"Circuit breaker {self.name} opened for {self.open_seconds}s")
+
+    def _close(self) -> None:
+        self.state = self.CLOSED
+        self._outcomes.clear()
+        self._failures = 0
+        self._probe_in_flight = False
+        logging.info(f"Circuit breaker {self.name} closed")
+
+    def stats(self) -> Dict[str, object]:
+        """Return the current state and counters."""
+        return {
+            "state": self.state,
+            "short_circuited": self.short_circuited,
+            "trips": self.trips,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._failures,
+        }
@@ -0,0 +1,23 @@
+import json
+from typing import Any, Union
+
+# orjson parses several times faster than the standard library; it is
+# optional and the bot falls back to json when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON document.
+
+    Raises:
+        ValueError: If the document is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
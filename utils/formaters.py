@@ -0,0 +1,177 @@
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+from services.tickers import Ticker
+
+
+def format_large_number(num: Union[float, int, str]) -> str:
+    """Format large numbers with K, M, B suffixes.
+
+    Args:
+        num: Number to format; numeric strings are parsed first, anything
+            else is returned as text unchanged
+
+    Returns:
+        String representation with appropriate suffix
+    """
+    if isinstance(num, str):
+        try:
+            num = float(num)
+        except ValueError:
+            return num
+    if not isinstance(num, (int, float)):
+        return str(num)
+
+    if num >= 1_000_000_000:
+        return f"{num / 1_000_000_000:.2f}B"
+    elif num >= 1_000_000:
+        return f"{num / 1_000_000:.2f}M"
+    elif num >= 1_000:
+        return f"{num / 1_000:.2f}K"
+    else:
+        return f"{num:.2f}"
+
+
+def format_price(price: float) -> str:
+    """Format a USD price with cents, or with six decimals below one dollar."""
+    return f"${price:,.6f}" if price < 1 else f"${price:,.2f}"
+
+
+def change_emoji(change: float) -> str:
+    """Green, red or white circle for a rising, falling or flat change."""
+    return "🟢" if change > 0 else "🔴" if change < 0 else "⚪"
+
+
+# Message templates filled by one str.format call reading the ticker's
+# pre-parsed fields directly. Percent changes are numbers on Ticker, so they
+# are printed rounded to two decimals rather than as the API's raw strings.
+# The saving comes from RenderCache below, not from the templates.
+_COIN_CARD = (
+    "{trend} *{coin.name} ({coin.symbol})*\n\n"
+    "💵 *Price:* ${coin.price_usd:.4f} USD / {coin.price_btc:.8f} BTC\n"
+    "💰 *Market Cap:* ${market_cap} USD\n"
+    "📊 *Volume (24h):* ${volume} USD\n\n"
+    "⏱ *Change (1h):* {coin.percent_change_1h:.2f}%\n"
+    "📅 *Change (24h):* {coin.percent_change_24h:.2f}%\n"
+    "📆 *Change (7d):* {coin.percent_change_7d:.2f}%\n"
+).format
+
+_COIN_DETAILS = (
+    "*{coin.name} ({coin.symbol})*  Rank #{rank}\n\n"
+    "*Price:* {price}\n"
+    "*Market Cap:* {market_cap}\n"
+    "*24h Volume:* {volume}\n\n"
+    "*Change 1h:* {emoji_1h} {coin.percent_change_1h:.2f}%\n"
+    "*Change 24h:* {emoji_24h} {coin.percent_change_24h:.2f}%\n"
+    "*Change 7d:* {emoji_7d} {coin.percent_change_7d:.2f}%\n\n"
+    "*Last Updated:* {updated}"
+).format
+
+_FAVORITE_ENTRY = (
+    "*{coin.name} ({coin.symbol})*\n"
+    "Price: ${coin.price_usd:,.2f}\n"
+    "24h Change: {emoji} {coin.percent_change_24h:.2f}%\n\n"
+).format
+
+_SEARCH_RESULT = (
+    "*{coin.name} ({coin.symbol})*\n"
+    "Price: {price}\n"
+    "Rank: {rank}\n\n"
+).format
+
+
+class RenderCache:
+    """Message bodies (or keyboards) rendered from the current market snapshot.
+
+    Tickers of a snapshot never change, so a body rendered from one is
+    valid for every user until the next refresh: the same coin card shown
+    to a thousand users is built once per snapshot. Bodies are keyed by
+    e.g. (template, coin id) and all of them are dropped as soon as a newer
+    snapshot version is rendered, which bounds the cache to one snapshot.
+    """
+
+    def __init__(self):
+        self._version = -1
+        self._bodies: Dict[Hashable, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Optional[int], render: Callable[[], Any]) -> Any:
+        """Return a cached body, rendering it on the first request.
+
+        Args:
+            key: Template and coin the body is built from
+            version: Snapshot version of the ticker, or None for a ticker
+                fetched outside the snapshot, which is never cached
+            render: Builds the body
+        """
+        if version is None or version < self._version:
+            self.misses += 1
+            return render()
+        if version > self._version:
+            self._bodies = {}
+            self._version = version
+
+        body = self._bodies.get(key)
+        if body is None:
+            self.misses += 1
+            body = self._bodies[key] = render()
+        else:
+            self.hits += 1
+        return body
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit counters and the number of cached bodies."""
+        return {"version": self._version, "size": len(self._bodies), "hits": self.hits, "misses": self.misses}
+
+
+render_cache = RenderCache()
+
+
+def render_coin_card(coin: Ticker, version: Optional[int] = None) -> str:
+    """Coin card shown when a coin is picked from the top list."""
+    return render_cache.get(("card", coin.id), version, lambda: _COIN_CARD(
+        coin=coin,
+        trend="🔴" if coin.percent_change_24h < 0 else "🟢",
+        market_cap=format_large_number(coin.market_cap_usd),
+        volume=format_large_number(coin.volume24),
+    ))
+
+
+def render_coin_details(coin: Ticker, version: Optional[int] = None,
+                        updated_at: Optional[float] = None) -> str:
+    """Detailed coin view with price changes and the data's age.
+
+    Args:
+        coin: Ticker to show
+        version: Snapshot version of the ticker, None if it is not from the snapshot
+        updated_at: Unix time the ticker was fetched, if known
+    """
+    return render_cache.get(("details", coin.id), version, lambda: _COIN_DETAILS(
+        coin=coin,
+        rank=coin.rank or "N/A",
+        price=format_price(coin.price_usd),
+        market_cap=f"${coin.market_cap_usd:,.0f}" if coin.market_cap_usd else "N/A",
+        volume=f"${coin.volume24:,.0f}" if coin.volume24 else "N/A",
+        emoji_1h=change_emoji(coin.percent_change_1h),
+        emoji_24h=change_emoji(coin.percent_change_24h),
+        emoji_7d=change_emoji(coin.percent_change_7d),
+        updated=time.strftime("%Y-%m-%d %H:%M UTC", time.gmtime(updated_at)) if updated_at else "N/A",
+    ))
+
+
+def render_favorite_entry(coin: Ticker, version: Optional[int] = None) -> str:
+    """One coin's entry in the favorites list."""
+    return render_cache.get(("favorite", coin.id), version, lambda: _FAVORITE_ENTRY(
+        coin=coin,
+        emoji=change_emoji(coin.percent_change_24h),
+    ))
+
+
+def render_search_result(coin: Ticker, version: Optional[int] = None) -> str:
+    """One coin's entry in the search results."""
+    return render_cache.get(("search", coin.id), version, lambda: _SEARCH_RESULT(
+        coin=coin,
+        price=format_price(coin.price_usd),
+        rank=coin.rank or "N/A",
+    ))
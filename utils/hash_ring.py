@@ -0,0 +1,49 @@
+import hashlib
+from bisect import bisect_right
+from typing import Hashable, Iterable, List
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to nodes.
+
+    Every node is placed on the ring ``replicas`` times so keys spread
+    evenly; a key belongs to the first node point at or after its hash.
+    Adding or removing a node only moves the keys of that node.
+    """
+
+    def __init__(self, nodes: Iterable[Hashable], replicas: int = 100):
+        """
+        Args:
+            nodes: Node identifiers, e.g. worker numbers
+            replicas: Virtual points per node
+        """
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._nodes: List[Hashable] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: Hashable) -> None:
+        """Place a node on the ring."""
+        for replica in range(self.replicas):
+            point = _hash(f"{node}#{replica}")
+            i = bisect_right(self._points, point)
+            self._points.insert(i, point)
+            self._nodes.insert(i, node)
+
+    def remove(self, node: Hashable) -> None:
+        """Take a node off the ring."""
+        kept = [(point, owner) for point, owner in zip(self._points, self._nodes) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._nodes = [owner for _, owner in kept]
+
+    def get(self, key: Hashable) -> Hashable:
+        """Return the node owning a key."""
+        if not self._points:
+            raise LookupError("Hash ring has no nodes")
+        i = bisect_right(self._points, _hash(str(key)))
+        return self._nodes[i % len(self._nodes)]
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, at most ``capacity`` saved up."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (defaults to ``rate``, i.e. one second of burst)
+        """
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        """Return the number of tokens currently in the bucket."""
+        self._refill()
+        return self.tokens
+
+    def try_acquire(self, tokens: float = 1.0, reserve: float = 0.0) -> bool:
+        """Take tokens if the bucket holds at least ``tokens + reserve``."""
+        self._refill()
+        if self.tokens >= tokens + reserve:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def delay(self, tokens: float = 1.0, reserve: float = 0.0) -> float:
+        """Seconds until ``tokens + reserve`` tokens will be available."""
+        self._refill()
+        missing = tokens + reserve - self.tokens
+        return max(missing / self.rate, 0.0)
+
+
+class PriorityTokenBucket:
+    """Token bucket shared by several priority lanes.
+
+    Lane 0 is the most important. A caller only takes a token when no caller
+    in a more important lane is waiting, and callers in lanes other than 0
+    must leave ``reserve`` tokens in the bucket, so background work can never
+    starve interactive work.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, reserve: float = 0.0):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held
+            reserve: Tokens only lane 0 may use
+        """
+        self.bucket = TokenBucket(rate, capacity)
+        self.reserve = reserve
+        self._waiting: Dict[int, int] = {}
+        self.acquired = 0
+        self.throttled = 0
+        self.rejected = 0
+
+    def _blocked_by_higher(self, priority: int) -> bool:
+        return any(count for lane, count in self._waiting.items() if lane < priority)
+
+    async def acquire(self, priority: int = 0, timeout: Optional[float] = None) -> bool:
+        """Wait for a token in the given lane.
+
+        Args:
+            priority: Lane number, 0 being the most important
+            timeout: Give up after this many seconds (None waits forever)
+
+        Returns:
+            True if a token was taken, False if the timeout expired
+        """
+        reserve = self.reserve if priority > 0 else 0.0
+        if not self._blocked_by_higher(priority) and self.bucket.try_acquire(1.0, reserve):
+            self.acquired += 1
+            return True
+
+        self.throttled += 1
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._waiting[priority] = self._waiting.get(priority, 0) + 1
+        try:
+            while True:
+                wait = max(self.bucket.delay(1.0, reserve), 0.005)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        return False
+                    wait = min(wait, remaining)
+                await asyncio.sleep(wait)
+                if not self._blocked_by_higher(priority) and self.bucket.try_acquire(1.0, reserve):
+                    self.acquired += 1
+                    return True
+        finally:
+            self._waiting[priority] -= 1
+
+    def idle(self) -> bool:
+        """Return whether nobody is waiting and the bucket is full."""
+        return not any(self._waiting.values()) and self.bucket.available() >= self.bucket.capacity
+
+    def stats(self) -> Dict[str, float]:
+        """Return counters and the current token level."""
+        return {
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "waiting": sum(self._waiting.values()),
+            "tokens": round(self.bucket.available(), 2),
+        }
@@ -0,0 +1,265 @@
+import heapq
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from services.tickers import Ticker, rank_key
+
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and collapse anything that is not a letter or digit to a space."""
+    return _NON_ALNUM.sub(" ", str(text).lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the padded character trigrams of a normalized term."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """Levenshtein distance between a and b, or None if it exceeds max_distance.
+
+    Rows are abandoned as soon as every cell exceeds the bound, so clearly
+    different strings are rejected after a few characters.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    previous = list(range(len(a) + 1))
+    for i, char_b in enumerate(b, 1):
+        current = [i]
+        for j, char_a in enumerate(a, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids", "ranked", "ranked_version")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[str] = set()
+        self.ranked: Tuple[str, ...] = ()
+        self.ranked_version = -1
+
+
+class SearchIndex:
+    """In-memory search index over the coin universe.
+
+    Lookups combine three structures, each ranked by market-cap rank:
+
+    * a hash of exact symbols,
+    * a prefix trie over the name, its words and the nameid,
+    * a trigram index verified by bounded edit distance for typos.
+
+    The trie only goes ``TRIE_DEPTH`` characters deep; longer queries filter
+    the candidates of the deepest node by their terms, which keeps memory
+    small while still answering in well under a millisecond. ``update`` only
+    touches coins whose names changed, so refreshing after every market
+    snapshot is cheap.
+    """
+
+    TRIE_DEPTH = 4
+    FUZZY_CANDIDATES = 20
+    # Trigrams shared by more than this share of all coins carry no signal
+    COMMON_TRIGRAM_RATIO = 0.1
+
+    def __init__(self):
+        self._coins: Dict[str, Ticker] = {}
+        self._terms: Dict[str, Tuple[str, ...]] = {}
+        self._symbols: Dict[str, str] = {}
+        self._ranks: Dict[str, int] = {}
+        self._symbol_index: Dict[str, Set[str]] = {}
+        self._trie = _TrieNode()
+        self._trigram_index: Dict[str, Set[str]] = {}
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._coins)
+
+    def update(self, coins: Iterable[Ticker]) -> None:
+        """Bring the index in line with the given coin list.
+
+        Coins that disappeared are removed, coins whose name, nameid or
+        symbol changed are re-indexed and every rank is refreshed.
+
+        Args:
+            coins: Tickers covering the whole universe
+        """
+        new_coins = {coin.id: coin for coin in coins}
+
+        for coin_id in self._coins.keys() - new_coins.keys():
+            self._remove(coin_id)
+
+        for coin_id, coin in new_coins.items():
+            symbol = normalize(coin.symbol)
+            terms = self._coin_terms(coin)
+            if self._terms.get(coin_id) != terms or self._symbols.get(coin_id) != symbol:
+                if coin_id in self._terms:
+                    self._remove(coin_id)
+                self._add(coin_id, symbol, terms)
+
+        self._coins = new_coins
+        self._ranks = {coin_id: rank_key(coin) for coin_id, coin in new_coins.items()}
+        self._version += 1
+
+    def search(self, query: str, limit: int = 5) -> List[Ticker]:
+        """Find coins matching a query by symbol, name prefix or close spelling.
+
+        Args:
+            query: Text typed by the user
+            limit: Maximum number of results
+
+        Returns:
+            Tickers, best matches first
+        """
+        query = normalize(query)
+        if not query or not self._coins:
+            return []
+
+        results: List[str] = []
+        seen: Set[str] = set()
+
+        def take(ids: Iterable[str]) -> None:
+            for coin_id in ids:
+                if coin_id not in seen:
+                    seen.add(coin_id)
+                    results.append(coin_id)
+                    if len(results) >= limit:
+                        return
+
+        take(self._by_rank(self._symbol_index.get(query.replace(" ", ""), ())))
+        if len(results) < limit:
+            take(self._prefix_matches(query, limit + len(results)))
+        # Typo tolerance is only a fallback when nothing matched literally
+        if not results and len(query) >= 3:
+            take(self._fuzzy_matches(query, limit))
+
+        return [self._coins[coin_id] for coin_id in results[:limit]]
+
+    def find_symbol(self, symbol: str) -> Optional[Ticker]:
+        """Return the best-ranked coin with exactly this ticker symbol, or None."""
+        ids = self._by_rank(self._symbol_index.get(normalize(symbol).replace(" ", ""), ()))
+        return self._coins[ids[0]] if ids else None
+
+    @staticmethod
+    def _coin_terms(coin: Ticker) -> Tuple[str, ...]:
+        name = normalize(coin.name)
+        nameid = normalize(coin.nameid)
+        terms = [name, nameid, name.replace(" ", "")]
+        terms.extend(name.split())
+        return tuple(sorted({term for term in terms if term}))
+
+    def _add(self, coin_id: str, symbol: str, terms: Tuple[str, ...]) -> None:
+        self._terms[coin_id] = terms
+        self._symbols[coin_id] = symbol
+        if symbol:
+            self._symbol_index.setdefault(symbol, set()).add(coin_id)
+        for term in terms + ((symbol,) if symbol else ()):
+            node = self._trie
+            for char in term[:self.TRIE_DEPTH]:
+                node = node.children.setdefault(char, _TrieNode())
+                node.ids.add(coin_id)
+        for term in self._fuzzy_terms(symbol, terms):
+            for gram in trigrams(term):
+                self._trigram_index.setdefault(gram, set()).add(coin_id)
+
+    def _remove(self, coin_id: str) -> None:
+        terms = self._terms.pop(coin_id, ())
+        symbol = self._symbols.pop(coin_id, "")
+        if symbol in self._symbol_index:
+            self._symbol_index[symbol].discard(coin_id)
+            if not self._symbol_index[symbol]:
+                del self._symbol_index[symbol]
+        for term in terms + ((symbol,) if symbol else ()):
+            self._trie_discard(self._trie, term[:self.TRIE_DEPTH], coin_id)
+        for term in self._fuzzy_terms(symbol, terms):
+            for gram in trigrams(term):
+                postings = self._trigram_index.get(gram)
+                if postings is not None:
+                    postings.discard(coin_id)
+                    if not postings:
+                        del self._trigram_index[gram]
+
+    def _trie_discard(self, node: _TrieNode, term: str, coin_id: str) -> None:
+        if not term:
+            return
+        child = node.children.get(term[0])
+        if child is None:
+            return
+        child.ids.discard(coin_id)
+        self._trie_discard(child, term[1:], coin_id)
+        if not child.ids:
+            del node.children[term[0]]
+
+    @staticmethod
+    def _fuzzy_terms(symbol: str, terms: Tuple[str, ...]) -> Set[str]:
+        return {term for term in terms + (symbol,) if len(term) >= 3}
+
+    def _by_rank(self, ids: Iterable[str]) -> List[str]:
+        return sorted(ids, key=self._ranks.__getitem__)
+
+    def _ranked_node_ids(self, node: _TrieNode) -> Tuple[str, ...]:
+        """Return a node's ids in rank order, sorting at most once per update."""
+        if node.ranked_version != self._version:
+            node.ranked = tuple(self._by_rank(node.ids))
+            node.ranked_version = self._version
+        return node.ranked
+
+    def _prefix_matches(self, query: str, limit: int) -> Iterable[str]:
+        node = self._trie
+        for char in query[:self.TRIE_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        ranked = self._ranked_node_ids(node)
+        if len(query) <= self.TRIE_DEPTH:
+            return ranked[:limit]
+
+        matches = []
+        for coin_id in ranked:
+            if any(term.startswith(query) for term in self._terms[coin_id]):
+                matches.append(coin_id)
+                if len(matches) >= limit:
+                    break
+        return matches
+
+    def _fuzzy_matches(self, query: str, limit: int) -> List[str]:
+        max_distance = 1 if len(query) <= 7 else 2
+        common = max(self.FUZZY_CANDIDATES, int(len(self._coins) * self.COMMON_TRIGRAM_RATIO))
+
+        query_grams = trigrams(query)
+        overlap = Counter()
+        for gram in query_grams:
+            postings = self._trigram_index.get(gram)
+            if postings and len(postings) <= common:
+                overlap.update(postings)
+
+        # Each edit destroys at most three trigrams, so closer terms must share more
+        min_overlap = max(1, len(query_grams) - 3 * max_distance)
+
+        scored = []
+        for coin_id, shared in overlap.most_common(self.FUZZY_CANDIDATES):
+            if shared < min_overlap:
+                break
+            distances = [
+                bounded_edit_distance(query, term, max_distance)
+                for term in self._fuzzy_terms(self._symbols[coin_id], self._terms[coin_id])
+            ]
+            distances = [d for d in distances if d is not None]
+            if distances:
+                scored.append((min(distances), self._ranks[coin_id], coin_id))
+
+        return [coin_id for _, _, coin_id in heapq.nsmallest(limit, scored)]